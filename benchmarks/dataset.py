@@ -0,0 +1,133 @@
+# benchmarks/dataset.py
+#
+# Synthetic, reproducible dataset for the load benchmarks. Rows are written with Core
+# executemany inserts (one bcrypt hash shared by every account) so that seeding tens of
+# thousands of rows takes seconds. Import after DATABASE_URL is set.
+
+import random
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import func, insert, select
+
+from database.db import Base, SessionLocal, engine
+from database.schema import migrate
+from utils.ingredients import reindex_ingredients
+from utils.jwt import hash_password
+from utils.models import (Appointment, Diagnosis, Doctor, DoctorWorkingHours, Herb, Patient, PostalCode, Remedy,
+                          RemedyHerb, Treatment)
+
+CHUNK_SIZE = 2000
+PASSWORD = "benchmark-password"
+
+FIRST_NAMES = ["Aarav", "Diya", "Ishaan", "Kavya", "Rohan", "Ananya", "Vihaan", "Meera", "Arjun", "Saanvi"]
+LAST_NAMES = ["Sharma", "Iyer", "Patel", "Nair", "Deshmukh", "Reddy", "Gupta", "Menon", "Joshi", "Kulkarni"]
+SPECIALIZATIONS = ["Panchakarma", "Kayachikitsa", "Shalya Tantra", "Kaumarbhritya", "Rasayana", "Dravyaguna"]
+CITIES = [("Pune", "Maharashtra", "411001"), ("Mumbai", "Maharashtra", "400001"), ("Kochi", "Kerala", "682001"),
+          ("Bengaluru", "Karnataka", "560001"), ("Jaipur", "Rajasthan", "302001"), ("Delhi", "Delhi", "110001")]
+# Centroid (latitude, longitude) of each postal code above
+POSTAL_CENTROIDS = {"411001": (18.5196, 73.8554), "400001": (18.9388, 72.8354), "682001": (9.9658, 76.2421),
+                    "560001": (12.9716, 77.5946), "302001": (26.9239, 75.8267), "110001": (28.6328, 77.2197)}
+BENEFITS = ["stress", "digestion", "immunity", "sleep", "joint pain", "skin", "memory", "energy", "cough", "fever"]
+STATUSES = ["Scheduled"] * 8 + ["Completed", "Cancelled"]
+
+
+def _insert_chunks(connection, model, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        connection.execute(insert(model), rows[start:start + CHUNK_SIZE])
+
+
+def _person(rng: random.Random, index: int, role: str, password: str) -> dict:
+    city, state, postal_code = rng.choice(CITIES)
+    return {
+        "first_name": rng.choice(FIRST_NAMES),
+        "last_name": rng.choice(LAST_NAMES),
+        "phone_number": f"+91{rng.randrange(10 ** 9, 10 ** 10)}",
+        "email": f"{role}{index}@bench.ayuvibe.com",
+        "address": f"{rng.randint(1, 999)} Ayurveda Marg",
+        "city": city,
+        "state": state,
+        "postal_code": postal_code,
+        "password": password,
+    }
+
+
+def seed(sizes: dict, seed_value: int = 42, reset: bool = True) -> dict:
+    """(Re)create the schema and fill it with ``sizes`` synthetic rows per table. Returns the row counts written."""
+    rng = random.Random(seed_value)
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+    migrate()
+
+    password = hash_password(PASSWORD)
+    anchor = datetime.combine(date.today(), time(9))
+    with engine.begin() as connection:
+        _insert_chunks(connection, PostalCode, [
+            {"postal_code": postal_code, "latitude": POSTAL_CENTROIDS[postal_code][0],
+             "longitude": POSTAL_CENTROIDS[postal_code][1], "city": city, "state": state}
+            for city, state, postal_code in CITIES
+        ])
+        doctors = [
+            {**_person(rng, index, "doctor", password), "specialization": rng.choice(SPECIALIZATIONS)}
+            for index in range(sizes["doctors"])
+        ]
+        _insert_chunks(connection, Doctor, doctors)
+        patients = [
+            {**_person(rng, index, "patient", password), "gender": rng.choice(["F", "M"]),
+             "date_of_birth": date(1950, 1, 1) + timedelta(days=rng.randint(0, 25000))}
+            for index in range(sizes["patients"])
+        ]
+        _insert_chunks(connection, Patient, patients)
+
+        doctor_ids = connection.execute(select(Doctor.doctor_id).order_by(Doctor.doctor_id)).scalars().all()
+        patient_ids = connection.execute(select(Patient.patient_id).order_by(Patient.patient_id)).scalars().all()
+        _insert_chunks(connection, DoctorWorkingHours, [
+            {"doctor_id": doctor_id, "weekday": weekday, "start_time": time(9), "end_time": time(17)}
+            for doctor_id in doctor_ids for weekday in range(5)
+        ])
+
+        # Half-hour grid, 60 days either side of today, within working hours
+        appointments = [
+            {
+                "patient_id": rng.choice(patient_ids),
+                "doctor_id": rng.choice(doctor_ids),
+                "appointment_date": anchor + timedelta(days=rng.randint(-60, 60), minutes=30 * rng.randrange(16)),
+                "reason": f"Consultation for {rng.choice(BENEFITS)}",
+                "appointment_status": rng.choice(STATUSES),
+            }
+            for _ in range(sizes["appointments"])
+        ]
+        _insert_chunks(connection, Appointment, appointments)
+
+        appointment_ids = connection.execute(select(Appointment.appointment_id)).scalars().all()
+        _insert_chunks(connection, Diagnosis, [
+            {"appointment_id": appointment_id, "diagnosis_description": f"Imbalance affecting {rng.choice(BENEFITS)}"}
+            for appointment_id in appointment_ids if rng.random() < 0.5
+        ])
+        diagnosis_ids = connection.execute(select(Diagnosis.diagnosis_id)).scalars().all()
+        _insert_chunks(connection, Treatment, [
+            {"diagnosis_id": diagnosis_id, "treatment_description": "Herbal course",
+             "dosage": f"{rng.randint(1, 3)} tsp daily", "duration": f"{rng.randint(1, 8)} weeks"}
+            for diagnosis_id in diagnosis_ids for _ in range(rng.randint(1, 2))
+        ])
+
+        _insert_chunks(connection, Herb, [
+            {"herb_name": f"Herb {index}", "botanical_name": f"Herba benchmarkia {index}",
+             "benefits": ", ".join(rng.sample(BENEFITS, 3)), "primary_uses": rng.choice(BENEFITS),
+             "dosage": "1-3 g", "form": rng.choice(["powder", "tablet", "decoction"])}
+            for index in range(sizes["herbs"])
+        ])
+        _insert_chunks(connection, Remedy, [
+            {"remedy_name": f"Remedy {index}", "ingredients": ", ".join(f"Herb {rng.randrange(sizes['herbs'] or 1)}"
+                                                                      for _ in range(3)),
+             "benefits": ", ".join(rng.sample(BENEFITS, 2)), "preparation_method": "Mix with warm water"}
+            for index in range(sizes["remedies"])
+        ])
+
+    with SessionLocal() as db:
+        reindex_ingredients(db)
+    with engine.connect() as connection:
+        counts = {
+            model.__tablename__: connection.execute(select(func.count()).select_from(model)).scalar()
+            for model in (Doctor, Patient, Appointment, Diagnosis, Treatment, Herb, Remedy, RemedyHerb, PostalCode)
+        }
+    return counts
@@ -0,0 +1,208 @@
+# benchmarks/load.py
+#
+# In-process load benchmark: seeds a synthetic dataset, drives the real endpoints through
+# httpx's ASGI transport with concurrent clients, and reports throughput and p50/p95/p99
+# latency per scenario as JSON. With --baseline, scenarios whose p95 or throughput moved
+# by more than --tolerance are flagged and the exit status is 1.
+#
+#     python -m benchmarks.load --database-url sqlite:///bench.db --output current.json
+#     python -m benchmarks.load --database-url sqlite:///bench.db --baseline current.json
+#
+# The target database is dropped and re-seeded unless --no-seed is given; never point it
+# at real data.
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+DEFAULT_DATABASE_URL = "sqlite:///benchmarks/bench.db"
+DEFAULT_SIZES = {"doctors": 500, "patients": 2000, "appointments": 10000, "herbs": 500, "remedies": 500}
+
+
+# name -> (method, path template, needs auth). Path templates are filled per request from
+# the seeded id ranges, so requests spread over the whole dataset.
+SCENARIOS = {
+    "home": ("GET", "/", False),
+    "doctors_page": ("GET", "/doctors/?limit=50", False),
+    "doctors_sparse": ("GET", "/doctors/?limit=50&fields=first_name,last_name,specialization", False),
+    "doctor_by_id": ("GET", "/doctors/{doctor_id}", False),
+    "doctor_search": ("GET", "/doctors/search?city={city}&limit=20", False),
+    "doctors_nearby": ("GET", "/doctors/nearby?postal_code={postal_code}&radius_km=50&limit=20", False),
+    "doctor_slots": ("GET", "/doctors/{doctor_id}/slots?start={day}", False),
+    "doctor_agenda": ("GET", "/doctors/{doctor_id}/appointments?start={day}T00:00:00&end={day}T23:59:59", True),
+    "herbs_page": ("GET", "/herbs/?limit=50", False),
+    "herb_by_id": ("GET", "/herbs/{herb_id}", False),
+    "herb_remedies": ("GET", "/herbs/{herb_id}/remedies", False),
+    "remedies_page": ("GET", "/remedies/?limit=50", False),
+    "catalog_search": ("GET", "/search?q={term}", False),
+    "patients_page": ("GET", "/patients/?limit=50", True),
+    "patient_timeline": ("GET", "/patients/{patient_id}/timeline", True),
+    "appointments_page": ("GET", "/appointments/?limit=50", True),
+    "auth": ("POST", "/auth", False),
+}
+# bcrypt-bound; run it explicitly with --scenarios auth
+DEFAULT_SCENARIOS = [name for name in SCENARIOS if name != "auth"]
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+    }
+
+
+def request_args(name: str, sizes: dict, rng: random.Random) -> tuple:
+    from datetime import date, timedelta
+
+    from benchmarks.dataset import BENEFITS, CITIES, PASSWORD
+
+    method, template, _ = SCENARIOS[name]
+    path = template.format(
+        doctor_id=rng.randint(1, max(sizes["doctors"], 1)),
+        patient_id=rng.randint(1, max(sizes["patients"], 1)),
+        herb_id=rng.randint(1, max(sizes["herbs"], 1)),
+        city=rng.choice(CITIES)[0],
+        postal_code=rng.choice(CITIES)[2],
+        day=date.today() + timedelta(days=rng.randint(0, 30)),
+        term=rng.choice(BENEFITS),
+    )
+    body = None
+    if name == "auth":
+        email = f"patient{rng.randrange(max(sizes['patients'], 1))}@bench.ayuvibe.com"
+        body = {"email": email, "password": PASSWORD}
+    return method, path, body
+
+
+async def run_scenario(client, name: str, sizes: dict, headers: dict, requests: int, concurrency: int,
+                       seed_value: int) -> dict:
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+    needs_auth = SCENARIOS[name][2]
+
+    async def worker(worker_id: int):
+        nonlocal errors
+        rng = random.Random(f"{seed_value}:{name}:{worker_id}")
+        for _ in remaining:
+            method, path, body = request_args(name, sizes, rng)
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body, headers=headers if needs_auth else None)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_benchmark(args, sizes: dict) -> dict:
+    import httpx
+
+    import main
+    from utils.jwt import create_access_token
+
+    # One token for the protected scenarios, minted directly so setup costs no bcrypt rounds
+    token = create_access_token({"sub": "patient0@bench.ayuvibe.com", "user_id": 1, "user_type": "patient"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    results = {}
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            while (await client.get("/health/ready")).status_code != 200:
+                await asyncio.sleep(0.05)
+            for name in args.scenarios:
+                if args.warmup:
+                    await run_scenario(client, name, sizes, headers, args.warmup, args.concurrency, args.seed)
+                results[name] = await run_scenario(client, name, sizes, headers, args.requests, args.concurrency,
+                                                   args.seed)
+                print(f"{name}: {results[name]}", file=sys.stderr)
+    return results
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> dict:
+    """Flag scenarios whose p95 grew, or whose throughput fell, by more than ``tolerance``."""
+    regressions = {}
+    for name, result in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        reasons = []
+        if before["p95_ms"] and result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            reasons.append(f"p95 {before['p95_ms']} -> {result['p95_ms']} ms")
+        if before["throughput_rps"] and result["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            reasons.append(f"throughput {before['throughput_rps']} -> {result['throughput_rps']} rps")
+        if result["errors"] > before["errors"]:
+            reasons.append(f"errors {before['errors']} -> {result['errors']}")
+        if reasons:
+            regressions[name] = reasons
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed a synthetic dataset and load-test the API in-process")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL))
+    parser.add_argument("--no-seed", action="store_true", help="Reuse the data already in the database")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for data and request mix")
+    for table, size in DEFAULT_SIZES.items():
+        parser.add_argument(f"--{table}", type=int, default=size, help=f"Synthetic {table} to seed")
+    parser.add_argument("--scenarios", nargs="+", default=DEFAULT_SCENARIOS, choices=sorted(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative change before flagging")
+    args = parser.parse_args(argv)
+
+    # The app reads its settings at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    sizes = {table: getattr(args, table) for table in DEFAULT_SIZES}
+
+    from benchmarks.dataset import seed
+
+    counts = seed(sizes, args.seed) if not args.no_seed else None
+    scenarios = asyncio.run(run_benchmark(args, sizes))
+    report = {
+        "database": args.database_url.split("://", 1)[0],
+        "python": platform.python_version(),
+        "concurrency": args.concurrency,
+        "requests_per_scenario": args.requests,
+        "dataset": counts or sizes,
+        "scenarios": scenarios,
+    }
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            report["regressions"] = compare(report, json.load(handle), args.tolerance)
+        status = 1 if report["regressions"] else 0
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+# benchmarks/serialization.py
+#
+# Serialization micro-benchmark: renders a page of patients the way FastAPI did before read
+# schemas (jsonable_encoder over ORM objects + stdlib json) and through the typed response
+# models, and exits non-zero when the typed path is not at least --min-speedup times faster.
+# No database is needed; the rows are transient ORM instances.
+#
+#     python -m benchmarks.serialization --rows 5000 --min-speedup 3
+
+import argparse
+import json
+import sys
+import time
+from datetime import date, datetime
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from utils.models import Patient
+from utils.responses import ORJSONResponse
+from utils.schema import PYDANTIC_V2, PatientPage
+
+
+def make_patients(rows: int) -> list:
+    return [
+        Patient(
+            patient_id=index, first_name=f"First{index}", last_name=f"Last{index}",
+            date_of_birth=date(1980, 1, 1 + index % 28), gender="F" if index % 2 else "M",
+            phone_number=f"+91{index:010d}", email=f"patient{index}@example.com",
+            address=f"{index} Ayurveda Marg", city="Pune", state="Maharashtra", postal_code="411001",
+            registration_date=datetime(2024, 1, 1, 9, index % 60), password="$2b$12$" + "x" * 53,
+        )
+        for index in range(rows)
+    ]
+
+
+def legacy_render(page: dict) -> bytes:
+    # Untyped route: reflection over every ORM attribute (password hash included)
+    return JSONResponse(content=None).render(jsonable_encoder(page))
+
+
+if PYDANTIC_V2:
+    from pydantic import TypeAdapter
+
+    PAGE_ADAPTER = TypeAdapter(PatientPage)
+
+    def typed_render(page: dict) -> bytes:
+        # response_model route: validate from attributes, dump straight to JSON bytes
+        return PAGE_ADAPTER.dump_json(PAGE_ADAPTER.validate_python(page))
+
+    def typed_orjson_render(page: dict) -> bytes:
+        return ORJSONResponse(content=None).render(PAGE_ADAPTER.dump_python(PAGE_ADAPTER.validate_python(page)))
+else:
+    def typed_render(page: dict) -> bytes:
+        return ORJSONResponse(content=None).render(PatientPage.parse_obj(page).dict())
+
+    typed_orjson_render = typed_render
+
+
+def best_of(func, page: dict, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func(page)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare response serialization paths")
+    parser.add_argument("--rows", type=int, default=5000, help="Patients per page")
+    parser.add_argument("--runs", type=int, default=5, help="Best-of runs per path")
+    parser.add_argument("--min-speedup", type=float, default=3.0, help="Required legacy/typed time ratio")
+    args = parser.parse_args(argv)
+
+    page = {"items": make_patients(args.rows), "next_cursor": None}
+    assert b"password" not in typed_render({"items": page["items"][:1], "next_cursor": None})
+
+    legacy = best_of(legacy_render, page, args.runs)
+    typed = best_of(typed_render, page, args.runs)
+    typed_orjson = best_of(typed_orjson_render, page, args.runs)
+    report = {
+        "rows": args.rows,
+        "legacy_ms": round(legacy * 1000, 2),
+        "typed_ms": round(typed * 1000, 2),
+        "typed_orjson_ms": round(typed_orjson * 1000, 2),
+        "speedup": round(legacy / typed, 2),
+        "min_speedup": args.min_speedup,
+    }
+    report["ok"] = report["speedup"] >= args.min_speedup
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+# benchmarks/startup.py
+#
+# Startup budget check: measures `import main` and the time until /health/ready goes green,
+# each in a fresh interpreter, and exits non-zero when either exceeds its budget.
+#
+#     DATABASE_URL=sqlite:///bench.db python -m benchmarks.startup --import-budget 3 --ready-budget 5
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = """
+import time
+started = time.perf_counter()
+import main
+print(time.perf_counter() - started)
+"""
+
+READY_PROBE = """
+import time
+started = time.perf_counter()
+import main
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    while client.get("/health/ready").status_code != 200:
+        if time.perf_counter() - started > {timeout}:
+            raise SystemExit("never became ready")
+        time.sleep(0.01)
+print(time.perf_counter() - started)
+"""
+
+
+def run_probe(code: str) -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Enforce import and readiness time budgets")
+    parser.add_argument("--import-budget", type=float, default=3.0, help="Seconds allowed for `import main`")
+    parser.add_argument("--ready-budget", type=float, default=5.0, help="Seconds allowed until /health/ready is 200")
+    parser.add_argument("--runs", type=int, default=3, help="Best-of runs per measurement")
+    args = parser.parse_args(argv)
+
+    import_seconds = min(run_probe(IMPORT_PROBE) for _ in range(args.runs))
+    ready_seconds = min(run_probe(READY_PROBE.format(timeout=args.ready_budget * 2)) for _ in range(args.runs))
+    report = {
+        "import_seconds": round(import_seconds, 3),
+        "import_budget": args.import_budget,
+        "ready_seconds": round(ready_seconds, 3),
+        "ready_budget": args.ready_budget,
+        "ok": import_seconds <= args.import_budget and ready_seconds <= args.ready_budget,
+    }
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,63 @@
 # backend/app/db.py
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 
+from database.pool import instrumented_pool_class, pool_options
+from database.query_stats import instrument_engine
+
 DATABASE_USER = os.getenv("POSTGRES_USER", "postgres")
 DATABASE_PASSWORD = os.getenv("POSTGRES_PASSWORD", "admin123")
 DATABASE_HOST = os.getenv("POSTGRES_HOST", "localhost")  # 'db' refers to the Docker service name
 DATABASE_PORT = os.getenv("POSTGRES_PORT", "5432")
 DATABASE_NAME = os.getenv("POSTGRES_DB", "ayuvibe_db")
 
-SQLALCHEMY_DATABASE_URL = f"postgresql://{DATABASE_USER}:{DATABASE_PASSWORD}@{DATABASE_HOST}:{DATABASE_PORT}/{DATABASE_NAME}"
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"postgresql://{DATABASE_USER}:{DATABASE_PASSWORD}@{DATABASE_HOST}:{DATABASE_PORT}/{DATABASE_NAME}"
+)
+
+# Async drivers used for each sync backend, e.g. sqlite:///local.db -> sqlite+aiosqlite:///local.db
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)).render_as_string(
+        hide_password=False
+    )
+
+
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(SQLALCHEMY_DATABASE_URL))
+
+IS_SQLITE = make_url(SQLALCHEMY_DATABASE_URL).get_backend_name() == "sqlite"
+CONNECT_ARGS = {"check_same_thread": False} if IS_SQLITE else {}
+
+# SQLite keeps SQLAlchemy's default pooling; server databases get the sized, instrumented pool
+SYNC_POOL_ARGS = {} if IS_SQLITE else {"poolclass": instrumented_pool_class("sync"), **pool_options()}
+ASYNC_POOL_ARGS = {} if IS_SQLITE else {"poolclass": instrumented_pool_class("async", is_async=True), **pool_options()}
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL
+    SQLALCHEMY_DATABASE_URL,
+    connect_args=CONNECT_ARGS,
+    **SYNC_POOL_ARGS
+)
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    **ASYNC_POOL_ARGS
 )
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 # Dependency to get DB session
@@ -27,3 +67,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency to get an async DB session for `async def` endpoints
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
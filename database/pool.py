@@ -0,0 +1,94 @@
+# database/pool.py
+
+import os
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Connection pool settings, sized per worker process
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+
+def pool_options() -> dict:
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+class PoolStats:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_checkout(self, wait_seconds: float, overflowed: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+            if overflowed:
+                self.overflow_events += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            checkouts = self.checkouts or 1
+            return {
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "checkouts": self.checkouts,
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+                "avg_checkout_wait_ms": round(self.wait_seconds_total / checkouts * 1000, 3),
+                "max_checkout_wait_ms": round(self.wait_seconds_max * 1000, 3),
+            }
+
+
+class InstrumentedPoolMixin:
+    """Times every checkout and counts overflow connections and checkout timeouts."""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        overflow_before = self.overflow()
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_checkout(time.perf_counter() - start, self.overflow() > max(overflow_before, 0))
+        return connection
+
+
+def instrumented_pool_class(name: str, is_async: bool = False):
+    # Stats live on the class so they survive pool.recreate() after engine.dispose()
+    base = AsyncAdaptedQueuePool if is_async else QueuePool
+    return type(f"Instrumented{base.__name__}", (InstrumentedPoolMixin, base), {"stats": PoolStats(name)})
+
+
+def pool_stats(engine) -> dict:
+    pool = engine.pool
+    stats = getattr(pool, "stats", None)
+    if stats is None:
+        return {"pool_class": type(pool).__name__, "status": pool.status()}
+    return {"pool_class": type(pool).__name__, **stats.snapshot(pool)}
@@ -0,0 +1,84 @@
+# database/query_stats.py
+
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this are logged with their parameter shape (never the values)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_MAX_SQL = 2000
+SLOW_QUERY_MAX_PARAMS = 20
+
+
+class QueryStats:
+    """Queries and database time spent on behalf of one request."""
+
+    __slots__ = ("queries", "seconds", "slow_queries", "route")
+
+    def __init__(self, route: str = ""):
+        self.queries = 0
+        self.seconds = 0.0
+        self.slow_queries = 0
+        self.route = route
+
+
+# Set by the metrics middleware for the lifetime of a request. Sync endpoints run in a
+# threadpool with a copy of the context, so they see (and update) the same QueryStats.
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def parameter_shape(parameters, executemany: bool = False):
+    """Describe bound parameters by name and type, e.g. ``{'id': 'int'}`` or ``500 x {...}``."""
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameter_shape(parameters[0]) if parameters else None
+        return f"{len(parameters)} x {first}"
+    if isinstance(parameters, dict):
+        shape = {key: type(value).__name__ for key, value in list(parameters.items())[:SLOW_QUERY_MAX_PARAMS]}
+        if len(parameters) > SLOW_QUERY_MAX_PARAMS:
+            return f"{len(parameters)} parameters, first {SLOW_QUERY_MAX_PARAMS}: {shape}"
+        return shape
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        if stats is not None:
+            stats.slow_queries += 1
+        logger.warning(
+            "Slow query (%.1f ms, route %s): %s | parameters: %s",
+            elapsed * 1000,
+            stats.route if stats is not None else "-",
+            " ".join(statement.split())[:SLOW_QUERY_MAX_SQL],
+            parameter_shape(parameters, executemany),
+        )
+
+
+def _handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute; drop their start time
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start"):
+        connection.info["query_start"].pop()
+
+
+def instrument_engine(engine):
+    """Count and time every statement run through ``engine`` (pass ``async_engine.sync_engine`` for async)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,39 @@
+# database/schema.py
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from database.db import Base, engine
+
+
+def migrate(bind=engine):
+    """Create missing tables, indexes and database-specific search DDL.
+
+    Run once per deploy (``python manage.py migrate``) rather than from every worker at import time.
+    ``create_all`` only builds tables it creates, so nullable columns and indexes added to existing
+    tables are created here too.
+    """
+    # Registers the models and the DDL hooks attached to Base.metadata
+    import utils.models  # noqa: F401
+    import utils.search  # noqa: F401
+    from utils.ingredients import fill_herb_name_keys
+
+    Base.metadata.create_all(bind=bind)
+    with bind.begin() as connection:
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in present and column.nullable:
+                    ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+    with Session(bind) as db:
+        fill_herb_name_keys(db, missing_only=True)
+    if bind.dialect.name == "postgresql":
+        from utils.autocomplete import create_trigram_indexes
+
+        create_trigram_indexes(bind)
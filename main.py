@@ -1,40 +1,146 @@
 # main.py
 
-from fastapi import FastAPI, Depends, HTTPException, status
+import logging
+import time
+from types import SimpleNamespace
+
+from fastapi import FastAPI, Body, Depends, HTTPException, Query, Request, status
+from fastapi.datastructures import Default
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from database.db import engine, get_db, Base
-from typing import List
+from database.db import engine, async_engine, get_db, get_async_db
+from database.pool import pool_stats
+from typing import Any, List, Optional
 from utils.schema import (PatientSignup, PatientUpdate, DoctorSignup, DoctorUpdate,
                           AppointmentCreate, AppointmentUpdate, DiagnosisCreate, DiagnosisUpdate,
                           TreatmentCreate, TreatmentUpdate, FollowUpCreate, FollowUpUpdate, Login, HerbResponse,
-                          HerbCreate, RemedyResponse, RemedyCreate)
-from utils.models import Doctor, Patient, Appointment, Diagnosis, Treatment, FollowUp, Herb, Remedy
-from utils.jwt import hash_password, verify_password, create_access_token
-from fastapi.security import OAuth2PasswordBearer
-from datetime import timedelta
+                          HerbCreate, RemedyResponse, RemedyCreate, PatientRead, PatientPage, PatientTimeline,
+                          DoctorRead, DoctorPage, DoctorDirectoryPage, NearbyDoctors, AppointmentRead, AppointmentPage,
+                          AppointmentDiagnosis, DiagnosisRead, DiagnosisPage, TreatmentRead, TreatmentPage,
+                          FollowUpRead, FollowUpPage, HerbPage, RemedyPage, SearchResponse, AutocompleteResponse,
+                          WorkingHours, WorkingHoursRead, DoctorSlots)
+from utils.models import Doctor, DoctorWorkingHours, Patient, Appointment, Diagnosis, Treatment, FollowUp, Herb, Remedy
+from utils.jwt import ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token
+from utils.password_pool import PasswordPoolBusy, password_pool, hash_password, verify_password
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate_async
+from utils.export import export_response
+from utils.search import search_catalog
+from utils.autocomplete import DEFAULT_SUGGESTIONS, MAX_SUGGESTIONS, autocomplete_index, parse_types, suggest
+from utils.chat import DEFAULT_CHAT_RESULTS, MAX_CHAT_RESULTS, answer_events, chat_index
+from utils.cache import catalog_cache
+from utils.directory import DIRECTORY_COLUMNS, directory_filters, search_doctors
+from utils.geo import DEFAULT_RADIUS_KM, MAX_RADIUS_KM, find_nearby_doctors, nearby_index
+from utils.accounts import email_registered, email_registered_async, find_account_async
+from utils.timeline import load_appointment_diagnoses, load_patient_timeline
+from utils.catalog import (get_cached_item, get_cached_page, herb_saved, herbs_created, herb_deleted, remedy_saved,
+                           remedies_created, remedy_deleted)
+from utils.bulk import bulk_insert, check_appointment_references, check_unique, validate_items
+from utils.lifespan import lifespan, readiness
+from utils.auth import CurrentUser, get_current_user, token_cache
+from utils.responses import ORJSONResponse
+from utils.fields import field_columns, project_page, sparse_response
+from utils.agenda import load_agenda
+from utils.ingredients import link_ingredients, relink_herbs, remedies_for_herb, unlink_herb, unlink_remedy
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, registry
+from utils.ratelimit import AdmissionMiddleware, admission
+from utils.scheduling import (APPOINTMENT_SLOT_MINUTES, book_appointment, check_bookings, check_reschedule,
+                              find_free_slots, replace_working_hours)
+from datetime import date, datetime, timedelta
+
+# Schema changes are applied by `python manage.py migrate`, not at import time
+# Default(...) keeps the class a placeholder: routes with a response_model can still be
+# serialized straight to JSON bytes by pydantic, everything else is rendered with orjson
+app = FastAPI(title="AyuVibe - Ayurvedic Doctors Directory", lifespan=lifespan,
+              default_response_class=Default(ORJSONResponse))
+# Middleware added later wraps what was added earlier. Metrics is added last so it wraps
+# admission and sees rejected requests too
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+logger = logging.getLogger(__name__)
+
+
+@app.exception_handler(PasswordPoolBusy)
+def password_pool_busy_handler(request: Request, exc: PasswordPoolBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Authentication service is busy, please retry"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth")
+@app.get("/", tags=["Home"])
+def home():
+    return {"message": "This is AyuVibe home"}
 
-# Create the database tables
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="AyuVibe - Ayurvedic Doctors Directory")
+@app.get("/health/live", tags=["Health"])
+def liveness():
+    return {"status": "ok"}
 
 
-@app.get("/", tags=["Home"])
-def home():
-    return {"message": "This is AyuVibe home"}
+@app.get("/health/ready", tags=["Health"])
+def readiness_check():
+    if not readiness.ready:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=readiness.status())
+    return readiness.status()
+
+
+@app.get("/stats/password-pool", tags=["Stats"])
+def password_pool_stats():
+    return password_pool.stats()
+
+
+@app.get("/stats/cache", tags=["Stats"])
+def cache_stats():
+    return catalog_cache.stats()
+
+
+@app.get("/stats/auth-cache", tags=["Stats"])
+def auth_cache_stats():
+    return token_cache.stats()
+
+
+@app.get("/stats/autocomplete", tags=["Stats"])
+def autocomplete_stats():
+    return autocomplete_index.stats()
+
+
+@app.get("/stats/nearby-index", tags=["Stats"])
+def nearby_index_stats():
+    return nearby_index.stats()
+
+
+@app.get("/stats/chat-index", tags=["Stats"])
+def chat_index_stats():
+    return chat_index.stats()
+
+
+@app.get("/stats/admission", tags=["Stats"])
+def admission_stats():
+    return admission.stats()
+
+
+@app.get("/metrics", tags=["Stats"])
+def metrics():
+    return PlainTextResponse(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/stats/db-pool", tags=["Stats"])
+def db_pool_stats():
+    return {"sync": pool_stats(engine), "async": pool_stats(async_engine.sync_engine)}
 
 # Routes
 # Patients CRUD Endpoints
 @app.post("/signup/patient", tags=["Auth"])
-def patient_signup(patient: PatientSignup, db: Session = Depends(get_db)):
-    existing_patient = db.query(Patient).filter(Patient.email == patient.email).first()
-    if existing_patient:
+async def patient_signup(patient: PatientSignup, db: AsyncSession = Depends(get_async_db)):
+    if await email_registered_async(db, patient.email):
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = hash_password(patient.password)
+    hashed_password = await hash_password(patient.password)
     new_patient = Patient(
         first_name=patient.first_name,
         last_name=patient.last_name,
@@ -49,26 +155,28 @@ def patient_signup(patient: PatientSignup, db: Session = Depends(get_db)):
         postal_code=patient.postal_code
     )
     db.add(new_patient)
-    db.commit()
-    db.refresh(new_patient)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
     return {"message": "Patient registered successfully"}
 
 
 @app.post("/auth", tags=["Auth"])
-def authenticate(login: Login, db: Session = Depends(get_db)):
-    user = db.query(Patient).filter(Patient.email == login.email).first() or \
-           db.query(Doctor).filter(Doctor.email == login.email).first()
+async def authenticate(login: Login, db: AsyncSession = Depends(get_async_db)):
+    user = await find_account_async(db, login.email)
 
     if not user:
         raise HTTPException(status_code=400, detail="Invalid email or password")
 
-    if not verify_password(login.password, user.password):
+    if not await verify_password(login.password, user.password):
         raise HTTPException(status_code=400, detail="Invalid email or password")
 
     # Generate JWT token
-    access_token_expires = timedelta(minutes=30)
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": login.email, "user_id": user.patient_id if isinstance(user, Patient) else user.doctor_id},
+        data={"sub": user.email, "user_id": user.user_id, "user_type": user.user_type},
         expires_delta=access_token_expires
     )
 
@@ -77,20 +185,16 @@ def authenticate(login: Login, db: Session = Depends(get_db)):
 
 # New Login Route: Returns user data
 @app.post("/login", tags=["Auth"])
-def login_user(login: Login, db: Session = Depends(get_db)):
-    user = db.query(Patient).filter(Patient.email == login.email).first() or \
-           db.query(Doctor).filter(Doctor.email == login.email).first()
+async def login_user(login: Login, db: AsyncSession = Depends(get_async_db)):
+    user = await find_account_async(db, login.email)
 
     if not user:
         raise HTTPException(status_code=400, detail="Invalid email or password")
 
-    if not verify_password(login.password, user.password):
+    if not await verify_password(login.password, user.password):
         raise HTTPException(status_code=400, detail="Invalid email or password")
 
-
-    print("====================================")
-    print(user)
-    print("====================================")
+    logger.info("Login succeeded for %s %s", user.user_type, user.user_id)
 
     # Returning user data (excluding password)
     user_data = {
@@ -98,35 +202,49 @@ def login_user(login: Login, db: Session = Depends(get_db)):
         "first_name": user.first_name,
         "last_name": user.last_name,
         "email": user.email,
-        "user_type": "patient" if isinstance(user, Patient) else "doctor",
+        "user_type": user.user_type,
         "registration_date": user.registration_date
     }
 
     return user_data
 
 
-@app.get("/patients/", tags=["Patient"])
-def get_patients(db: Session = Depends(get_db)):
-    return db.query(Patient).all()
+@app.get("/patients/", response_model=PatientPage, dependencies=[Depends(get_current_user)], tags=["Patient"])
+async def get_patients(cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                       fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+                       db: AsyncSession = Depends(get_async_db)):
+    columns = field_columns(Patient, fields)
+    page = await paginate_async(db, Patient, cursor, limit, columns)
+    return sparse_response(page) if columns else page
 
 
 # Update Patient
-@app.put("/patients/{patient_id}", tags=["Patient"])
+@app.put("/patients/{patient_id}", response_model=PatientRead,
+         dependencies=[Depends(get_current_user)], tags=["Patient"])
 def update_patient(patient_id: int, patient: PatientUpdate, db: Session = Depends(get_db)):
     db_patient = db.query(Patient).filter(Patient.patient_id == patient_id).first()
     if not db_patient:
         raise HTTPException(status_code=404, detail="Patient not found")
 
-    for key, value in patient.dict(exclude_unset=True).items():
+    changes = patient.dict(exclude_unset=True)
+    email = changes.get("email")
+    if email and email.lower() != (db_patient.email or "").lower() and email_registered(db, email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    for key, value in changes.items():
         setattr(db_patient, key, value)
 
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
     db.refresh(db_patient)
     return db_patient
 
 
 # Delete Patient
-@app.delete("/patients/{patient_id}", tags=["Patient"])
+@app.delete("/patients/{patient_id}", dependencies=[Depends(get_current_user)], tags=["Patient"])
 def delete_patient(patient_id: int, db: Session = Depends(get_db)):
     db_patient = db.query(Patient).filter(Patient.patient_id == patient_id).first()
     if not db_patient:
@@ -137,22 +255,44 @@ def delete_patient(patient_id: int, db: Session = Depends(get_db)):
     return {"message": "Patient deleted successfully"}
 
 
-@app.get("/patients/{patient_id}", tags=["Patient"])
-def get_patient_by_id(patient_id: int, db: Session = Depends(get_db)):
-    patient = db.query(Patient).filter(Patient.patient_id == patient_id).first()
+@app.get("/patients/{patient_id}", response_model=PatientRead,
+         dependencies=[Depends(get_current_user)], tags=["Patient"])
+async def get_patient_by_id(patient_id: int, db: AsyncSession = Depends(get_async_db)):
+    patient = await db.get(Patient, patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     return patient
 
 
+@app.get("/patients/{patient_id}/appointments", response_model=AppointmentPage,
+         dependencies=[Depends(get_current_user)], tags=["Patient"])
+async def get_patient_appointments(patient_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                                   status: Optional[str] = None, cursor: Optional[str] = None,
+                                   limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                                   fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+                                   db: AsyncSession = Depends(get_async_db)):
+    if await db.get(Patient, patient_id) is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    columns = field_columns(Appointment, fields)
+    page = await load_agenda(db, Appointment.patient_id, patient_id, start, end, status, cursor, limit, columns)
+    return sparse_response(page) if columns else page
+
+
+@app.get("/patients/{patient_id}/timeline", response_model=PatientTimeline,
+         dependencies=[Depends(get_current_user)], tags=["Patient"])
+async def get_patient_timeline(patient_id: int, db: AsyncSession = Depends(get_async_db)):
+    if await db.get(Patient, patient_id) is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    return {"patient_id": patient_id, "appointments": await load_patient_timeline(db, patient_id)}
+
+
 # Doctors CRUD Endpoints
 @app.post("/signup/doctor", tags=["Auth"])
-def doctor_signup(doctor: DoctorSignup, db: Session = Depends(get_db)):
-    existing_doctor = db.query(Doctor).filter(Doctor.email == doctor.email).first()
-    if existing_doctor:
+async def doctor_signup(doctor: DoctorSignup, db: AsyncSession = Depends(get_async_db)):
+    if await email_registered_async(db, doctor.email):
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = hash_password(doctor.password)
+    hashed_password = await hash_password(doctor.password)
     new_doctor = Doctor(
         first_name=doctor.first_name,
         last_name=doctor.last_name,
@@ -166,27 +306,68 @@ def doctor_signup(doctor: DoctorSignup, db: Session = Depends(get_db)):
         postal_code=doctor.postal_code
     )
     db.add(new_doctor)
-    db.commit()
-    db.refresh(new_doctor)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
+    autocomplete_index.upsert_doctor(new_doctor)
+    nearby_index.upsert_doctor(new_doctor)
     return {"message": "Doctor registered successfully"}
 
-@app.get("/doctors/", tags=["Doctor"])
-def get_doctors(db: Session = Depends(get_db)):
-    return db.query(Doctor).all()
+@app.get("/doctors/", response_model=DoctorPage, tags=["Doctor"])
+async def get_doctors(cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                      fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+                      db: AsyncSession = Depends(get_async_db)):
+    columns = field_columns(Doctor, fields)
+    page = await paginate_async(db, Doctor, cursor, limit, columns)
+    return sparse_response(page) if columns else page
+
+
+@app.get("/doctors/search", response_model=DoctorDirectoryPage, tags=["Doctor"])
+async def search_doctor_directory(specialization: Optional[str] = None, city: Optional[str] = None,
+                                  state: Optional[str] = None, name: Optional[str] = Query(None, min_length=1),
+                                  sort: str = "last_name", cursor: Optional[str] = None,
+                                  limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                                  fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+                                  db: AsyncSession = Depends(get_async_db)):
+    filters = directory_filters(specialization=specialization, city=city, state=state, name=name)
+    columns = field_columns(Doctor, fields, allowed=[column.key for column in DIRECTORY_COLUMNS])
+    page = await search_doctors(db, filters, sort, cursor, limit, columns)
+    return sparse_response(page) if columns else page
+
+
+@app.get("/doctors/nearby", response_model=NearbyDoctors, tags=["Doctor"])
+async def nearby_doctors(postal_code: str = Query(..., min_length=1),
+                         radius_km: float = Query(DEFAULT_RADIUS_KM, gt=0, le=MAX_RADIUS_KM),
+                         limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                         db: AsyncSession = Depends(get_async_db)):
+    return await find_nearby_doctors(db, postal_code, radius_km, limit)
 
 
 # Update Doctor
-@app.put("/doctors/{doctor_id}", tags=["Doctor"])
+@app.put("/doctors/{doctor_id}", response_model=DoctorRead, tags=["Doctor"])
 def update_doctor(doctor_id: int, doctor: DoctorUpdate, db: Session = Depends(get_db)):
     db_doctor = db.query(Doctor).filter(Doctor.doctor_id == doctor_id).first()
     if not db_doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
 
-    for key, value in doctor.dict(exclude_unset=True).items():
+    changes = doctor.dict(exclude_unset=True)
+    email = changes.get("email")
+    if email and email.lower() != (db_doctor.email or "").lower() and email_registered(db, email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    for key, value in changes.items():
         setattr(db_doctor, key, value)
 
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
     db.refresh(db_doctor)
+    autocomplete_index.upsert_doctor(db_doctor)
+    nearby_index.upsert_doctor(db_doctor)
     return db_doctor
 
 
@@ -199,39 +380,103 @@ def delete_doctor(doctor_id: int, db: Session = Depends(get_db)):
 
     db.delete(db_doctor)
     db.commit()
+    autocomplete_index.remove("doctor", doctor_id)
+    nearby_index.remove(doctor_id)
     return {"message": "Doctor deleted successfully"}
 
 
-@app.get("/doctors/{doctor_id}", tags=["Doctor"])
-def get_doctor_by_id(doctor_id: int, db: Session = Depends(get_db)):
-    doctor = db.query(Doctor).filter(Doctor.doctor_id == doctor_id).first()
+@app.get("/doctors/{doctor_id}", response_model=DoctorRead, tags=["Doctor"])
+async def get_doctor_by_id(doctor_id: int, db: AsyncSession = Depends(get_async_db)):
+    doctor = await db.get(Doctor, doctor_id)
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     return doctor
 
 
+@app.get("/doctors/{doctor_id}/working-hours", response_model=List[WorkingHoursRead], tags=["Doctor"])
+async def get_working_hours(doctor_id: int, db: AsyncSession = Depends(get_async_db)):
+    if await db.get(Doctor, doctor_id) is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    stmt = (select(DoctorWorkingHours).where(DoctorWorkingHours.doctor_id == doctor_id)
+            .order_by(DoctorWorkingHours.weekday, DoctorWorkingHours.start_time))
+    return (await db.execute(stmt)).scalars().all()
+
+
+@app.put("/doctors/{doctor_id}/working-hours", response_model=List[WorkingHoursRead], tags=["Doctor"])
+def set_working_hours(doctor_id: int, hours: List[WorkingHours], user: CurrentUser = Depends(get_current_user),
+                      db: Session = Depends(get_db)):
+    if user.user_type != "doctor" or user.user_id != doctor_id:
+        raise HTTPException(status_code=403, detail="Doctors can only change their own working hours")
+    if db.get(Doctor, doctor_id) is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    return replace_working_hours(db, doctor_id, hours)
+
+
+@app.get("/doctors/{doctor_id}/appointments", response_model=AppointmentPage,
+         dependencies=[Depends(get_current_user)], tags=["Doctor"])
+async def get_doctor_appointments(doctor_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                                  status: Optional[str] = None, cursor: Optional[str] = None,
+                                  limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                                  fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+                                  db: AsyncSession = Depends(get_async_db)):
+    if await db.get(Doctor, doctor_id) is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    columns = field_columns(Appointment, fields)
+    page = await load_agenda(db, Appointment.doctor_id, doctor_id, start, end, status, cursor, limit, columns)
+    return sparse_response(page) if columns else page
+
+
+@app.get("/doctors/{doctor_id}/slots", response_model=DoctorSlots, tags=["Doctor"])
+async def get_doctor_slots(doctor_id: int, start: date, end: Optional[date] = None,
+                           db: AsyncSession = Depends(get_async_db)):
+    slots = await find_free_slots(db, doctor_id, start, end or start)
+    return {
+        "doctor_id": doctor_id,
+        "slot_minutes": APPOINTMENT_SLOT_MINUTES,
+        "slots": [{"start": slot_start, "end": slot_end} for slot_start, slot_end in slots],
+    }
+
+
 # Appointments CRUD Endpoints
-@app.post("/appointments/", response_model=AppointmentCreate, tags=["Appointments"])
+@app.post("/appointments/", response_model=AppointmentRead,
+          dependencies=[Depends(get_current_user)], tags=["Appointments"])
 def create_appointment(appointment: AppointmentCreate, db: Session = Depends(get_db)):
-    db_appointment = Appointment(**appointment.dict())
-    db.add(db_appointment)
-    db.commit()
-    db.refresh(db_appointment)
-    return db_appointment
+    return book_appointment(db, appointment.dict())
+
+
+@app.post("/appointments/bulk", dependencies=[Depends(get_current_user)], tags=["Appointments"])
+def create_appointments_bulk(items: List[Any] = Body(...), db: Session = Depends(get_db)):
+    valid, errors = validate_items(items, AppointmentCreate)
+    valid = check_appointment_references(db, valid, errors)
+    valid = check_bookings(db, valid, errors)
+    created = bulk_insert(db, Appointment, valid, errors)
+    return {"created": created, "errors": sorted(errors, key=lambda error: error["index"])}
+
+@app.get("/appointments/", response_model=AppointmentPage,
+         dependencies=[Depends(get_current_user)], tags=["Appointments"])
+async def get_appointments(cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                           fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+                           db: AsyncSession = Depends(get_async_db)):
+    columns = field_columns(Appointment, fields)
+    page = await paginate_async(db, Appointment, cursor, limit, columns)
+    return sparse_response(page) if columns else page
+
 
-@app.get("/appointments/", tags=["Appointments"])
-def get_appointments(db: Session = Depends(get_db)):
-    return db.query(Appointment).all()
+@app.get("/appointments/export", dependencies=[Depends(get_current_user)], tags=["Appointments"])
+def export_appointments(format: str = "ndjson"):
+    return export_response(Appointment, format, "appointments")
 
 
 # Update Appointment
-@app.put("/appointments/{appointment_id}", tags=["Appointments"])
+@app.put("/appointments/{appointment_id}", response_model=AppointmentRead,
+         dependencies=[Depends(get_current_user)], tags=["Appointments"])
 def update_appointment(appointment_id: int, appointment: AppointmentUpdate, db: Session = Depends(get_db)):
     db_appointment = db.query(Appointment).filter(Appointment.appointment_id == appointment_id).first()
     if not db_appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
 
-    for key, value in appointment.dict(exclude_unset=True).items():
+    changes = check_reschedule(db, db_appointment, appointment.dict(exclude_unset=True))
+    for key, value in changes.items():
         setattr(db_appointment, key, value)
 
     db.commit()
@@ -240,7 +485,7 @@ def update_appointment(appointment_id: int, appointment: AppointmentUpdate, db:
 
 
 # Delete Appointment
-@app.delete("/appointments/{appointment_id}", tags=["Appointments"])
+@app.delete("/appointments/{appointment_id}", dependencies=[Depends(get_current_user)], tags=["Appointments"])
 def delete_appointment(appointment_id: int, db: Session = Depends(get_db)):
     db_appointment = db.query(Appointment).filter(Appointment.appointment_id == appointment_id).first()
     if not db_appointment:
@@ -251,33 +496,28 @@ def delete_appointment(appointment_id: int, db: Session = Depends(get_db)):
     return {"message": "Appointment deleted successfully"}
 
 
-@app.get("/appointments/{appointment_id}", tags=["Appointments"])
-def get_appointment_by_id(appointment_id: int, db: Session = Depends(get_db)):
-    appointment = db.query(Appointment).filter(Appointment.appointment_id == appointment_id).first()
+@app.get("/appointments/{appointment_id}", response_model=AppointmentRead,
+         dependencies=[Depends(get_current_user)], tags=["Appointments"])
+async def get_appointment_by_id(appointment_id: int, db: AsyncSession = Depends(get_async_db)):
+    appointment = await db.get(Appointment, appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     return appointment
 
 
-@app.get("/appointments/{appointment_id}/diagnoses_treatments", tags=["Appointments"])
-def get_diagnoses_and_treatments_by_appointment(appointment_id: int, db: Session = Depends(get_db)):
-    diagnoses = db.query(Diagnosis).filter(Diagnosis.appointment_id == appointment_id).all()
+@app.get("/appointments/{appointment_id}/diagnoses_treatments", response_model=List[AppointmentDiagnosis],
+         dependencies=[Depends(get_current_user)], tags=["Appointments"])
+async def get_diagnoses_and_treatments_by_appointment(appointment_id: int, db: AsyncSession = Depends(get_async_db)):
+    result = await load_appointment_diagnoses(db, appointment_id)
 
-    if not diagnoses:
+    if not result:
         raise HTTPException(status_code=404, detail="No diagnoses found for this appointment")
 
-    result = []
-    for diagnosis in diagnoses:
-        treatments = db.query(Treatment).filter(Treatment.diagnosis_id == diagnosis.diagnosis_id).all()
-        result.append({
-            "diagnosis": diagnosis,
-            "treatments": treatments
-        })
-
     return result
 
 # Diagnoses CRUD Endpoints
-@app.post("/diagnoses/", response_model=DiagnosisCreate, tags=["Diagnoses"])
+@app.post("/diagnoses/", response_model=DiagnosisRead,
+          dependencies=[Depends(get_current_user)], tags=["Diagnoses"])
 def create_diagnosis(diagnosis: DiagnosisCreate, db: Session = Depends(get_db)):
     db_diagnosis = Diagnosis(**diagnosis.dict())
     db.add(db_diagnosis)
@@ -285,13 +525,23 @@ def create_diagnosis(diagnosis: DiagnosisCreate, db: Session = Depends(get_db)):
     db.refresh(db_diagnosis)
     return db_diagnosis
 
-@app.get("/diagnoses/", tags=["Diagnoses"])
-def get_diagnoses(db: Session = Depends(get_db)):
-    return db.query(Diagnosis).all()
+@app.get("/diagnoses/", response_model=DiagnosisPage, dependencies=[Depends(get_current_user)], tags=["Diagnoses"])
+async def get_diagnoses(cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                        fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+                        db: AsyncSession = Depends(get_async_db)):
+    columns = field_columns(Diagnosis, fields)
+    page = await paginate_async(db, Diagnosis, cursor, limit, columns)
+    return sparse_response(page) if columns else page
+
+
+@app.get("/diagnoses/export", dependencies=[Depends(get_current_user)], tags=["Diagnoses"])
+def export_diagnoses(format: str = "ndjson"):
+    return export_response(Diagnosis, format, "diagnoses")
 
 
 # Update Diagnosis
-@app.put("/diagnoses/{diagnosis_id}", tags=["Diagnoses"])
+@app.put("/diagnoses/{diagnosis_id}", response_model=DiagnosisRead,
+         dependencies=[Depends(get_current_user)], tags=["Diagnoses"])
 def update_diagnosis(diagnosis_id: int, diagnosis: DiagnosisUpdate, db: Session = Depends(get_db)):
     db_diagnosis = db.query(Diagnosis).filter(Diagnosis.diagnosis_id == diagnosis_id).first()
     if not db_diagnosis:
@@ -306,7 +556,7 @@ def update_diagnosis(diagnosis_id: int, diagnosis: DiagnosisUpdate, db: Session
 
 
 # Delete Diagnosis
-@app.delete("/diagnoses/{diagnosis_id}", tags=["Diagnoses"])
+@app.delete("/diagnoses/{diagnosis_id}", dependencies=[Depends(get_current_user)], tags=["Diagnoses"])
 def delete_diagnosis(diagnosis_id: int, db: Session = Depends(get_db)):
     db_diagnosis = db.query(Diagnosis).filter(Diagnosis.diagnosis_id == diagnosis_id).first()
     if not db_diagnosis:
@@ -317,16 +567,18 @@ def delete_diagnosis(diagnosis_id: int, db: Session = Depends(get_db)):
     return {"message": "Diagnosis deleted successfully"}
 
 
-@app.get("/diagnoses/{diagnosis_id}", tags=["Diagnoses"])
-def get_diagnosis_by_id(diagnosis_id: int, db: Session = Depends(get_db)):
-    diagnosis = db.query(Diagnosis).filter(Diagnosis.diagnosis_id == diagnosis_id).first()
+@app.get("/diagnoses/{diagnosis_id}", response_model=DiagnosisRead,
+         dependencies=[Depends(get_current_user)], tags=["Diagnoses"])
+async def get_diagnosis_by_id(diagnosis_id: int, db: AsyncSession = Depends(get_async_db)):
+    diagnosis = await db.get(Diagnosis, diagnosis_id)
     if not diagnosis:
         raise HTTPException(status_code=404, detail="Diagnosis not found")
     return diagnosis
 
 
 # Treatments CRUD Endpoints
-@app.post("/treatments/", response_model=TreatmentCreate, tags=["Treatment"])
+@app.post("/treatments/", response_model=TreatmentRead,
+          dependencies=[Depends(get_current_user)], tags=["Treatment"])
 def create_treatment(treatment: TreatmentCreate, db: Session = Depends(get_db)):
     db_treatment = Treatment(**treatment.dict())
     db.add(db_treatment)
@@ -334,13 +586,23 @@ def create_treatment(treatment: TreatmentCreate, db: Session = Depends(get_db)):
     db.refresh(db_treatment)
     return db_treatment
 
-@app.get("/treatments/", tags=["Treatment"])
-def get_treatments(db: Session = Depends(get_db)):
-    return db.query(Treatment).all()
+@app.get("/treatments/", response_model=TreatmentPage, dependencies=[Depends(get_current_user)], tags=["Treatment"])
+async def get_treatments(cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                         fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+                         db: AsyncSession = Depends(get_async_db)):
+    columns = field_columns(Treatment, fields)
+    page = await paginate_async(db, Treatment, cursor, limit, columns)
+    return sparse_response(page) if columns else page
+
+
+@app.get("/treatments/export", dependencies=[Depends(get_current_user)], tags=["Treatment"])
+def export_treatments(format: str = "ndjson"):
+    return export_response(Treatment, format, "treatments")
 
 
 # Update Treatment
-@app.put("/treatments/{treatment_id}", tags=["Treatment"])
+@app.put("/treatments/{treatment_id}", response_model=TreatmentRead,
+         dependencies=[Depends(get_current_user)], tags=["Treatment"])
 def update_treatment(treatment_id: int, treatment: TreatmentUpdate, db: Session = Depends(get_db)):
     db_treatment = db.query(Treatment).filter(Treatment.treatment_id == treatment_id).first()
     if not db_treatment:
@@ -355,7 +617,7 @@ def update_treatment(treatment_id: int, treatment: TreatmentUpdate, db: Session
 
 
 # Delete Treatment
-@app.delete("/treatments/{treatment_id}", tags=["Treatment"])
+@app.delete("/treatments/{treatment_id}", dependencies=[Depends(get_current_user)], tags=["Treatment"])
 def delete_treatment(treatment_id: int, db: Session = Depends(get_db)):
     db_treatment = db.query(Treatment).filter(Treatment.treatment_id == treatment_id).first()
     if not db_treatment:
@@ -366,16 +628,18 @@ def delete_treatment(treatment_id: int, db: Session = Depends(get_db)):
     return {"message": "Treatment deleted successfully"}
 
 
-@app.get("/treatments/{treatment_id}", tags=["Treatment"])
-def get_treatment_by_id(treatment_id: int, db: Session = Depends(get_db)):
-    treatment = db.query(Treatment).filter(Treatment.treatment_id == treatment_id).first()
+@app.get("/treatments/{treatment_id}", response_model=TreatmentRead,
+         dependencies=[Depends(get_current_user)], tags=["Treatment"])
+async def get_treatment_by_id(treatment_id: int, db: AsyncSession = Depends(get_async_db)):
+    treatment = await db.get(Treatment, treatment_id)
     if not treatment:
         raise HTTPException(status_code=404, detail="Treatment not found")
     return treatment
 
 
 # Follow-Ups CRUD Endpoints
-@app.post("/follow_ups/", response_model=FollowUpCreate, tags=["Follow Ups"])
+@app.post("/follow_ups/", response_model=FollowUpRead,
+          dependencies=[Depends(get_current_user)], tags=["Follow Ups"])
 def create_follow_up(follow_up: FollowUpCreate, db: Session = Depends(get_db)):
     db_follow_up = FollowUp(**follow_up.dict())
     db.add(db_follow_up)
@@ -383,13 +647,18 @@ def create_follow_up(follow_up: FollowUpCreate, db: Session = Depends(get_db)):
     db.refresh(db_follow_up)
     return db_follow_up
 
-@app.get("/follow_ups/", tags=["Follow Ups"])
-def get_follow_ups(db: Session = Depends(get_db)):
-    return db.query(FollowUp).all()
+@app.get("/follow_ups/", response_model=FollowUpPage, dependencies=[Depends(get_current_user)], tags=["Follow Ups"])
+async def get_follow_ups(cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                         fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+                         db: AsyncSession = Depends(get_async_db)):
+    columns = field_columns(FollowUp, fields)
+    page = await paginate_async(db, FollowUp, cursor, limit, columns)
+    return sparse_response(page) if columns else page
 
 
 # Update Follow-Up
-@app.put("/follow_ups/{follow_up_id}", tags=["Follow Ups"])
+@app.put("/follow_ups/{follow_up_id}", response_model=FollowUpRead,
+         dependencies=[Depends(get_current_user)], tags=["Follow Ups"])
 def update_follow_up(follow_up_id: int, follow_up: FollowUpUpdate, db: Session = Depends(get_db)):
     db_follow_up = db.query(FollowUp).filter(FollowUp.follow_up_id == follow_up_id).first()
     if not db_follow_up:
@@ -404,7 +673,7 @@ def update_follow_up(follow_up_id: int, follow_up: FollowUpUpdate, db: Session =
 
 
 # Delete Follow-Up
-@app.delete("/follow_ups/{follow_up_id}", tags=["Follow Ups"])
+@app.delete("/follow_ups/{follow_up_id}", dependencies=[Depends(get_current_user)], tags=["Follow Ups"])
 def delete_follow_up(follow_up_id: int, db: Session = Depends(get_db)):
     db_follow_up = db.query(FollowUp).filter(FollowUp.follow_up_id == follow_up_id).first()
     if not db_follow_up:
@@ -417,34 +686,76 @@ def delete_follow_up(follow_up_id: int, db: Session = Depends(get_db)):
 
 
 # CRUD operations for Herbs
-@app.post("/herbs/", tags=["Herbs"])
+@app.post("/herbs/", response_model=HerbResponse, tags=["Herbs"])
 def create_herb(herb: HerbCreate, db: Session = Depends(get_db)):
     db_herb = Herb(**herb.dict())
     db.add(db_herb)
-    db.commit()
+    try:
+        db.flush()
+        relink_herbs(db, [db_herb])
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Herb name already exists")
     db.refresh(db_herb)
+    herb_saved(db_herb, created=True)
     return db_herb
 
-@app.get("/herbs/", tags=["Herbs"])
-def read_herbs(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    herbs = db.query(Herb).offset(skip).limit(limit).all()
-    return herbs
-
-@app.get("/herbs/{herb_id}", tags=["Herbs"])
-def read_herb(herb_id: int, db: Session = Depends(get_db)):
-    herb = db.query(Herb).filter(Herb.herb_id == herb_id).first()
+@app.post("/herbs/bulk", tags=["Herbs"])
+def create_herbs_bulk(items: List[Any] = Body(...), db: Session = Depends(get_db)):
+    valid, errors = validate_items(items, HerbCreate)
+    valid = check_unique(db, Herb, "herb_name", valid, errors)
+    created = bulk_insert(db, Herb, valid, errors, commit=False)
+    rows_by_index = dict(valid)
+    rows = [dict(rows_by_index[item["index"]], herb_id=item["id"]) for item in created]
+    if rows:
+        relink_herbs(db, [SimpleNamespace(**row) for row in rows])
+    db.commit()
+    herbs_created(rows)
+    return {"created": created, "errors": sorted(errors, key=lambda error: error["index"])}
+
+@app.get("/herbs/", response_model=HerbPage, tags=["Herbs"])
+async def read_herbs(cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                     fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+                     db: AsyncSession = Depends(get_async_db)):
+    columns = field_columns(Herb, fields)
+    page = await get_cached_page(db, Herb, "herbs", cursor, limit)
+    # Cached pages are already in memory, so they are trimmed rather than re-queried
+    return sparse_response(project_page(page, columns)) if columns else page
+
+@app.get("/herbs/{herb_id}", response_model=HerbResponse, tags=["Herbs"])
+async def read_herb(herb_id: int, db: AsyncSession = Depends(get_async_db)):
+    herb = await get_cached_item(db, Herb, "herb", herb_id)
     if herb is None:
         raise HTTPException(status_code=404, detail="Herb not found")
     return herb
 
-@app.put("/herbs/{herb_id}", tags=["Herbs"])
+@app.get("/herbs/{herb_id}/remedies", response_model=RemedyPage, tags=["Herbs"])
+async def read_herb_remedies(herb_id: int, cursor: Optional[str] = None,
+                             limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                             fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+                             db: AsyncSession = Depends(get_async_db)):
+    if await get_cached_item(db, Herb, "herb", herb_id) is None:
+        raise HTTPException(status_code=404, detail="Herb not found")
+    columns = field_columns(Remedy, fields)
+    page = await remedies_for_herb(db, herb_id, cursor, limit, columns)
+    return sparse_response(page) if columns else page
+
+@app.put("/herbs/{herb_id}", response_model=HerbResponse, tags=["Herbs"])
 def update_herb(herb_id: int, herb: HerbCreate, db: Session = Depends(get_db)):
     db_herb = db.query(Herb).filter(Herb.herb_id == herb_id).first()
     if db_herb is None:
         raise HTTPException(status_code=404, detail="Herb not found")
     for key, value in herb.dict().items():
         setattr(db_herb, key, value)
-    db.commit()
+    try:
+        db.flush()
+        relink_herbs(db, [db_herb])
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Herb name already exists")
+    herb_saved(db_herb)
     return db_herb
 
 @app.delete("/herbs/{herb_id}", tags=["Herbs"])
@@ -452,39 +763,75 @@ def delete_herb(herb_id: int, db: Session = Depends(get_db)):
     db_herb = db.query(Herb).filter(Herb.herb_id == herb_id).first()
     if db_herb is None:
         raise HTTPException(status_code=404, detail="Herb not found")
+    unlink_herb(db, herb_id)
     db.delete(db_herb)
     db.commit()
+    herb_deleted(herb_id)
     return {"detail": "Herb deleted"}
 
 # CRUD operations for Remedies
-@app.post("/remedies/", tags=["Remedies"])
+@app.post("/remedies/", response_model=RemedyResponse, tags=["Remedies"])
 def create_remedy(remedy: RemedyCreate, db: Session = Depends(get_db)):
     db_remedy = Remedy(**remedy.dict())
     db.add(db_remedy)
-    db.commit()
+    try:
+        db.flush()
+        link_ingredients(db, [(db_remedy.remedy_id, db_remedy.ingredients)])
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Remedy name already exists")
     db.refresh(db_remedy)
+    remedy_saved(db_remedy, created=True)
     return db_remedy
 
-@app.get("/remedies/", tags=["Remedies"])
-def read_remedies(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    remedies = db.query(Remedy).offset(skip).limit(limit).all()
-    return remedies
-
-@app.get("/remedies/{remedy_id}", tags=["Remedies"])
-def read_remedy(remedy_id: int, db: Session = Depends(get_db)):
-    remedy = db.query(Remedy).filter(Remedy.remedy_id == remedy_id).first()
+@app.post("/remedies/bulk", tags=["Remedies"])
+def create_remedies_bulk(items: List[Any] = Body(...), db: Session = Depends(get_db)):
+    valid, errors = validate_items(items, RemedyCreate)
+    valid = check_unique(db, Remedy, "remedy_name", valid, errors)
+    created = bulk_insert(db, Remedy, valid, errors, commit=False)
+    rows_by_index = dict(valid)
+    rows = [dict(rows_by_index[item["index"]], remedy_id=item["id"]) for item in created]
+    link_ingredients(db, [(row["remedy_id"], row["ingredients"]) for row in rows])
+    db.commit()
+    remedies_created(rows)
+    return {"created": created, "errors": sorted(errors, key=lambda error: error["index"])}
+
+@app.get("/remedies/", response_model=RemedyPage, tags=["Remedies"])
+async def read_remedies(cursor: Optional[str] = None, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                        fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+                        herb_id: Optional[int] = Query(None, description="Only remedies using this herb"),
+                        db: AsyncSession = Depends(get_async_db)):
+    columns = field_columns(Remedy, fields)
+    if herb_id is not None:
+        page = await remedies_for_herb(db, herb_id, cursor, limit, columns)
+        return sparse_response(page) if columns else page
+    page = await get_cached_page(db, Remedy, "remedies", cursor, limit)
+    # Cached pages are already in memory, so they are trimmed rather than re-queried
+    return sparse_response(project_page(page, columns)) if columns else page
+
+@app.get("/remedies/{remedy_id}", response_model=RemedyResponse, tags=["Remedies"])
+async def read_remedy(remedy_id: int, db: AsyncSession = Depends(get_async_db)):
+    remedy = await get_cached_item(db, Remedy, "remedy", remedy_id)
     if remedy is None:
         raise HTTPException(status_code=404, detail="Remedy not found")
     return remedy
 
-@app.put("/remedies/{remedy_id}", tags=["Remedies"])
+@app.put("/remedies/{remedy_id}", response_model=RemedyResponse, tags=["Remedies"])
 def update_remedy(remedy_id: int, remedy: RemedyCreate, db: Session = Depends(get_db)):
     db_remedy = db.query(Remedy).filter(Remedy.remedy_id == remedy_id).first()
     if db_remedy is None:
         raise HTTPException(status_code=404, detail="Remedy not found")
     for key, value in remedy.dict().items():
         setattr(db_remedy, key, value)
-    db.commit()
+    try:
+        db.flush()
+        link_ingredients(db, [(remedy_id, db_remedy.ingredients)])
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Remedy name already exists")
+    remedy_saved(db_remedy)
     return db_remedy
 
 @app.delete("/remedies/{remedy_id}", tags=["Remedies"])
@@ -492,6 +839,34 @@ def delete_remedy(remedy_id: int, db: Session = Depends(get_db)):
     db_remedy = db.query(Remedy).filter(Remedy.remedy_id == remedy_id).first()
     if db_remedy is None:
         raise HTTPException(status_code=404, detail="Remedy not found")
+    unlink_remedy(db, remedy_id)
     db.delete(db_remedy)
     db.commit()
-    return {"detail": "Remedy deleted"}
\ No newline at end of file
+    remedy_deleted(remedy_id)
+    return {"detail": "Remedy deleted"}
+
+
+# Catalog search
+@app.get("/search", response_model=SearchResponse, tags=["Search"])
+async def search(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50),
+                 db: AsyncSession = Depends(get_async_db)):
+    return {"query": q, "results": await search_catalog(db, q, limit)}
+
+
+@app.get("/autocomplete", response_model=AutocompleteResponse, tags=["Search"])
+async def autocomplete(q: str = Query(..., min_length=1),
+                       limit: int = Query(DEFAULT_SUGGESTIONS, ge=1, le=MAX_SUGGESTIONS),
+                       types: Optional[str] = Query(None, description="Comma-separated subset of herb, remedy, doctor"),
+                       db: AsyncSession = Depends(get_async_db)):
+    return {"query": q, "results": await suggest(db, q, limit, parse_types(types))}
+
+
+@app.get("/chat", tags=["Chat"])
+async def chat(q: str = Query(..., min_length=1, description="Symptoms or question"),
+               limit: int = Query(DEFAULT_CHAT_RESULTS, ge=1, le=MAX_CHAT_RESULTS),
+               db: AsyncSession = Depends(get_async_db)):
+    started = time.perf_counter()
+    await chat_index.ensure_loaded(db)
+    matches = chat_index.search(q, limit)
+    return StreamingResponse(answer_events(q, matches, started), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
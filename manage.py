@@ -0,0 +1,89 @@
+# manage.py
+
+import argparse
+import sys
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from database.db import SessionLocal
+from database.schema import migrate
+from utils.cache import catalog_cache
+from utils.catalog_io import CATALOG_TABLES, Progress, export_table, import_table
+from utils.ingredients import reindex_ingredients
+
+# Cache namespaces to drop after a table is reloaded (item and page namespaces)
+CACHE_NAMESPACES = {
+    "herbs": ("herb", "herbs"),
+    "remedies": ("remedy", "remedies"),
+    "doctors": (),
+    "postal_codes": (),
+}
+# Tables whose reload can change which herbs each remedy links to
+INGREDIENT_TABLES = ("herbs", "remedies")
+
+
+def migrate_schema(args):
+    migrate()
+
+
+def import_catalog(args):
+    try:
+        import_table(args.table, args.path, args.format)
+    except (OSError, ValueError, SQLAlchemyError) as exc:
+        # The transaction was rolled back; report why in one line rather than a traceback
+        detail = str(getattr(exc, "orig", None) or exc).splitlines()[0]
+        sys.exit(f"import-catalog {args.table} failed, nothing was imported: {detail}")
+    # Reaches other workers only with the redis invalidation backend; otherwise entries expire by TTL
+    for namespace in CACHE_NAMESPACES[args.table]:
+        catalog_cache.invalidate(namespace)
+    if args.table in INGREDIENT_TABLES:
+        reindex_remedy_ingredients(args)
+
+
+def reindex_remedy_ingredients(args):
+    progress = Progress("reindex remedy ingredients")
+    db = SessionLocal()
+    try:
+        links = reindex_ingredients(db, progress)
+    finally:
+        db.close()
+    progress.report(final=True)
+    print(f"{links} remedy-herb links")
+
+
+def export_catalog(args):
+    export_table(args.table, args.path, args.format)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="AyuVibe management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    schema = commands.add_parser("migrate", help="Create missing tables, indexes and search columns")
+    schema.set_defaults(func=migrate_schema)
+
+    load = commands.add_parser("import-catalog", help="Upsert a table from a CSV or JSONL file")
+    load.add_argument("table", choices=sorted(CATALOG_TABLES))
+    load.add_argument("path")
+    load.add_argument("--format", choices=["csv", "jsonl"], help="Defaults to the file extension")
+    load.set_defaults(func=import_catalog)
+
+    dump = commands.add_parser("export-catalog", help="Dump a table to a CSV or JSONL file")
+    dump.add_argument("table", choices=sorted(CATALOG_TABLES))
+    dump.add_argument("path")
+    dump.add_argument("--format", choices=["csv", "jsonl"], help="Defaults to the file extension")
+    dump.set_defaults(func=export_catalog)
+
+    reindex = commands.add_parser("reindex-ingredients", help="Relink every remedy to the herbs in its ingredients")
+    reindex.set_defaults(func=reindex_remedy_ingredients)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# tests/conftest.py
+#
+# The app reads DATABASE_URL when database.db is imported, so it is pointed at a throwaway
+# SQLite file here, before any test imports main. Set TEST_DATABASE_URL to run against
+# another (disposable) database instead.
+
+import os
+import tempfile
+from contextlib import asynccontextmanager
+
+import pytest
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "TEST_DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='ayuvibe-tests-'), 'test.db')}"
+)
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+
+@pytest.fixture(scope="session")
+def app():
+    import main
+    from database.schema import migrate
+
+    migrate()
+    return main.app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    from fastapi.testclient import TestClient
+
+    from utils.auth import CurrentUser, get_current_user
+
+    @asynccontextmanager
+    async def no_warm_up(app):
+        yield
+
+    # Tokens are covered by the auth endpoints; here every request is an authenticated doctor
+    app.dependency_overrides[get_current_user] = lambda: CurrentUser("doctor", 1, "doctor@example.com")
+    # Entered once so every request runs on the same event loop, which pooled asyncpg connections
+    # are tied to; the lifespan warm-up (and its bcrypt pool) is swapped out and never starts.
+    lifespan, app.router.lifespan_context = app.router.lifespan_context, no_warm_up
+    with TestClient(app) as client:
+        yield client
+    app.router.lifespan_context = lifespan
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def db(app):
+    from database.db import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
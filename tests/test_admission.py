@@ -0,0 +1,106 @@
+# tests/test_admission.py
+#
+# Admission control in front of a small app with tight limits: token buckets answer 429 and
+# concurrency caps 503, both with Retry-After, while Health and Stats routes are never turned away.
+
+import threading
+import time
+from contextlib import contextmanager
+
+import anyio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils.ratelimit import AdmissionControl, AdmissionMiddleware, parse_limits
+
+
+def admitted_app(limits: str, max_concurrent: int = 0):
+    """An app whose Auth route can be held open, guarded by its own AdmissionControl."""
+    control = AdmissionControl(parse_limits(limits), max_concurrent=max_concurrent, backend_name="local")
+    release = threading.Event()
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, control=control)
+
+    @app.post("/auth", tags=["Auth"])
+    async def auth(hold: bool = False):
+        while hold and not release.is_set():
+            await anyio.sleep(0.01)
+        return {"ok": True}
+
+    @app.get("/herbs", tags=["Herbs"])
+    async def herbs():
+        return []
+
+    @app.get("/health", tags=["Health"])
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/stats/admission", tags=["Stats"])
+    async def stats():
+        return control.stats()
+
+    return app, control, release
+
+
+@contextmanager
+def held_auth(client, control, release):
+    """Keep one Auth request in flight for the duration of the block."""
+    thread = threading.Thread(target=client.post, args=("/auth",), kwargs={"params": {"hold": True}})
+    thread.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not control.in_flight_by_tag.get("Auth"):
+            assert time.monotonic() < deadline, "held request never started"
+            time.sleep(0.01)
+        yield
+    finally:
+        release.set()
+        thread.join(5)
+
+
+def assert_rejected(response, status_code: int, min_retry_after: int = 1):
+    assert response.status_code == status_code, response.text
+    assert int(response.headers["Retry-After"]) >= min_retry_after
+
+
+def test_client_bucket_answers_429_with_retry_after():
+    app, control, _ = admitted_app("Auth:client=2/60")
+    with TestClient(app) as client:
+        assert [client.post("/auth").status_code for _ in range(2)] == [200, 200]
+        # One token comes back every 30 seconds
+        assert_rejected(client.post("/auth"), 429, min_retry_after=29)
+        # Other tags have no limits of their own
+        assert client.get("/herbs").status_code == 200
+    assert control.rejected == {"client_rate": 1}
+
+
+def test_route_bucket_answers_429_with_retry_after():
+    app, control, _ = admitted_app("Auth:route=1/10")
+    with TestClient(app) as client:
+        assert client.post("/auth").status_code == 200
+        assert_rejected(client.post("/auth"), 429, min_retry_after=9)
+    assert control.rejected == {"route_rate": 1}
+
+
+def test_tag_concurrency_cap_answers_503():
+    app, control, release = admitted_app("Auth:concurrent=1")
+    with TestClient(app) as client:
+        with held_auth(client, control, release):
+            assert_rejected(client.post("/auth"), 503)
+            assert client.get("/herbs").status_code == 200
+        assert control.in_flight_by_tag["Auth"] == 0
+        assert client.post("/auth").status_code == 200
+    assert control.rejected == {"concurrency": 1}
+
+
+def test_overall_cap_spares_health_and_stats():
+    app, control, release = admitted_app("Auth:concurrent=1", max_concurrent=1)
+    with TestClient(app) as client, held_auth(client, control, release):
+        assert_rejected(client.get("/herbs"), 503)
+        # Exempt routes are neither capped nor counted towards in_flight
+        for _ in range(3):
+            assert client.get("/health").status_code == 200
+            stats = client.get("/stats/admission")
+            assert stats.status_code == 200
+        assert stats.json()["in_flight"] == 1
+        assert stats.json()["rejected"] == {"overloaded": 1}
@@ -0,0 +1,54 @@
+# tests/test_bulk.py
+#
+# A bulk request reports each refused item by its index and still creates the rest: schema
+# errors, duplicates caught by the up-front checks, and rows the database rejects on insert.
+
+from utils.bulk import check_unique
+from utils.models import Herb
+
+
+def test_herbs_bulk_reports_errors_per_index(client, db, monkeypatch):
+    import main
+
+    db.add(Herb(herb_name="Bulk Existing"))
+    db.commit()
+
+    def check_unique_then_race(session, model, key, valid, errors):
+        # Another writer takes a name after the up-front check, so only the unique index catches
+        # it: the chunk's savepoint is rolled back and its rows are retried one at a time
+        checked = check_unique(session, model, key, valid, errors)
+        db.add(Herb(herb_name="Bulk Raced"))
+        db.commit()
+        return checked
+
+    monkeypatch.setattr(main, "check_unique", check_unique_then_race)
+
+    items = [
+        {"herb_name": "Bulk Ashwagandha", "form": "Powder"},
+        {"botanical_name": "Withania somnifera"},   # no herb_name
+        "Bulk Tulsi",                               # not an object
+        {"herb_name": "Bulk Existing"},
+        {"herb_name": "Bulk Ashwagandha"},          # repeats item 0
+        {"herb_name": "Bulk Raced"},
+        {"herb_name": "Bulk Brahmi"},
+    ]
+    response = client.post("/herbs/bulk", json=items)
+    assert response.status_code == 200, response.text
+    body = response.json()
+
+    assert [item["index"] for item in body["created"]] == [0, 6]
+    errors = {error["index"]: error["detail"] for error in body["errors"]}
+    assert sorted(errors) == [1, 2, 3, 4, 5]
+    assert errors[1][0]["loc"] == ["herb_name"]
+    assert errors[2] == "Item must be an object"
+    assert errors[3] == "herb_name already exists"
+    assert errors[4] == "Duplicate herb_name in this batch"
+    assert errors[5].startswith("Rejected by the database")
+
+    db.expire_all()
+    saved = {herb.herb_id: herb.herb_name for herb in db.query(Herb).filter(Herb.herb_name.like("Bulk %"))}
+    assert {item["id"]: saved.get(item["id"]) for item in body["created"]} == {
+        body["created"][0]["id"]: "Bulk Ashwagandha",
+        body["created"][1]["id"]: "Bulk Brahmi",
+    }
+    assert sorted(saved.values()) == ["Bulk Ashwagandha", "Bulk Brahmi", "Bulk Existing", "Bulk Raced"]
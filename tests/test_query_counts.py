@@ -0,0 +1,98 @@
+# tests/test_query_counts.py
+#
+# The nested read endpoints load each relationship level with one IN query, so the number of
+# statements they run must not grow with the number of rows returned.
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from utils.models import Appointment, Diagnosis, Doctor, FollowUp, Patient, Treatment
+
+
+@pytest.fixture
+def statements(app):
+    """SQL statements run by the async engine the read endpoints use, while the test runs."""
+    from database.db import async_engine
+
+    seen = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield seen
+    event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def add_people(db, tag: str):
+    doctor = Doctor(first_name="Asha", last_name="Rao", email=f"doctor-{tag}@example.com", password="x")
+    patient = Patient(first_name="Ravi", last_name="Kumar", date_of_birth=date(1990, 1, 1),
+                      email=f"patient-{tag}@example.com", password="x")
+    db.add_all([doctor, patient])
+    db.flush()
+    return doctor, patient
+
+
+def add_visit(db, doctor, patient, when: datetime, diagnoses: int, treatments: int) -> Appointment:
+    appointment = Appointment(patient_id=patient.patient_id, doctor_id=doctor.doctor_id, appointment_date=when)
+    db.add(appointment)
+    db.flush()
+    db.add(FollowUp(appointment_id=appointment.appointment_id, follow_up_date=when + timedelta(days=7)))
+    for number in range(diagnoses):
+        diagnosis = Diagnosis(appointment_id=appointment.appointment_id, diagnosis_description=f"Diagnosis {number}")
+        db.add(diagnosis)
+        db.flush()
+        db.add_all([Treatment(diagnosis_id=diagnosis.diagnosis_id, treatment_description=f"Treatment {step}")
+                    for step in range(treatments)])
+    return appointment
+
+
+def seed_patient(db, tag: str, appointments: int) -> int:
+    doctor, patient = add_people(db, tag)
+    start = datetime(2030, 1, 7, 9, 0)
+    for number in range(appointments):
+        add_visit(db, doctor, patient, start + timedelta(days=number), diagnoses=2, treatments=2)
+    db.commit()
+    return patient.patient_id
+
+
+def seed_appointment(db, tag: str, diagnoses: int) -> int:
+    doctor, patient = add_people(db, tag)
+    appointment = add_visit(db, doctor, patient, datetime(2030, 1, 7, 9, 0), diagnoses=diagnoses, treatments=3)
+    db.commit()
+    return appointment.appointment_id
+
+
+def count_statements(client, statements, url: str, expected_items: int) -> int:
+    statements.clear()
+    response = client.get(url)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert len(body["appointments"] if isinstance(body, dict) else body) == expected_items
+    return len(statements)
+
+
+def test_patient_timeline_statements_do_not_grow_with_appointments(client, db, statements):
+    small = seed_patient(db, "timeline-small", appointments=1)
+    large = seed_patient(db, "timeline-large", appointments=25)
+
+    small_count = count_statements(client, statements, f"/patients/{small}/timeline", 1)
+    large_count = count_statements(client, statements, f"/patients/{large}/timeline", 25)
+
+    assert large_count == small_count
+    # Patient check, appointments, diagnoses, treatments and follow-ups
+    assert 0 < small_count <= 5
+
+
+def test_appointment_diagnoses_statements_do_not_grow_with_diagnoses(client, db, statements):
+    small = seed_appointment(db, "diagnoses-small", diagnoses=1)
+    large = seed_appointment(db, "diagnoses-large", diagnoses=25)
+
+    small_count = count_statements(client, statements, f"/appointments/{small}/diagnoses_treatments", 1)
+    large_count = count_statements(client, statements, f"/appointments/{large}/diagnoses_treatments", 25)
+
+    assert large_count == small_count
+    # Diagnoses, then their treatments
+    assert 0 < small_count <= 2
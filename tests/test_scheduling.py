@@ -0,0 +1,99 @@
+# tests/test_scheduling.py
+#
+# Bookings must fall inside the doctor's working hours and must not overlap another active
+# appointment; a cancelled appointment gives its slot back. The bulk endpoint applies the same
+# checks, reporting each refused item by its index.
+
+from datetime import date, datetime, time, timedelta
+
+from utils.models import Doctor, DoctorWorkingHours, Patient
+from utils.scheduling import APPOINTMENT_SLOT_MINUTES, DOUBLE_BOOKED, OUTSIDE_HOURS
+
+# A Monday far enough ahead that no slot is ever in the past
+MONDAY = date(2030, 1, 7)
+
+
+def add_schedule(db, tag: str):
+    """A doctor working 09:00-17:00 on weekdays, and a patient to book with them."""
+    doctor = Doctor(first_name="Asha", last_name="Rao", email=f"doctor-{tag}@example.com", password="x")
+    patient = Patient(first_name="Ravi", last_name="Kumar", date_of_birth=date(1990, 1, 1),
+                      email=f"patient-{tag}@example.com", password="x")
+    db.add_all([doctor, patient])
+    db.flush()
+    db.add_all([DoctorWorkingHours(doctor_id=doctor.doctor_id, weekday=weekday, start_time=time(9), end_time=time(17))
+                for weekday in range(5)])
+    db.commit()
+    return doctor.doctor_id, patient.patient_id
+
+
+def booking(doctor_id: int, patient_id: int, when: datetime) -> dict:
+    return {"doctor_id": doctor_id, "patient_id": patient_id, "appointment_date": when.isoformat(), "reason": "Checkup"}
+
+
+def at(hour: int, minute: int = 0, day: date = MONDAY) -> datetime:
+    return datetime.combine(day, time(hour, minute))
+
+
+def test_overlapping_booking_is_refused(client, db):
+    doctor_id, patient_id = add_schedule(db, "overlap")
+
+    first = client.post("/appointments/", json=booking(doctor_id, patient_id, at(10)))
+    assert first.status_code == 200, first.text
+
+    overlapping = client.post("/appointments/", json=booking(doctor_id, patient_id, at(10, 15)))
+    assert overlapping.status_code == 409
+    assert overlapping.json()["detail"] == DOUBLE_BOOKED
+
+    # The next slot starts exactly where the first one ends
+    after = at(10) + timedelta(minutes=APPOINTMENT_SLOT_MINUTES)
+    assert client.post("/appointments/", json=booking(doctor_id, patient_id, after)).status_code == 200
+
+
+def test_booking_outside_working_hours_is_refused(client, db):
+    doctor_id, patient_id = add_schedule(db, "hours")
+
+    for when in (at(8), at(16, 45), at(10, day=MONDAY + timedelta(days=6))):
+        response = client.post("/appointments/", json=booking(doctor_id, patient_id, when))
+        assert response.status_code == 409, when
+        assert response.json()["detail"] == OUTSIDE_HOURS
+
+
+def test_cancelled_appointment_frees_its_slot(client, db):
+    doctor_id, patient_id = add_schedule(db, "cancel")
+    booked = client.post("/appointments/", json=booking(doctor_id, patient_id, at(11)))
+    assert booked.status_code == 200, booked.text
+
+    def free_starts():
+        response = client.get(f"/doctors/{doctor_id}/slots", params={"start": MONDAY.isoformat()})
+        assert response.status_code == 200, response.text
+        return {slot["start"] for slot in response.json()["slots"]}
+
+    assert at(11).isoformat() not in free_starts()
+
+    cancelled = client.put(f"/appointments/{booked.json()['appointment_id']}", json={"appointment_status": "Cancelled"})
+    assert cancelled.status_code == 200, cancelled.text
+
+    assert at(11).isoformat() in free_starts()
+    assert client.post("/appointments/", json=booking(doctor_id, patient_id, at(11))).status_code == 200
+
+
+def test_bulk_booking_reports_conflicts_per_index(client, db):
+    doctor_id, patient_id = add_schedule(db, "bulk")
+    existing = client.post("/appointments/", json=booking(doctor_id, patient_id, at(14)))
+    assert existing.status_code == 200, existing.text
+
+    items = [
+        booking(doctor_id, patient_id, at(9)),
+        booking(doctor_id, patient_id, at(9, 10)),   # overlaps item 0 in the same batch
+        booking(doctor_id, patient_id, at(18)),      # after hours
+        booking(doctor_id, patient_id, at(14)),      # overlaps the existing booking
+        booking(doctor_id, patient_id, at(9, 30)),
+    ]
+    response = client.post("/appointments/bulk", json=items)
+    assert response.status_code == 200, response.text
+    body = response.json()
+
+    assert [item["index"] for item in body["created"]] == [0, 4]
+    assert [(error["index"], error["detail"]) for error in body["errors"]] == [
+        (1, DOUBLE_BOOKED), (2, OUTSIDE_HOURS), (3, DOUBLE_BOOKED),
+    ]
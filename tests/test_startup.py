@@ -0,0 +1,20 @@
+# tests/test_startup.py
+#
+# Import and readiness budgets, measured in a fresh interpreter like benchmarks.startup:
+# `import main` must stay cheap, and the lifespan warm-up must bring /health/ready to 200 in time.
+
+import os
+
+from benchmarks.startup import IMPORT_PROBE, READY_PROBE, run_probe
+
+IMPORT_BUDGET = float(os.getenv("STARTUP_IMPORT_BUDGET", "3"))
+READY_BUDGET = float(os.getenv("STARTUP_READY_BUDGET", "5"))
+
+
+def test_import_within_budget(app):
+    # The app fixture has migrated the test database the probe's DATABASE_URL points at
+    assert run_probe(IMPORT_PROBE) <= IMPORT_BUDGET
+
+
+def test_ready_within_budget(app):
+    assert run_probe(READY_PROBE.format(timeout=READY_BUDGET * 2)) <= READY_BUDGET
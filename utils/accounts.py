@@ -0,0 +1,61 @@
+# accounts.py
+
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from sqlalchemy import func, literal, select, union_all
+
+from utils.models import Doctor, Patient
+
+
+class Account(NamedTuple):
+    user_type: str
+    user_id: int
+    first_name: str
+    last_name: str
+    email: str
+    password: str
+    registration_date: Optional[datetime]
+
+    def __repr__(self):
+        # Keep the password hash out of logs
+        return f"Account(user_type={self.user_type!r}, user_id={self.user_id}, email={self.email!r})"
+
+
+def _account_select(model, user_type: str, id_column, email: str):
+    return select(
+        literal(user_type).label("user_type"),
+        id_column.label("user_id"),
+        model.first_name,
+        model.last_name,
+        model.email,
+        model.password,
+        model.registration_date,
+    ).where(func.lower(model.email) == email.lower())
+
+
+def account_lookup(email: str):
+    """One statement resolving ``email`` against both user tables through their lower(email) unique indexes."""
+    return union_all(
+        _account_select(Patient, "patient", Patient.patient_id, email),
+        _account_select(Doctor, "doctor", Doctor.doctor_id, email),
+    ).limit(1)
+
+
+def find_account(db, email: str) -> Optional[Account]:
+    row = db.execute(account_lookup(email)).first()
+    return Account(*row) if row else None
+
+
+async def find_account_async(db, email: str) -> Optional[Account]:
+    row = (await db.execute(account_lookup(email))).first()
+    return Account(*row) if row else None
+
+
+def email_registered(db, email: str) -> bool:
+    # Patients and doctors share one login namespace, so an email may only be used once across both
+    return find_account(db, email) is not None
+
+
+async def email_registered_async(db, email: str) -> bool:
+    return await find_account_async(db, email) is not None
@@ -0,0 +1,57 @@
+# agenda.py
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select, tuple_
+
+from utils.models import Appointment
+from utils.pagination import decode_cursor, encode_cursor
+from utils.scheduling import clinic_time
+
+
+# A doctor's or patient's appointments in time order. Each query is a range scan on the
+# (doctor_id, appointment_date) / (patient_id, appointment_date) index, and pages are keyed
+# on (appointment_date, appointment_id), so cost follows the page size, not the table size.
+async def load_agenda(db, owner_column, owner_id: int, start: Optional[datetime], end: Optional[datetime],
+                      status: Optional[str], cursor: Optional[str], limit: int,
+                      columns: Optional[list] = None) -> dict:
+    start, end = start and clinic_time(start), end and clinic_time(end)
+    if start and end and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    date, pk = Appointment.appointment_date, Appointment.appointment_id
+    keys = [column.key for column in columns] if columns else None
+
+    # The cursor needs each row's date even when ?fields= leaves it out
+    stmt = select(*columns, date.label("_cursor_date")) if columns else select(Appointment)
+    stmt = stmt.where(owner_column == owner_id)
+    if start:
+        stmt = stmt.where(date >= start)
+    if end:
+        stmt = stmt.where(date < end)
+    if status:
+        stmt = stmt.where(Appointment.appointment_status == status)
+    if cursor:
+        payload = decode_cursor(cursor)
+        try:
+            after = (datetime.fromisoformat(payload["d"]), int(payload["id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(tuple_(date, pk) > tuple_(*after))
+    stmt = stmt.order_by(date, pk).limit(limit + 1)
+
+    result = await db.execute(stmt)
+    rows = result.mappings().all() if columns else result.scalars().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if columns:
+            last_date, last_id = last["_cursor_date"], last["appointment_id"]
+        else:
+            last_date, last_id = last.appointment_date, last.appointment_id
+        next_cursor = encode_cursor({"d": last_date.isoformat(), "id": last_id})
+    if columns:
+        rows = [{key: row[key] for key in keys} for row in rows]
+    return {"items": rows, "next_cursor": next_cursor}
@@ -0,0 +1,61 @@
+# auth.py
+
+import os
+import time
+from typing import NamedTuple
+
+import jwt as pyjwt
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+
+from database.db import AsyncSessionLocal
+from utils.accounts import find_account_async
+from utils.cache import TTLCache
+from utils.jwt import decode_access_token
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth")
+
+# Verified tokens kept in memory; entries never outlive the token's exp, nor TOKEN_CACHE_TTL
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+
+
+class CurrentUser(NamedTuple):
+    user_type: str
+    user_id: int
+    email: str
+
+
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
+CREDENTIALS_EXCEPTION = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> CurrentUser:
+    # Cache hits never touch the database; only a miss opens a session to look the account up
+    user = token_cache.get(("token", token))
+    if user is not None:
+        return user
+
+    try:
+        claims = decode_access_token(token)
+    except pyjwt.PyJWTError:
+        raise CREDENTIALS_EXCEPTION
+    email = claims.get("sub")
+    if not email:
+        raise CREDENTIALS_EXCEPTION
+
+    async with AsyncSessionLocal() as db:
+        account = await find_account_async(db, email)
+    if account is None or account.user_id != claims.get("user_id"):
+        raise CREDENTIALS_EXCEPTION
+
+    user = CurrentUser(account.user_type, account.user_id, account.email)
+    ttl = min(TOKEN_CACHE_TTL, claims["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(("token", token), user, ttl=ttl)
+    return user
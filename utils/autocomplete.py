@@ -0,0 +1,357 @@
+# autocomplete.py
+
+import logging
+import os
+import time
+from bisect import bisect_left, bisect_right
+from typing import Optional
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import exc, select, text
+
+from utils.ingredients import normalize_name
+from utils.live_index import LiveIndex
+from utils.models import Doctor, Herb, Remedy
+
+logger = logging.getLogger(__name__)
+
+# Workers rebuild their index from the database this often, picking up writes served by other workers
+AUTOCOMPLETE_REFRESH_SECONDS = float(os.getenv("AUTOCOMPLETE_REFRESH_SECONDS", "300"))
+DEFAULT_SUGGESTIONS = 10
+MAX_SUGGESTIONS = 25
+# Fuzzy matching kicks in for queries this long when prefixes don't fill the list
+FUZZY_MIN_LENGTH = 3
+# Trigram similarity a fuzzy match needs, the same default as pg_trgm
+FUZZY_THRESHOLD = 0.3
+# Index keys examined per prefix lookup, so one-letter queries stay cheap
+PREFIX_SCAN_LIMIT = 2000
+
+AUTOCOMPLETE_TYPES = ("herb", "remedy", "doctor")
+
+
+def parse_types(types: Optional[str]) -> Optional[set]:
+    if not types:
+        return None
+    requested = {value.strip() for value in types.split(",") if value.strip()}
+    unknown = requested - set(AUTOCOMPLETE_TYPES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown types: {', '.join(sorted(unknown))}")
+    return requested
+
+
+def trigrams(normalized: str) -> set:
+    """pg_trgm-style trigrams: each word padded with two spaces in front and one behind."""
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return grams
+
+
+def herb_names(herb) -> list:
+    names = [("herb_name", herb.herb_name), ("botanical_name", herb.botanical_name)]
+    names.extend(("common_names", name) for name in (herb.common_names or "").split(","))
+    return names
+
+
+def doctor_name(doctor) -> str:
+    return f"{doctor.first_name} {doctor.last_name}"
+
+
+class AutocompleteIndex(LiveIndex):
+    """Prefix and fuzzy name lookups over herbs, remedies and doctors.
+
+    Every word-suffix of every normalized name ("withania somnifera", "somnifera") is kept in
+    one sorted array, so a prefix lookup is a binary search plus a short scan. Fuzzy matches
+    come from a trigram inverted index. The shared trigrams of every name are counted in one
+    NumPy bincount over the query's posting lists. Writes update the sorted array in place
+    and only mark removed names dead in the postings, which are filtered once dead names
+    outnumber live ones. Full rebuilds are built off to the side and swapped in.
+    """
+
+    state = ("_keys", "_refs", "_entries", "_by_item", "_grams", "_gram_arrays", "_sizes", "_alive", "_dead",
+             "_next_id")
+    refresh_seconds = AUTOCOMPLETE_REFRESH_SECONDS
+    label = "Autocomplete index"
+
+    def __init__(self):
+        super().__init__()
+        self._keys = []
+        self._refs = []
+        self._entries = {}
+        self._by_item = {}
+        self._grams = {}
+        self._gram_arrays = {}
+        self._sizes = np.zeros(1024)
+        self._alive = np.zeros(1024, dtype=bool)
+        self._dead = 0
+        self._next_id = 0
+
+    def _add_item(self, kind: str, item_id: int, name: str, names: list, keep_sorted: bool = True):
+        self._remove_item(kind, item_id)
+        entry_ids = []
+        for field, value in names:
+            normalized = normalize_name(value)
+            if not normalized:
+                continue
+            entry_id = self._next_id
+            self._next_id += 1
+            if entry_id == len(self._sizes):
+                self._sizes = np.concatenate([self._sizes, np.zeros(entry_id)])
+                self._alive = np.concatenate([self._alive, np.zeros(entry_id, dtype=bool)])
+            self._entries[entry_id] = (kind, item_id, name, value.strip(), field, normalized)
+            entry_ids.append(entry_id)
+            words = normalized.split(" ")
+            for start in range(len(words)):
+                key = " ".join(words[start:])
+                position = bisect_right(self._keys, key) if keep_sorted else len(self._keys)
+                self._keys.insert(position, key)
+                self._refs.insert(position, entry_id)
+            grams = trigrams(normalized)
+            for gram in grams:
+                self._grams.setdefault(gram, []).append(entry_id)
+                self._gram_arrays.pop(gram, None)
+            self._sizes[entry_id] = len(grams)
+            self._alive[entry_id] = True
+        self._by_item[(kind, item_id)] = entry_ids
+
+    def _remove_item(self, kind: str, item_id: int):
+        for entry_id in self._by_item.pop((kind, item_id), ()):
+            normalized = self._entries.pop(entry_id)[5]
+            words = normalized.split(" ")
+            for start in range(len(words)):
+                key = " ".join(words[start:])
+                position = bisect_left(self._keys, key)
+                while position < len(self._keys) and self._keys[position] == key:
+                    if self._refs[position] == entry_id:
+                        del self._keys[position]
+                        del self._refs[position]
+                        break
+                    position += 1
+            self._alive[entry_id] = False
+            self._dead += 1
+        if self._dead > max(1024, len(self._entries)):
+            self._drop_dead_postings()
+
+    def _drop_dead_postings(self):
+        alive = self._alive
+        self._grams = {gram: kept for gram, ids in self._grams.items() if (kept := [i for i in ids if alive[i]])}
+        self._gram_arrays = {}
+        self._dead = 0
+
+    def _posting_array(self, gram: str):
+        array = self._gram_arrays.get(gram)
+        if array is None:
+            array = self._gram_arrays[gram] = np.array(self._grams[gram], dtype=np.int32)
+        return array
+
+    def _add_herb(self, herb, keep_sorted: bool = True):
+        self._add_item("herb", herb.herb_id, herb.herb_name, herb_names(herb), keep_sorted)
+
+    def _add_remedy(self, remedy, keep_sorted: bool = True):
+        self._add_item("remedy", remedy.remedy_id, remedy.remedy_name, [("remedy_name", remedy.remedy_name)],
+                       keep_sorted)
+
+    def _add_doctor(self, doctor, keep_sorted: bool = True):
+        name = doctor_name(doctor)
+        self._add_item("doctor", doctor.doctor_id, name, [("name", name)], keep_sorted)
+
+    def _build(self, herbs, remedies, doctors) -> "AutocompleteIndex":
+        # Appending, then one sort, is far cheaper than keeping the array sorted per name
+        fresh = AutocompleteIndex()
+        for herb in herbs:
+            fresh._add_herb(herb, keep_sorted=False)
+        for remedy in remedies:
+            fresh._add_remedy(remedy, keep_sorted=False)
+        for doctor in doctors:
+            fresh._add_doctor(doctor, keep_sorted=False)
+        order = sorted(range(len(fresh._keys)), key=fresh._keys.__getitem__)
+        fresh._keys = [fresh._keys[index] for index in order]
+        fresh._refs = [fresh._refs[index] for index in order]
+        return fresh
+
+    async def _read(self, db) -> tuple:
+        herbs = (await db.execute(
+            select(Herb.herb_id, Herb.herb_name, Herb.botanical_name, Herb.common_names)
+        )).all()
+        remedies = (await db.execute(select(Remedy.remedy_id, Remedy.remedy_name))).all()
+        doctors = (await db.execute(select(Doctor.doctor_id, Doctor.first_name, Doctor.last_name))).all()
+        return herbs, remedies, doctors
+
+    def upsert_herb(self, herb):
+        self._write(self._add_herb, herb)
+
+    def upsert_remedy(self, remedy):
+        self._write(self._add_remedy, remedy)
+
+    def upsert_doctor(self, doctor):
+        self._write(self._add_doctor, doctor)
+
+    def remove(self, kind: str, item_id: int):
+        self._write(self._remove_item, kind, item_id)
+
+    def _result(self, entry_id: int, match: str, score: float) -> dict:
+        kind, item_id, name, value, field, _ = self._entries[entry_id]
+        return {"type": kind, "id": item_id, "name": name, "match": value, "field": field,
+                "match_type": match, "score": round(score, 4)}
+
+    def _fuzzy(self, query: str, count: int) -> list:
+        """Up to ``count`` names most similar to ``query``, as (similarity, entry id), best first."""
+        grams = trigrams(query)
+        postings = [self._posting_array(gram) for gram in grams if gram in self._grams]
+        if not postings:
+            return []
+        shared = np.bincount(np.concatenate(postings))
+        # Similarity can only reach the threshold with at least threshold * len(grams) trigrams in common
+        candidates = np.flatnonzero(shared >= FUZZY_THRESHOLD * len(grams))
+        candidates = candidates[self._alive[candidates]]
+        # Same measure as pg_trgm's similarity(): shared / (query + name - shared) trigrams
+        common = shared[candidates]
+        similarity = common / (len(grams) + self._sizes[candidates] - common)
+        keep = similarity >= FUZZY_THRESHOLD
+        candidates, similarity = candidates[keep], similarity[keep]
+        if len(candidates) > count:
+            top = np.argpartition(-similarity, count - 1)[:count]
+            candidates, similarity = candidates[top], similarity[top]
+        order = np.argsort(-similarity, kind="stable")
+        return [(float(similarity[index]), int(candidates[index])) for index in order]
+
+    def search(self, query: str, limit: int = DEFAULT_SUGGESTIONS, types: Optional[set] = None) -> list:
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+        with self._lock:
+            prefix = {}
+            start = bisect_left(self._keys, normalized)
+            for position in range(start, min(start + PREFIX_SCAN_LIMIT, len(self._keys))):
+                if not self._keys[position].startswith(normalized):
+                    break
+                entry_id = self._refs[position]
+                kind, item_id = self._entries[entry_id][:2]
+                if (types and kind not in types) or (kind, item_id) in prefix:
+                    continue
+                # Closer to a whole-name match scores higher
+                score = len(normalized) / len(self._entries[entry_id][5])
+                prefix[(kind, item_id)] = self._result(entry_id, "prefix", score)
+                if len(prefix) >= limit:
+                    break
+            results = sorted(prefix.values(), key=lambda result: (-result["score"], result["match"].lower()))
+
+            if len(results) < limit and len(normalized) >= FUZZY_MIN_LENGTH:
+                seen = set(prefix)
+                # Over-fetch: several names of one item, or other types, may rank ahead
+                for similarity, entry_id in self._fuzzy(normalized, limit * 4):
+                    kind, item_id = self._entries[entry_id][:2]
+                    if (types and kind not in types) or (kind, item_id) in seen:
+                        continue
+                    seen.add((kind, item_id))
+                    results.append(self._result(entry_id, "fuzzy", similarity))
+                    if len(results) >= limit:
+                        break
+            return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "names": len(self._entries),
+                "keys": len(self._keys),
+                "trigrams": len(self._grams),
+                "dead_names": self._dead,
+                "age_seconds": round(time.monotonic() - self.built_at, 1) if self.ready else None,
+            }
+
+
+autocomplete_index = AutocompleteIndex()
+
+
+# Postgres: trigram GIN indexes serve prefix (LIKE 'q%') and fuzzy (<%) lookups while the
+# in-process index is still being built. pg_trgm is optional; without it prefixes still work.
+TRIGRAM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_herbs_herb_name_trgm ON herbs USING GIN (lower(herb_name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_herbs_botanical_name_trgm ON herbs USING GIN (lower(botanical_name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_herbs_common_names_trgm ON herbs USING GIN (lower(common_names) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_remedies_remedy_name_trgm ON remedies USING GIN (lower(remedy_name) gin_trgm_ops)",
+    """CREATE INDEX IF NOT EXISTS ix_doctors_name_trgm ON doctors
+        USING GIN (lower(first_name || ' ' || last_name) gin_trgm_ops)""",
+]
+
+
+def create_trigram_indexes(bind):
+    """Create the pg_trgm extension and indexes, each in its own transaction; a failure only costs fuzzy fallback."""
+    for statement in TRIGRAM_DDL:
+        try:
+            with bind.begin() as connection:
+                connection.execute(text(statement))
+        except exc.DBAPIError as error:
+            logger.warning("Skipping autocomplete trigram DDL (%s): %s", " ".join(statement.split())[:80], error.orig)
+            if "EXTENSION" in statement:
+                return
+
+
+# (type, id column, display name, matched field, table, matched expression) per autocomplete source
+SQL_SOURCES = [
+    ("herb", "herb_id", "herb_name", "herb_name", "herbs", "lower(herb_name)"),
+    ("herb", "herb_id", "herb_name", "botanical_name", "herbs", "lower(botanical_name)"),
+    ("herb", "herb_id", "herb_name", "common_names", "herbs", "lower(common_names)"),
+    ("remedy", "remedy_id", "remedy_name", "remedy_name", "remedies", "lower(remedy_name)"),
+    ("doctor", "doctor_id", "first_name || ' ' || last_name", "name", "doctors",
+     "lower(first_name || ' ' || last_name)"),
+]
+
+_has_pg_trgm = None
+
+
+async def _pg_trgm_installed(db) -> bool:
+    global _has_pg_trgm
+    if _has_pg_trgm is None:
+        _has_pg_trgm = bool((await db.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        )).scalar())
+    return _has_pg_trgm
+
+
+async def suggest_sql(db, query: str, limit: int, types: Optional[set] = None) -> list:
+    normalized = normalize_name(query)
+    if not normalized:
+        return []
+    fuzzy = await _pg_trgm_installed(db) and len(normalized) >= FUZZY_MIN_LENGTH
+    parts = []
+    for kind, id_column, name, field, table, expression in SQL_SOURCES:
+        if types and kind not in types:
+            continue
+        score = f"word_similarity(:query, {expression})" if fuzzy else "0.0"
+        match = f"{expression} LIKE :prefix" + (f" OR :query <% {expression}" if fuzzy else "")
+        parts.append(
+            f"SELECT '{kind}' AS type, {id_column} AS id, {name} AS name, {expression} AS match, "
+            f"'{field}' AS field, {expression} LIKE :prefix AS is_prefix, {score} AS score "
+            f"FROM {table} WHERE {match}"
+        )
+    if not parts:
+        return []
+    # Each item can match on several fields; over-fetch, then keep its best match
+    sql = text(" UNION ALL ".join(parts) + " ORDER BY is_prefix DESC, score DESC, match LIMIT :fetch")
+    prefix = normalized.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    rows = (await db.execute(sql, {"query": normalized, "prefix": prefix, "fetch": limit * 3})).mappings().all()
+    results, seen = [], set()
+    for row in rows:
+        if (row["type"], row["id"]) in seen:
+            continue
+        seen.add((row["type"], row["id"]))
+        score = len(normalized) / max(len(row["match"]), 1) if row["is_prefix"] else float(row["score"])
+        results.append({"type": row["type"], "id": row["id"], "name": row["name"], "match": row["match"],
+                        "field": row["field"], "match_type": "prefix" if row["is_prefix"] else "fuzzy",
+                        "score": round(score, 4)})
+        if len(results) >= limit:
+            break
+    return results
+
+
+async def suggest(db, query: str, limit: int, types: Optional[set] = None) -> list:
+    # Until warm-up has built the index, Postgres answers from its trigram indexes
+    if not autocomplete_index.ready and db.bind.dialect.name == "postgresql":
+        return await suggest_sql(db, query, limit, types)
+    await autocomplete_index.ensure_loaded(db)
+    return autocomplete_index.search(query, limit, types)
@@ -0,0 +1,102 @@
+# bulk.py
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from utils.models import Doctor, Patient
+
+# Items accepted per bulk request, and rows per multi-row INSERT statement
+BULK_MAX_ITEMS = 1000
+BULK_CHUNK_SIZE = 500
+
+
+def validate_items(items: list, schema):
+    """Validate each raw item against ``schema``, returning (valid, errors).
+
+    ``valid`` is a list of (index, row dict) pairs and ``errors`` a list of per-item errors,
+    so one malformed item does not fail the whole batch.
+    """
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ITEMS} items per request")
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"index": index, "detail": "Item must be an object"})
+            continue
+        try:
+            valid.append((index, schema(**item).dict()))
+        except ValidationError as exc:
+            errors.append({
+                "index": index,
+                "detail": [{"loc": list(error["loc"]), "msg": error["msg"]} for error in exc.errors()],
+            })
+    return valid, errors
+
+
+def check_appointment_references(db, valid: list, errors: list) -> list:
+    """Drop appointments whose patient or doctor does not exist, using one IN query per table."""
+    patient_ids = {row["patient_id"] for _, row in valid}
+    doctor_ids = {row["doctor_id"] for _, row in valid}
+    known_patients = set(db.execute(select(Patient.patient_id).where(Patient.patient_id.in_(patient_ids))).scalars())
+    known_doctors = set(db.execute(select(Doctor.doctor_id).where(Doctor.doctor_id.in_(doctor_ids))).scalars())
+    checked = []
+    for index, row in valid:
+        if row["patient_id"] not in known_patients:
+            errors.append({"index": index, "detail": "Patient not found"})
+        elif row["doctor_id"] not in known_doctors:
+            errors.append({"index": index, "detail": "Doctor not found"})
+        else:
+            checked.append((index, row))
+    return checked
+
+
+def check_unique(db, model, key: str, valid: list, errors: list) -> list:
+    """Drop rows whose ``key`` repeats an earlier item or an existing row, using one IN query."""
+    column = model.__table__.c[key]
+    values = {row[key] for _, row in valid}
+    existing = set(db.execute(select(column).where(column.in_(values))).scalars()) if values else set()
+    seen = set()
+    checked = []
+    for index, row in valid:
+        if row[key] in existing:
+            errors.append({"index": index, "detail": f"{key} already exists"})
+        elif row[key] in seen:
+            errors.append({"index": index, "detail": f"Duplicate {key} in this batch"})
+        else:
+            seen.add(row[key])
+            checked.append((index, row))
+    return checked
+
+
+def bulk_insert(db, model, valid: list, errors: list, commit: bool = True) -> list:
+    """Insert ``valid`` rows with multi-row INSERT ... RETURNING in a single transaction.
+
+    Returns ``[{"index": ..., "id": ...}]`` in input order; Postgres and SQLite return
+    RETURNING rows of a multi-row VALUES insert in the order they were supplied. Each chunk
+    runs in a savepoint: if the database still rejects it (e.g. a row written concurrently
+    after the up-front checks), its rows are retried one at a time and the ones that fail
+    are reported in ``errors`` rather than failing the batch. With ``commit=False`` the
+    caller commits, so rows that depend on the new ids can be written in the same transaction.
+    """
+    pk = model.__mapper__.primary_key[0]
+    created = []
+    for start in range(0, len(valid), BULK_CHUNK_SIZE):
+        chunk = valid[start:start + BULK_CHUNK_SIZE]
+        try:
+            with db.begin_nested():
+                ids = db.execute(insert(model).values([row for _, row in chunk]).returning(pk)).scalars().all()
+            created.extend({"index": index, "id": new_id} for (index, _), new_id in zip(chunk, ids))
+        except IntegrityError:
+            for index, row in chunk:
+                try:
+                    with db.begin_nested():
+                        new_id = db.execute(insert(model).values(row).returning(pk)).scalar_one()
+                    created.append({"index": index, "id": new_id})
+                except IntegrityError as exc:
+                    detail = str(exc.orig).splitlines()[0]
+                    errors.append({"index": index, "detail": f"Rejected by the database: {detail}"})
+    if commit:
+        db.commit()
+    return created
@@ -0,0 +1,171 @@
+# cache.py
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "2048"))
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+CATALOG_CACHE_BACKEND = os.getenv("CATALOG_CACHE_BACKEND", "local")
+CATALOG_CACHE_CHANNEL = os.getenv("CATALOG_CACHE_CHANNEL", "ayuvibe:catalog-invalidate")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL.
+
+    Keys are tuples whose first element is a namespace, so a whole namespace
+    (e.g. every cached page of herbs) can be dropped at once. Each namespace has a
+    version that is bumped on invalidation; ``set`` with a stale version is ignored so a
+    read that raced with a write can never repopulate the cache with old data.
+    """
+
+    def __init__(self, maxsize: int = CATALOG_CACHE_SIZE, ttl: float = CATALOG_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def version(self, namespace) -> int:
+        with self._lock:
+            return self._versions.get(namespace, 0)
+
+    def set(self, key, value, ttl: float = None, version: int = None):
+        with self._lock:
+            if version is not None and version != self._versions.get(key[0], 0):
+                return
+            self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._versions[key[0]] = self._versions.get(key[0], 0) + 1
+            if self._data.pop(key, _MISSING) is not _MISSING:
+                self.invalidations += 1
+
+    def clear_namespace(self, namespace):
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            for key in [key for key in self._data if key[0] == namespace]:
+                del self._data[key]
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class LocalInvalidationBackend:
+    """Applies invalidations to this process only."""
+
+    name = "local"
+
+    def __init__(self, cache: TTLCache):
+        self.cache = cache
+
+    def apply(self, message: dict):
+        if message.get("key") is not None:
+            self.cache.delete((message["namespace"], *message["key"]))
+        else:
+            self.cache.clear_namespace(message["namespace"])
+
+    def publish(self, message: dict):
+        self.apply(message)
+
+
+class RedisInvalidationBackend(LocalInvalidationBackend):
+    """Broadcasts invalidations over Redis pub/sub so every worker drops the same entries."""
+
+    name = "redis"
+
+    def __init__(self, cache: TTLCache, url: str = REDIS_URL, channel: str = CATALOG_CACHE_CHANNEL):
+        super().__init__(cache)
+        import redis
+
+        self.channel = channel
+        self._client = redis.Redis.from_url(url)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{channel: self._on_message})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def _on_message(self, message):
+        try:
+            self.apply(json.loads(message["data"]))
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed cache invalidation message: %r", message.get("data"))
+
+    def publish(self, message: dict):
+        # Apply locally first so this worker never serves stale data, even if Redis is down
+        self.apply(message)
+        try:
+            self._client.publish(self.channel, json.dumps(message))
+        except Exception:
+            logger.exception("Failed to broadcast cache invalidation")
+
+
+INVALIDATION_BACKENDS = {
+    "local": LocalInvalidationBackend,
+    "redis": RedisInvalidationBackend,
+}
+
+
+class CatalogCache:
+    def __init__(self, cache: TTLCache, backend_name: str = CATALOG_CACHE_BACKEND):
+        self.cache = cache
+        self.backend = INVALIDATION_BACKENDS[backend_name](cache)
+
+    def get(self, namespace: str, *key):
+        return self.cache.get((namespace, *key))
+
+    def version(self, namespace: str) -> int:
+        return self.cache.version(namespace)
+
+    def set(self, namespace: str, *key, value, version: int = None):
+        self.cache.set((namespace, *key), value, version=version)
+
+    def invalidate(self, namespace: str, *key):
+        self.backend.publish({"namespace": namespace, "key": list(key) if key else None})
+
+    def stats(self) -> dict:
+        return {"backend": self.backend.name, **self.cache.stats()}
+
+
+catalog_cache = CatalogCache(TTLCache())
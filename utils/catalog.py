@@ -0,0 +1,85 @@
+# catalog.py
+
+from types import SimpleNamespace
+from typing import Optional
+
+from utils.autocomplete import autocomplete_index
+from utils.cache import catalog_cache
+from utils.chat import chat_index
+from utils.pagination import paginate_async, row_to_dict
+from utils.search import catalog_index
+
+
+# Read-through helpers for the herb/remedy endpoints. Items are cached under the
+# singular namespace ("herb") and pages under the plural one ("herbs").
+async def get_cached_item(db, model, namespace: str, item_id: int) -> Optional[dict]:
+    item = catalog_cache.get(namespace, item_id)
+    if item is None:
+        version = catalog_cache.version(namespace)
+        obj = await db.get(model, item_id)
+        if obj is None:
+            return None
+        item = row_to_dict(obj)
+        catalog_cache.set(namespace, item_id, value=item, version=version)
+    return item
+
+
+async def get_cached_page(db, model, namespace: str, cursor: Optional[str], limit: int) -> dict:
+    page = catalog_cache.get(namespace, cursor, limit)
+    if page is None:
+        version = catalog_cache.version(namespace)
+        page = await paginate_async(db, model, cursor, limit)
+        page = {"items": [row_to_dict(obj) for obj in page["items"]], "next_cursor": page["next_cursor"]}
+        catalog_cache.set(namespace, cursor, limit, value=page, version=version)
+    return page
+
+
+# Write hooks called by the herb/remedy endpoints after commit
+def herb_saved(herb, created: bool = False):
+    if not created:
+        catalog_cache.invalidate("herb", herb.herb_id)
+    catalog_cache.invalidate("herbs")
+    catalog_index.upsert_herb(herb)
+    chat_index.upsert_herb(herb)
+    autocomplete_index.upsert_herb(herb)
+
+
+def herbs_created(rows: list):
+    catalog_cache.invalidate("herbs")
+    for row in rows:
+        catalog_index.upsert_herb(SimpleNamespace(**row))
+        chat_index.upsert_herb(SimpleNamespace(**row))
+        autocomplete_index.upsert_herb(SimpleNamespace(**row))
+
+
+def herb_deleted(herb_id: int):
+    catalog_cache.invalidate("herb", herb_id)
+    catalog_cache.invalidate("herbs")
+    catalog_index.remove("herb", herb_id)
+    chat_index.remove("herb", herb_id)
+    autocomplete_index.remove("herb", herb_id)
+
+
+def remedy_saved(remedy, created: bool = False):
+    if not created:
+        catalog_cache.invalidate("remedy", remedy.remedy_id)
+    catalog_cache.invalidate("remedies")
+    catalog_index.upsert_remedy(remedy)
+    chat_index.upsert_remedy(remedy)
+    autocomplete_index.upsert_remedy(remedy)
+
+
+def remedies_created(rows: list):
+    catalog_cache.invalidate("remedies")
+    for row in rows:
+        catalog_index.upsert_remedy(SimpleNamespace(**row))
+        chat_index.upsert_remedy(SimpleNamespace(**row))
+        autocomplete_index.upsert_remedy(SimpleNamespace(**row))
+
+
+def remedy_deleted(remedy_id: int):
+    catalog_cache.invalidate("remedy", remedy_id)
+    catalog_cache.invalidate("remedies")
+    catalog_index.remove("remedy", remedy_id)
+    chat_index.remove("remedy", remedy_id)
+    autocomplete_index.remove("remedy", remedy_id)
@@ -0,0 +1,310 @@
+# catalog_io.py
+
+import csv
+import io
+import json
+import sys
+import time
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, bindparam, func, select
+
+from database.db import SessionLocal, engine
+from utils.export import export_columns, stream_export
+from utils.models import Doctor, Herb, PostalCode, Remedy
+
+# Rows buffered per COPY batch / executemany round trip
+IMPORT_CHUNK_SIZE = 5000
+
+# Tables the catalog commands can load and dump, with the natural key used for upserts
+CATALOG_TABLES = {
+    "herbs": {"model": Herb, "key": "herb_name", "key_sql": "herb_name"},
+    "remedies": {"model": Remedy, "key": "remedy_name", "key_sql": "remedy_name"},
+    "doctors": {"model": Doctor, "key": "email", "key_sql": "lower(email)"},
+    "postal_codes": {"model": PostalCode, "key": "postal_code", "key_sql": "postal_code"},
+}
+
+
+class Progress:
+    interval = 0.5
+
+    def __init__(self, label: str, stream=sys.stderr):
+        self.label = label
+        self.stream = stream
+        self.count = 0
+        self.started = self.reported = time.perf_counter()
+
+    def update(self, rows: int):
+        self.count += rows
+        if time.perf_counter() - self.reported >= self.interval:
+            self.report()
+
+    def report(self, final: bool = False):
+        self.reported = time.perf_counter()
+        elapsed = self.reported - self.started
+        rate = self.count / elapsed if elapsed else 0.0
+        end = "\n" if final else "\r"
+        self.stream.write(f"{self.label}: {self.count} rows ({rate:,.0f} rows/s, {elapsed:.1f}s){end}")
+        self.stream.flush()
+
+
+def detect_format(path: str, fmt: str = None) -> str:
+    if fmt:
+        return fmt
+    return "csv" if path.endswith(".csv") else "jsonl"
+
+
+def read_records(path: str, fmt: str):
+    with open(path, newline="", encoding="utf-8") as handle:
+        if fmt == "csv":
+            for record in csv.DictReader(handle):
+                yield {key: (value if value != "" else None) for key, value in record.items()}
+        else:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def iter_chunks(records, size: int = IMPORT_CHUNK_SIZE):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_columns(model, record: dict) -> list:
+    pk = model.__mapper__.primary_key[0].name
+    return [column for column in model.__table__.columns if column.name in record and column.name != pk]
+
+
+def _coerce(column, value):
+    # Non-Postgres drivers need real date/datetime objects rather than ISO strings
+    if isinstance(value, str):
+        if isinstance(column.type, DateTime):
+            return datetime.fromisoformat(value)
+        if isinstance(column.type, Date):
+            return date.fromisoformat(value)
+    return value
+
+
+def _dedupe(chunk: list, key: str) -> list:
+    # Later rows win when a file repeats a natural key
+    latest = {}
+    for record in chunk:
+        if record.get(key) is not None:
+            latest[str(record[key]).lower() if key == "email" else record[key]] = record
+    return list(latest.values())
+
+
+def required_columns(model) -> set:
+    """Columns a new row can't be inserted without: NOT NULL, no default, not the primary key."""
+    return {
+        column.name for column in model.__table__.columns
+        if not column.nullable and not column.primary_key and column.default is None and column.server_default is None
+    }
+
+
+def import_table(table: str, path: str, fmt: str = None) -> int:
+    """Upsert ``table`` from a CSV/JSONL file on its natural key. Returns the number of rows read.
+
+    A file without every required column (e.g. a doctors export, which leaves out passwords)
+    can only update existing rows; rows with new keys are skipped and counted on stderr.
+    """
+    spec = CATALOG_TABLES[table]
+    records = read_records(path, detect_format(path, fmt))
+    progress = Progress(f"import {table}")
+    if engine.dialect.name == "postgresql":
+        skipped = _copy_import(spec, records, progress)
+    else:
+        skipped = _executemany_import(spec, records, progress)
+    progress.report(final=True)
+    if skipped:
+        missing = ", ".join(sorted(required_columns(spec["model"]) - set(skipped[1])))
+        progress.stream.write(f"{skipped[0]} new {table} skipped: inserting needs the {missing} column(s)\n")
+    return progress.count
+
+
+def _copy_import(spec: dict, records, progress: Progress):
+    """COPY the file into a temp table in CSV batches, then upsert everything with one INSERT ... ON CONFLICT.
+
+    Without every required column, one UPDATE ... FROM applies the file to existing rows instead.
+    Returns ``(new rows skipped, file columns)`` in that case, else None.
+    """
+    model, key, key_sql = spec["model"], spec["key"], spec["key_sql"]
+    table_name = model.__tablename__
+    first = next(records, None)
+    if first is None:
+        return None
+    columns = import_columns(model, first)
+    names = [column.name for column in columns]
+    if key not in names:
+        raise ValueError(f"{table_name} import needs a '{key}' column")
+    column_defs = ", ".join(f"{column.name} {column.type.compile(dialect=engine.dialect)}" for column in columns)
+    latest = f"FROM _import WHERE {key} IS NOT NULL ORDER BY {key_sql}, _line DESC"
+    update_only = not required_columns(model) <= set(names)
+    if update_only:
+        # Postgres checks NOT NULL before ON CONFLICT, so existing rows are updated directly. The
+        # source columns are renamed so the unqualified key expression resolves to the target table.
+        values = [name for name in names if name != key]
+        upsert = (
+            f"UPDATE {table_name} SET {', '.join(f'{name} = src._{name}' for name in values)} "
+            f"FROM (SELECT DISTINCT ON ({key_sql}) {key_sql} AS _key"
+            f"{''.join(f', {name} AS _{name}' for name in values)} {latest}) AS src "
+            f"WHERE {key_sql} = src._key"
+        ) if values else None
+        new_keys = (
+            f"SELECT count(DISTINCT {key_sql}) FROM _import WHERE {key} IS NOT NULL "
+            f"AND {key_sql} NOT IN (SELECT {key_sql} FROM {table_name} WHERE {key} IS NOT NULL)"
+        )
+    else:
+        updates = ", ".join(f"{name} = EXCLUDED.{name}" for name in names if name != key)
+        upsert = (
+            f"INSERT INTO {table_name} ({', '.join(names)}) "
+            f"SELECT DISTINCT ON ({key_sql}) {', '.join(names)} {latest} "
+            f"ON CONFLICT ({key_sql}) DO " + (f"UPDATE SET {updates}" if updates else "NOTHING")
+        )
+    copy_sql = f"COPY _import ({', '.join(names)}) FROM STDIN WITH (FORMAT csv)"
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"CREATE TEMP TABLE _import (_line bigserial, {column_defs}) ON COMMIT DROP")
+        for chunk in iter_chunks(_prepend(first, records)):
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerows([record.get(name) for name in names] for record in chunk)
+            buffer.seek(0)
+            _copy_from(cursor, copy_sql, buffer)
+            progress.update(len(chunk))
+        skipped = None
+        if update_only:
+            cursor.execute(new_keys)
+            skipped = (cursor.fetchone()[0], names)
+        if upsert:
+            cursor.execute(upsert)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+    return skipped
+
+
+def _prepend(first, records):
+    yield first
+    yield from records
+
+
+def _copy_from(cursor, sql: str, buffer):
+    if hasattr(cursor, "copy_expert"):  # psycopg2
+        cursor.copy_expert(sql, buffer)
+    else:  # psycopg 3
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+
+
+def _executemany_import(spec: dict, records, progress: Progress):
+    """Portable path: per chunk, one lookup of existing keys, then executemany UPDATE and INSERT.
+
+    Rows with new keys are only inserted when the file has every required column; returns
+    ``(new rows skipped, file columns)`` when it doesn't, else None.
+    """
+    model, key = spec["model"], spec["key"]
+    table = model.__table__
+    pk = model.__mapper__.primary_key[0]
+    key_column = table.c[key]
+    key_expr = func.lower(key_column) if key == "email" else key_column
+    required = required_columns(model)
+    skipped = None
+
+    session = SessionLocal()
+    try:
+        for chunk in iter_chunks(records):
+            columns = import_columns(model, chunk[0])
+            names = [column.name for column in columns]
+            if key not in names:
+                raise ValueError(f"{model.__tablename__} import needs a '{key}' column")
+            rows = [{column.name: _coerce(column, record.get(column.name)) for column in columns}
+                    for record in _dedupe(chunk, key)]
+            lookup_keys = [row[key].lower() if key == "email" else row[key] for row in rows]
+            existing = dict(session.execute(select(key_expr, pk).where(key_expr.in_(lookup_keys))).all())
+
+            value_names = [column.name for column in columns if column.name != key]
+            updates, inserts = [], []
+            for row, lookup_key in zip(rows, lookup_keys):
+                if lookup_key in existing:
+                    updates.append({"_pk": existing[lookup_key], **{f"_{name}": row[name] for name in value_names}})
+                else:
+                    inserts.append(row)
+            if updates and value_names:
+                stmt = table.update().where(pk == bindparam("_pk")).values(
+                    {name: bindparam(f"_{name}") for name in value_names}
+                )
+                session.execute(stmt, updates)
+            if inserts and not required <= set(names):
+                skipped = ((skipped or (0,))[0] + len(inserts), names)
+            elif inserts:
+                session.execute(table.insert(), inserts)
+            progress.update(len(chunk))
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+    return skipped
+
+
+def export_table(table: str, path: str, fmt: str = None) -> int:
+    """Dump ``table`` to CSV/JSONL, using COPY ... TO STDOUT for CSV on Postgres."""
+    spec = CATALOG_TABLES[table]
+    model = spec["model"]
+    fmt = detect_format(path, fmt)
+    progress = Progress(f"export {table}")
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        if fmt == "csv" and engine.dialect.name == "postgresql":
+            _copy_export(model, handle, progress)
+        else:
+            for piece in stream_export(model, "csv" if fmt == "csv" else "ndjson"):
+                handle.write(piece)
+                progress.update(piece.count("\n"))
+            if fmt == "csv":
+                progress.count -= 1  # header line
+    progress.report(final=True)
+    return progress.count
+
+
+class _CountingWriter:
+    def __init__(self, handle, progress: Progress):
+        self.handle = handle
+        self.progress = progress
+
+    def write(self, data):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data).decode("utf-8")
+        self.handle.write(data)
+        self.progress.update(data.count("\n"))
+
+
+def _copy_export(model, handle, progress: Progress):
+    names = ", ".join(column.name for column in export_columns(model))
+    pk = model.__mapper__.primary_key[0].name
+    sql = f"COPY (SELECT {names} FROM {model.__tablename__} ORDER BY {pk}) TO STDOUT WITH (FORMAT csv, HEADER)"
+    writer = _CountingWriter(handle, progress)
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            cursor.copy_expert(sql, writer)
+        else:  # psycopg 3
+            with cursor.copy(sql) as copy:
+                for data in copy:
+                    writer.write(data)
+    finally:
+        connection.close()
+    progress.count -= 1  # header line
@@ -0,0 +1,240 @@
+# chat.py
+
+import json
+import math
+import os
+import time
+
+import numpy as np
+from sqlalchemy import select
+
+from utils.live_index import LiveIndex
+from utils.models import Herb, Remedy
+from utils.search import tokenize
+
+# Workers rebuild their index from the database this often, picking up other workers' writes and imports
+CHAT_REFRESH_SECONDS = float(os.getenv("CHAT_REFRESH_SECONDS", "300"))
+
+# What the chatbot matches symptom questions against, with relevance weights
+CHAT_HERB_FIELDS = {"herb_name": 1.0, "benefits": 1.0, "primary_uses": 1.0}
+CHAT_REMEDY_FIELDS = {"remedy_name": 1.0, "benefits": 1.0, "ingredients": 0.5, "precautions": 0.5}
+# Columns kept in memory to compose answers without a database round trip
+CHAT_HERB_COLUMNS = ("herb_id", "herb_name", "benefits", "primary_uses", "dosage", "form")
+CHAT_REMEDY_COLUMNS = ("remedy_id", "remedy_name", "benefits", "ingredients", "dosage_instructions", "precautions")
+
+DEFAULT_CHAT_RESULTS = 5
+MAX_CHAT_RESULTS = 20
+
+DISCLAIMER = (
+    "This information comes from the AyuVibe catalog and is not a substitute for advice "
+    "from a qualified Ayurvedic doctor."
+)
+
+
+class ChatIndex(LiveIndex):
+    """BM25 over the herb and remedy catalog, scored with NumPy.
+
+    Each catalog row is one document row. Postings are kept per term as growing lists and
+    turned into arrays the first time a query needs them, so scoring a query is one
+    vectorized pass per query term. Updates append a new row and tombstone the old one;
+    tombstoned rows are masked out of scores and dropped when the index is compacted.
+    """
+
+    k1 = 1.2
+    b = 0.75
+    state = ("_vocabulary", "_postings", "_arrays", "_doc_freqs", "_lengths", "_alive", "_rows", "_docs",
+             "_row_of", "_live_length")
+    refresh_seconds = CHAT_REFRESH_SECONDS
+    label = "Chat index"
+
+    def __init__(self):
+        super().__init__()
+        self._reset()
+
+    def _reset(self):
+        self._vocabulary = {}
+        self._postings = []
+        self._arrays = {}
+        self._doc_freqs = []
+        self._lengths = np.zeros(1024)
+        self._alive = np.zeros(1024, dtype=bool)
+        self._rows = 0
+        self._docs = []
+        self._row_of = {}
+        self._live_length = 0.0
+
+    def _weighted_terms(self, obj, fields: dict) -> dict:
+        terms = {}
+        for field, weight in fields.items():
+            for token in tokenize(getattr(obj, field, None)):
+                terms[token] = terms.get(token, 0.0) + weight
+        return terms
+
+    def _tombstone(self, key):
+        row = self._row_of.pop(key, None)
+        if row is None:
+            return
+        self._alive[row] = False
+        self._live_length -= self._lengths[row]
+        for term_id in self._docs[row][2]:
+            self._doc_freqs[term_id] -= 1
+
+    def _add(self, key, payload: dict, terms: dict):
+        self._tombstone(key)
+        row = self._rows
+        if row == len(self._lengths):
+            self._lengths = np.concatenate([self._lengths, np.zeros(row)])
+            self._alive = np.concatenate([self._alive, np.zeros(row, dtype=bool)])
+        term_ids = {}
+        for term, weight in terms.items():
+            term_id = self._vocabulary.get(term)
+            if term_id is None:
+                term_id = self._vocabulary[term] = len(self._postings)
+                self._postings.append(([], []))
+                self._doc_freqs.append(0)
+            rows, weights = self._postings[term_id]
+            rows.append(row)
+            weights.append(weight)
+            self._arrays.pop(term_id, None)
+            self._doc_freqs[term_id] += 1
+            term_ids[term_id] = weight
+        length = sum(terms.values())
+        self._lengths[row] = length
+        self._alive[row] = True
+        self._live_length += length
+        self._docs.append((key, payload, term_ids))
+        self._row_of[key] = row
+        self._rows += 1
+        if self._rows - len(self._row_of) > max(1024, len(self._row_of)):
+            self._compact()
+
+    def _compact(self):
+        live = [self._docs[row] for row in sorted(self._row_of.values())]
+        terms_by_id = {term_id: term for term, term_id in self._vocabulary.items()}
+        self._reset()
+        for key, payload, term_ids in live:
+            self._add(key, payload, {terms_by_id[term_id]: weight for term_id, weight in term_ids.items()})
+
+    def _term_arrays(self, term_id: int):
+        arrays = self._arrays.get(term_id)
+        if arrays is None:
+            rows, weights = self._postings[term_id]
+            arrays = self._arrays[term_id] = (np.array(rows, dtype=np.int64), np.array(weights))
+        return arrays
+
+    def _add_herb(self, herb):
+        payload = {"type": "herb", "id": herb.herb_id, "name": herb.herb_name,
+                   **{column: getattr(herb, column, None) for column in CHAT_HERB_COLUMNS[2:]}}
+        self._add(("herb", herb.herb_id), payload, self._weighted_terms(herb, CHAT_HERB_FIELDS))
+
+    def _add_remedy(self, remedy):
+        payload = {"type": "remedy", "id": remedy.remedy_id, "name": remedy.remedy_name,
+                   **{column: getattr(remedy, column, None) for column in CHAT_REMEDY_COLUMNS[2:]}}
+        self._add(("remedy", remedy.remedy_id), payload, self._weighted_terms(remedy, CHAT_REMEDY_FIELDS))
+
+    def _build(self, herbs, remedies) -> "ChatIndex":
+        fresh = ChatIndex()
+        for herb in herbs:
+            fresh._add_herb(herb)
+        for remedy in remedies:
+            fresh._add_remedy(remedy)
+        return fresh
+
+    async def _read(self, db) -> tuple:
+        herbs = (await db.execute(select(*(getattr(Herb, column) for column in CHAT_HERB_COLUMNS)))).all()
+        remedies = (await db.execute(select(*(getattr(Remedy, column) for column in CHAT_REMEDY_COLUMNS)))).all()
+        return herbs, remedies
+
+    def upsert_herb(self, herb):
+        self._write(self._add_herb, herb)
+
+    def upsert_remedy(self, remedy):
+        self._write(self._add_remedy, remedy)
+
+    def remove(self, kind: str, item_id: int):
+        self._write(self._tombstone, (kind, item_id))
+
+    def search(self, query: str, limit: int = DEFAULT_CHAT_RESULTS) -> list:
+        """The ``limit`` best-matching catalog entries as ``(payload, score)``, best first."""
+        terms = set(tokenize(query))
+        with self._lock:
+            doc_count = len(self._row_of)
+            term_ids = [self._vocabulary[term] for term in terms if term in self._vocabulary]
+            if not term_ids or not doc_count:
+                return []
+            rows = self._rows
+            lengths = self._lengths[:rows]
+            avg_length = self._live_length / doc_count or 1.0
+            scores = np.zeros(rows)
+            for term_id in term_ids:
+                doc_freq = self._doc_freqs[term_id]
+                if not doc_freq:
+                    continue
+                postings, tf = self._term_arrays(term_id)
+                idf = math.log(1 + (doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * lengths[postings] / avg_length)
+                # A term has one posting per row, so plain fancy-index assignment is safe
+                scores[postings] += idf * tf * (self.k1 + 1) / (tf + norm)
+            scores[~self._alive[:rows]] = 0.0
+
+            count = min(limit, rows)
+            top = np.argpartition(-scores, count - 1)[:count]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(self._docs[row][1], round(float(scores[row]), 4)) for row in top if scores[row] > 0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "documents": len(self._row_of),
+                "tombstones": self._rows - len(self._row_of),
+                "terms": len(self._vocabulary),
+                "age_seconds": round(time.monotonic() - self.built_at, 1) if self.ready else None,
+            }
+
+
+chat_index = ChatIndex()
+
+
+def _sentence(text) -> str:
+    text = (text or "").strip().rstrip(".")
+    return f"{text}." if text else ""
+
+
+def describe(payload: dict) -> str:
+    """One answer paragraph for a matched herb or remedy."""
+    if payload["type"] == "herb":
+        name = f"{payload['name']} ({payload['form']})" if payload.get("form") else payload["name"]
+        uses = payload.get("primary_uses") or payload.get("benefits")
+        parts = [f"{name} is traditionally used for {_sentence(uses)}" if uses else f"{name} is a traditional herb."]
+        if payload.get("primary_uses") and payload.get("benefits"):
+            parts.append(f"Benefits: {_sentence(payload['benefits'])}")
+        if payload.get("dosage"):
+            parts.append(f"Typical dosage: {_sentence(payload['dosage'])}")
+    else:
+        parts = [f"{payload['name']}: {_sentence(payload.get('benefits')) or 'a traditional remedy.'}"]
+        if payload.get("ingredients"):
+            parts.append(f"Ingredients: {_sentence(payload['ingredients'])}")
+        if payload.get("dosage_instructions"):
+            parts.append(f"Dosage: {_sentence(payload['dosage_instructions'])}")
+        if payload.get("precautions"):
+            parts.append(f"Precautions: {_sentence(payload['precautions'])}")
+    return " ".join(parts)
+
+
+def _event(name: str, data: dict) -> str:
+    return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def answer_events(query: str, matches: list, started: float):
+    """Server-sent events answering ``query``: an intro, one ``result`` per match, the disclaimer, then ``done``."""
+    if matches:
+        yield _event("message", {"text": f"Here is what the Ayurvedic catalog suggests for \"{query}\":"})
+    else:
+        yield _event("message", {"text": "I couldn't find herbs or remedies matching that. Try describing "
+                                         "your symptoms, for example \"poor digestion\" or \"trouble sleeping\"."})
+    for payload, score in matches:
+        yield _event("result", {"type": payload["type"], "id": payload["id"], "name": payload["name"],
+                                "score": score, "text": describe(payload)})
+    yield _event("message", {"text": DISCLAIMER})
+    yield _event("done", {"results": len(matches), "took_ms": round((time.perf_counter() - started) * 1000, 3)})
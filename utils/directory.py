@@ -0,0 +1,124 @@
+# directory.py
+
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, or_, select, tuple_
+
+from utils.models import Doctor
+from utils.pagination import decode_cursor, encode_cursor
+
+# Columns returned by the doctor directory (never the password hash)
+DIRECTORY_COLUMNS = [
+    Doctor.doctor_id, Doctor.first_name, Doctor.last_name, Doctor.specialization, Doctor.phone_number,
+    Doctor.email, Doctor.address, Doctor.city, Doctor.state, Doctor.postal_code,
+]
+
+DIRECTORY_SORTS = {
+    "last_name": Doctor.last_name,
+    "first_name": Doctor.first_name,
+    "city": Doctor.city,
+    "specialization": Doctor.specialization,
+}
+
+FACET_COLUMNS = {
+    "specialization": Doctor.specialization,
+    "city": Doctor.city,
+}
+
+# Facet buckets returned per facet, largest first
+FACET_LIMIT = 50
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def directory_filters(specialization: Optional[str] = None, city: Optional[str] = None,
+                      state: Optional[str] = None, name: Optional[str] = None) -> dict:
+    """Map each supplied filter to its SQL condition, keyed by filter name."""
+    filters = {}
+    if specialization:
+        filters["specialization"] = Doctor.specialization == specialization
+    if city:
+        filters["city"] = Doctor.city == city
+    if state:
+        filters["state"] = Doctor.state == state
+    if name:
+        pattern = _escape_like(name.lower()) + "%"
+        filters["name"] = or_(
+            func.lower(Doctor.last_name).like(pattern, escape="\\"),
+            func.lower(Doctor.first_name).like(pattern, escape="\\"),
+        )
+    return filters
+
+
+async def search_doctors(db, filters: dict, sort: str, cursor: Optional[str], limit: int,
+                         columns: Optional[list] = None) -> dict:
+    """One keyset page of the directory in (sort column, doctor_id) order, doctors without a value last.
+
+    Sorting on the bare column lets each page be a range scan of a (filter, sort, doctor_id)
+    index; doctors whose sort column is NULL follow in id order, read by a second scan.
+    """
+    if sort not in DIRECTORY_SORTS:
+        raise HTTPException(status_code=400, detail="Unsupported sort field")
+    sort_column = DIRECTORY_SORTS[sort]
+    columns = columns or DIRECTORY_COLUMNS
+    base = select(*columns, sort_column.label("sort_key")).where(*filters.values())
+
+    after_value, after_id = None, None
+    if cursor:
+        payload = decode_cursor(cursor)
+        if payload.get("sort") != sort or not isinstance(payload.get("id"), int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after_value, after_id = payload.get("v"), payload["id"]
+
+    rows = []
+    if after_id is None or after_value is not None:
+        stmt = base.where(sort_column.isnot(None)) if sort_column.nullable else base
+        if after_id is not None:
+            stmt = stmt.where(tuple_(sort_column, Doctor.doctor_id) > tuple_(after_value, after_id))
+        rows = (await db.execute(stmt.order_by(sort_column, Doctor.doctor_id).limit(limit + 1))).mappings().all()
+    if len(rows) <= limit and sort_column.nullable:
+        stmt = base.where(sort_column.is_(None))
+        if after_id is not None and after_value is None:
+            stmt = stmt.where(Doctor.doctor_id > after_id)
+        stmt = stmt.order_by(Doctor.doctor_id).limit(limit + 1 - len(rows))
+        rows = [*rows, *(await db.execute(stmt)).mappings().all()]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({"sort": sort, "v": rows[-1]["sort_key"], "id": rows[-1]["doctor_id"]})
+
+    facets = {}
+    for facet in FACET_COLUMNS:
+        counts = await facet_counts(db, facet, filters)
+        if counts is not None:
+            facets[facet] = counts
+    return {
+        "items": [{column.key: row[column.key] for column in columns} for row in rows],
+        "next_cursor": next_cursor,
+        "facets": facets,
+    }
+
+
+async def facet_counts(db, facet: str, filters: dict) -> Optional[dict]:
+    """Count doctors per ``facet`` value under every active filter except the facet's own.
+
+    Returns None when no other filter applies: counting the whole directory is a full scan
+    on every page, so unfiltered facets are left out of the response.
+    """
+    column = FACET_COLUMNS[facet]
+    conditions = [condition for name, condition in filters.items() if name != facet]
+    if not conditions:
+        return None
+    count = func.count().label("count")
+    stmt = (
+        select(column, count)
+        .where(column.isnot(None), *conditions)
+        .group_by(column)
+        .order_by(count.desc(), column)
+        .limit(FACET_LIMIT)
+    )
+    return {value: total for value, total in (await db.execute(stmt)).all()}
@@ -0,0 +1,76 @@
+# export.py
+
+import csv
+import io
+import json
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from database.db import SessionLocal
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+# Passwords never leave the database; name keys are derived and rebuilt after an import
+EXPORT_EXCLUDED_COLUMNS = {"password", "herb_name_key", "botanical_name_key"}
+
+
+def export_columns(model):
+    return [column for column in model.__table__.columns if column.name not in EXPORT_EXCLUDED_COLUMNS]
+
+
+def iter_row_chunks(session, model, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Yield lists of plain column tuples from a server-side cursor, ``chunk_size`` rows at a time."""
+    columns = export_columns(model)
+    stmt = (
+        select(*columns)
+        .order_by(model.__mapper__.primary_key[0])
+        .execution_options(yield_per=chunk_size)
+    )
+    result = session.execute(stmt)
+    for partition in result.partitions(chunk_size):
+        yield partition
+
+
+def stream_export(model, fmt: str, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Stream ``model``'s table as NDJSON or CSV.
+
+    The generator owns its session because the request's ``get_db`` session is closed
+    before a streaming response body is consumed.
+    """
+    names = [column.name for column in export_columns(model)]
+    session = SessionLocal()
+    try:
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(names)
+            yield buffer.getvalue()
+            for chunk in iter_row_chunks(session, model, chunk_size):
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(chunk)
+                yield buffer.getvalue()
+        else:
+            for chunk in iter_row_chunks(session, model, chunk_size):
+                yield "".join(
+                    json.dumps(dict(zip(names, row)), default=str) + "\n" for row in chunk
+                )
+    finally:
+        session.close()
+
+
+def export_response(model, fmt: str, filename: str) -> StreamingResponse:
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported export format")
+    return StreamingResponse(
+        stream_export(model, fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
@@ -0,0 +1,62 @@
+# fields.py
+
+from typing import List, Optional
+
+from fastapi import HTTPException
+
+from utils.models import Appointment, Diagnosis, Doctor, FollowUp, Herb, Patient, Remedy, Treatment
+from utils.pagination import primary_key
+from utils.responses import ORJSONResponse
+from utils.schema import (PYDANTIC_V2, AppointmentRead, DiagnosisRead, DoctorRead, FollowUpRead, HerbResponse,
+                          PatientRead, RemedyResponse, TreatmentRead)
+
+# ?fields= may name any field of the model's read schema, so a sparse response never
+# exposes more than the full one would (no password hashes)
+READ_SCHEMAS = {
+    Patient: PatientRead,
+    Doctor: DoctorRead,
+    Appointment: AppointmentRead,
+    Diagnosis: DiagnosisRead,
+    Treatment: TreatmentRead,
+    FollowUp: FollowUpRead,
+    Herb: HerbResponse,
+    Remedy: RemedyResponse,
+}
+
+
+def schema_fields(schema) -> List[str]:
+    return list(schema.model_fields if PYDANTIC_V2 else schema.__fields__)
+
+
+FIELD_ALLOWLISTS = {model: schema_fields(schema) for model, schema in READ_SCHEMAS.items()}
+
+
+def field_columns(model, fields: Optional[str], allowed: Optional[List[str]] = None) -> Optional[list]:
+    """Resolve a comma-separated ``fields`` value to ``model`` columns, or None when it is not set.
+
+    The primary key is always included since keyset cursors are built from it.
+    """
+    if not fields:
+        return None
+    allowed = allowed if allowed is not None else FIELD_ALLOWLISTS[model]
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown) or fields}. Allowed: {', '.join(allowed)}",
+        )
+    pk = primary_key(model).key
+    names = [pk] + [name for name in dict.fromkeys(names) if name != pk]
+    return [getattr(model, name) for name in names]
+
+
+def project_page(page: dict, columns: list) -> dict:
+    """Trim an already-built page of dicts (e.g. a cached one) down to ``columns``."""
+    keys = [column.key for column in columns]
+    return {**page, "items": [{key: item[key] for key in keys} for item in page["items"]]}
+
+
+def sparse_response(page: dict) -> ORJSONResponse:
+    # Partial rows don't fit the route's response_model, so they are rendered as-is
+    return ORJSONResponse(content=page)
@@ -0,0 +1,248 @@
+# geo.py
+
+import math
+import os
+import time
+from typing import Optional
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from utils.directory import DIRECTORY_COLUMNS
+from utils.live_index import LiveIndex
+from utils.models import Doctor, PostalCode
+
+# Workers rebuild their index from the database this often, picking up other workers' writes and imports
+GEO_REFRESH_SECONDS = float(os.getenv("GEO_REFRESH_SECONDS", "300"))
+# Side of a grid cell; about 11 km north-south
+GEO_CELL_DEGREES = 0.1
+GRID_ROWS = round(180 / GEO_CELL_DEGREES)
+GRID_COLUMNS = round(360 / GEO_CELL_DEGREES)
+EARTH_RADIUS_KM = 6371.0088
+
+DEFAULT_RADIUS_KM = 10.0
+MAX_RADIUS_KM = 250.0
+
+
+def normalize_postal_code(value: Optional[str]) -> str:
+    """Postal codes compare without spaces and case ("411 001" is "411001", "sw1a 1aa" is "SW1A1AA")."""
+    return "".join(str(value or "").split()).upper()
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> tuple:
+    """Latitude and longitude ranges (degrees) containing every point within ``radius_km``.
+
+    The longitude range is None when the circle reaches a pole, i.e. spans every longitude.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    delta_latitude = math.degrees(angle)
+    south, north = latitude - delta_latitude, latitude + delta_latitude
+    if south <= -90 or north >= 90:
+        return (max(south, -90.0), min(north, 90.0)), None
+    delta_longitude = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(latitude))))
+    return (south, north), (longitude - delta_longitude, longitude + delta_longitude)
+
+
+def haversine_km(latitude: float, longitude: float, latitudes, longitudes):
+    """Great-circle distances from one point to arrays of points, all in radians."""
+    a = (np.sin((latitudes - latitude) / 2) ** 2
+         + math.cos(latitude) * np.cos(latitudes) * np.sin((longitudes - longitude) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class NearbyIndex(LiveIndex):
+    """Postal code centroids bucketed into a latitude/longitude grid, each with its doctors.
+
+    Doctors in one postal code share its centroid, so distances are measured per postal code:
+    a radius query reads the grid cells covering the circle's bounding box, runs one
+    vectorized haversine over their centroids, then takes doctors from the nearest postal
+    codes outward until the page is full. Doctors whose postal code has no centroid can't be
+    placed and are only counted.
+    """
+
+    state = ("_centroids", "_coordinates", "_latitudes", "_longitudes", "_cells", "_doctors_at", "_counts",
+             "_postal_of", "_unlocated")
+    refresh_seconds = GEO_REFRESH_SECONDS
+    label = "Nearby doctor index"
+
+    def __init__(self):
+        super().__init__()
+        self._reset()
+
+    def _reset(self):
+        self._centroids = {}
+        self._coordinates = np.zeros((0, 2))
+        self._latitudes = np.zeros(0)
+        self._longitudes = np.zeros(0)
+        self._cells = {}
+        self._doctors_at = {}
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._postal_of = {}
+        self._unlocated = set()
+
+    def _place(self, doctor_id: int, postal_code: Optional[str]):
+        self._displace(doctor_id)
+        slot = self._centroids.get(normalize_postal_code(postal_code))
+        if slot is None:
+            self._unlocated.add(doctor_id)
+            return
+        doctors = self._doctors_at.get(slot, np.empty(0, dtype=np.int64))
+        self._doctors_at[slot] = np.insert(doctors, np.searchsorted(doctors, doctor_id), doctor_id)
+        self._counts[slot] += 1
+        self._postal_of[doctor_id] = slot
+
+    def _displace(self, doctor_id: int):
+        self._unlocated.discard(doctor_id)
+        slot = self._postal_of.pop(doctor_id, None)
+        if slot is None:
+            return
+        doctors = self._doctors_at[slot]
+        self._doctors_at[slot] = doctors[doctors != doctor_id]
+        self._counts[slot] -= 1
+
+    def _build(self, centroids, doctors) -> "NearbyIndex":
+        fresh = NearbyIndex()
+        located = {}
+        for row in centroids:
+            if row.latitude is not None and row.longitude is not None:
+                located[normalize_postal_code(row.postal_code)] = (float(row.latitude), float(row.longitude))
+        fresh._centroids = {postal_code: slot for slot, postal_code in enumerate(located)}
+        fresh._coordinates = np.array(list(located.values()), dtype=np.float64).reshape(-1, 2)
+        latitudes, longitudes = fresh._coordinates[:, 0], fresh._coordinates[:, 1]
+        fresh._latitudes, fresh._longitudes = np.radians(latitudes), np.radians(longitudes)
+        rows = np.minimum(((latitudes + 90) // GEO_CELL_DEGREES).astype(np.int64), GRID_ROWS - 1)
+        columns = ((longitudes + 180) // GEO_CELL_DEGREES).astype(np.int64) % GRID_COLUMNS
+        fresh._cells = _group(rows * GRID_COLUMNS + columns, np.arange(len(located), dtype=np.int64))
+
+        placed = []
+        for doctor in doctors:
+            slot = fresh._centroids.get(normalize_postal_code(doctor.postal_code))
+            if slot is None:
+                fresh._unlocated.add(doctor.doctor_id)
+            else:
+                placed.append((slot, doctor.doctor_id))
+        # Each postal code's doctors are kept in id order, which nearby() relies on to break ties
+        placed = np.array(sorted(placed, key=lambda pair: pair[1]), dtype=np.int64).reshape(-1, 2)
+        fresh._doctors_at = _group(placed[:, 0], placed[:, 1])
+        fresh._counts = np.bincount(placed[:, 0], minlength=len(located)).astype(np.int64)
+        fresh._postal_of = dict(zip(placed[:, 1].tolist(), placed[:, 0].tolist()))
+        return fresh
+
+    async def _read(self, db) -> tuple:
+        centroids = (await db.execute(
+            select(PostalCode.postal_code, PostalCode.latitude, PostalCode.longitude)
+        )).all()
+        doctors = (await db.execute(select(Doctor.doctor_id, Doctor.postal_code))).all()
+        return centroids, doctors
+
+    def upsert_doctor(self, doctor):
+        self._write(self._place, doctor.doctor_id, doctor.postal_code)
+
+    def remove(self, doctor_id: int):
+        self._write(self._displace, doctor_id)
+
+    def locate(self, postal_code: str) -> Optional[tuple]:
+        """The (latitude, longitude) centroid of ``postal_code`` in degrees, or None if unknown."""
+        slot = self._centroids.get(normalize_postal_code(postal_code))
+        if slot is None:
+            return None
+        return tuple(self._coordinates[slot].tolist())
+
+    def _candidate_cells(self, latitudes: tuple, longitudes: Optional[tuple]) -> list:
+        first_row = int((latitudes[0] + 90) // GEO_CELL_DEGREES)
+        last_row = min(int((latitudes[1] + 90) // GEO_CELL_DEGREES), GRID_ROWS - 1)
+        if longitudes is None:
+            first_column, span = 0, GRID_COLUMNS - 1
+        else:
+            first_column = int((longitudes[0] + 180) // GEO_CELL_DEGREES)
+            span = min(int((longitudes[1] + 180) // GEO_CELL_DEGREES) - first_column, GRID_COLUMNS - 1)
+        first_column %= GRID_COLUMNS
+        # Large circles cover more cells than are occupied; then scanning the occupied ones is cheaper
+        if (last_row - first_row + 1) * (span + 1) > len(self._cells):
+            return [
+                slots for cell, slots in self._cells.items()
+                if first_row <= cell // GRID_COLUMNS <= last_row
+                and (cell % GRID_COLUMNS - first_column) % GRID_COLUMNS <= span
+            ]
+        return [
+            self._cells[cell]
+            for row in range(first_row, last_row + 1)
+            for offset in range(span + 1)
+            if (cell := row * GRID_COLUMNS + (first_column + offset) % GRID_COLUMNS) in self._cells
+        ]
+
+    def nearby(self, latitude: float, longitude: float, radius_km: float, limit: int) -> list:
+        """Up to ``limit`` ``(doctor_id, distance_km)`` within ``radius_km``, nearest first, ties by id."""
+        with self._lock:
+            cells = self._candidate_cells(*bounding_box(latitude, longitude, radius_km))
+            if not cells:
+                return []
+            slots = np.concatenate(cells)
+            slots = slots[self._counts[slots] > 0]
+            distances = haversine_km(math.radians(latitude), math.radians(longitude),
+                                     self._latitudes[slots], self._longitudes[slots])
+            within = distances <= radius_km
+            slots, distances = slots[within], distances[within]
+            if not len(slots):
+                return []
+            order = np.argsort(distances, kind="stable")
+            slots, distances = slots[order], distances[order]
+            # Nearest postal codes until the page is full, plus any tied with the last one taken
+            filled = np.searchsorted(np.cumsum(self._counts[slots]), limit)
+            if filled < len(slots):
+                taken = np.searchsorted(distances, distances[filled], side="right")
+                slots, distances = slots[:taken], distances[:taken]
+            doctor_ids = np.concatenate([self._doctors_at[slot] for slot in slots.tolist()])
+            doctor_distances = np.repeat(distances, self._counts[slots])
+            order = np.lexsort((doctor_ids, doctor_distances))[:limit]
+            return list(zip(doctor_ids[order].tolist(), doctor_distances[order].tolist()))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "postal_codes": len(self._centroids),
+                "doctors": len(self._postal_of),
+                "unlocated_doctors": len(self._unlocated),
+                "cells": len(self._cells),
+                "age_seconds": round(time.monotonic() - self.built_at, 1) if self.ready else None,
+            }
+
+
+def _group(keys, values) -> dict:
+    """``{key: array of its values}``, keeping the values' order within each key."""
+    if not len(keys):
+        return {}
+    order = np.argsort(keys, kind="stable")
+    groups, starts = np.unique(keys[order], return_index=True)
+    return dict(zip(groups.tolist(), np.split(values[order], starts[1:])))
+
+
+nearby_index = NearbyIndex()
+
+
+async def find_nearby_doctors(db, postal_code: str, radius_km: float, limit: int) -> dict:
+    await nearby_index.ensure_loaded(db)
+    centroid = nearby_index.locate(postal_code)
+    if centroid is None:
+        raise HTTPException(status_code=404, detail="Unknown postal code")
+
+    matches = nearby_index.nearby(*centroid, radius_km, limit)
+    items = []
+    if matches:
+        # One primary-key lookup for the page; the index holds coordinates only
+        rows = (await db.execute(
+            select(*DIRECTORY_COLUMNS).where(Doctor.doctor_id.in_([doctor_id for doctor_id, _ in matches]))
+        )).mappings().all()
+        by_id = {row["doctor_id"]: row for row in rows}
+        # A doctor deleted through another worker stays in this index until its next refresh
+        items = [{**by_id[doctor_id], "distance_km": round(distance, 2)}
+                 for doctor_id, distance in matches if doctor_id in by_id]
+    return {
+        "postal_code": normalize_postal_code(postal_code),
+        "latitude": centroid[0],
+        "longitude": centroid[1],
+        "radius_km": radius_km,
+        "items": items,
+    }
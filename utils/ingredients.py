@@ -0,0 +1,204 @@
+# ingredients.py
+
+import re
+from typing import Optional
+
+from sqlalchemy import bindparam, delete, func, insert, or_, select
+
+from utils.models import Herb, Remedy, RemedyHerb
+from utils.pagination import paginate_async
+
+# Ingredient lists are free text: "Ashwagandha root (2 g), Shatavari and Guduchi (Tinospora cordifolia)".
+# They are split into fragments on these separators, and each fragment is matched against
+# herb and botanical names by its longest runs of words.
+SEPARATORS = re.compile(r"[,;:/+&()\[\]\n]|\band\b|\bwith\b")
+WORD_RE = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+MAX_NAME_WORDS = 4
+# Remedies relinked per transaction by the batch reindex, and names per IN lookup
+REINDEX_CHUNK_SIZE = 500
+LOOKUP_CHUNK_SIZE = 1000
+
+
+def normalize_name(value: Optional[str]) -> str:
+    return " ".join(WORD_RE.findall((value or "").lower()))
+
+
+def ingredient_fragments(text: Optional[str]) -> list:
+    """Split an ingredient list into fragments, each a list of lowercase words."""
+    fragments = (WORD_RE.findall(part) for part in SEPARATORS.split((text or "").lower()))
+    return [words for words in fragments if words]
+
+
+def herb_name_key(value: Optional[str]) -> str:
+    """What a herb or botanical name is matched on: its words up to the first separator.
+
+    Ingredient text is split on the same separators, so "Amla (Indian gooseberry)" is keyed
+    "amla" and "St. John's Wort" is keyed "st john's wort", the same as their fragments.
+    """
+    fragments = ingredient_fragments(value)
+    return " ".join(fragments[0]) if fragments else ""
+
+
+def candidate_names(fragments: list) -> set:
+    """Every run of up to MAX_NAME_WORDS consecutive words, i.e. every string a herb name could match."""
+    names = set()
+    for words in fragments:
+        for start in range(len(words)):
+            for end in range(start + 1, min(start + MAX_NAME_WORDS, len(words)) + 1):
+                names.add(" ".join(words[start:end]))
+    return names
+
+
+def match_herbs(fragments: list, lookup: dict) -> set:
+    """Herb ids named in ``fragments``, preferring the longest name at each position."""
+    herb_ids = set()
+    for words in fragments:
+        start = 0
+        while start < len(words):
+            for end in range(min(start + MAX_NAME_WORDS, len(words)), start, -1):
+                ids = lookup.get(" ".join(words[start:end]))
+                if ids:
+                    herb_ids.update(ids)
+                    start = end
+                    break
+            else:
+                start += 1
+    return herb_ids
+
+
+def herb_lookup(db, names: set) -> dict:
+    """Map each of ``names`` that is a herb or botanical name key to its herb ids."""
+    lookup = {}
+    names = sorted(names)
+    for start in range(0, len(names), LOOKUP_CHUNK_SIZE):
+        chunk = names[start:start + LOOKUP_CHUNK_SIZE]
+        rows = db.execute(
+            select(Herb.herb_id, Herb.herb_name_key, Herb.botanical_name_key).where(
+                or_(Herb.herb_name_key.in_(chunk), Herb.botanical_name_key.in_(chunk))
+            )
+        ).all()
+        for row in rows:
+            for key in (row.herb_name_key, row.botanical_name_key):
+                if key:
+                    lookup.setdefault(key, set()).add(row.herb_id)
+    return lookup
+
+
+def set_herb_name_keys(db, herbs: list):
+    """Store the normalized names of ``herbs`` that herb_lookup matches against. Does not commit."""
+    if not herbs:
+        return
+    stmt = Herb.__table__.update().where(Herb.herb_id == bindparam("_id")).values(
+        herb_name_key=bindparam("_name"), botanical_name_key=bindparam("_botanical")
+    )
+    db.execute(stmt, [
+        {"_id": herb.herb_id, "_name": herb_name_key(herb.herb_name) or None,
+         "_botanical": herb_name_key(herb.botanical_name) or None}
+        for herb in herbs
+    ])
+
+
+def fill_herb_name_keys(db, missing_only: bool = False) -> int:
+    """Recompute stored herb name keys in primary-key chunks, one transaction per chunk.
+
+    Imports write herbs without going through relink_herbs, so the batch reindex calls this
+    first; ``missing_only`` limits it to herbs never keyed, e.g. right after the columns were added.
+    """
+    total, last_id = 0, 0
+    while True:
+        stmt = select(Herb.herb_id, Herb.herb_name, Herb.botanical_name).where(Herb.herb_id > last_id)
+        if missing_only:
+            stmt = stmt.where(Herb.herb_name_key.is_(None))
+        rows = db.execute(stmt.order_by(Herb.herb_id).limit(REINDEX_CHUNK_SIZE)).all()
+        if not rows:
+            return total
+        set_herb_name_keys(db, rows)
+        db.commit()
+        total += len(rows)
+        last_id = rows[-1].herb_id
+
+
+def link_ingredients(db, remedies: list) -> int:
+    """Replace the herb links of ``remedies``, given as (remedy_id, ingredients) pairs. Does not commit.
+
+    One name lookup covers the whole batch, so relinking a chunk of remedies costs a few
+    indexed queries regardless of its size. Returns the number of links written.
+    """
+    if not remedies:
+        return 0
+    fragments = {remedy_id: ingredient_fragments(ingredients) for remedy_id, ingredients in remedies}
+    names = set()
+    for parts in fragments.values():
+        names |= candidate_names(parts)
+    lookup = herb_lookup(db, names) if names else {}
+    links = [
+        {"remedy_id": remedy_id, "herb_id": herb_id}
+        for remedy_id, parts in fragments.items()
+        for herb_id in sorted(match_herbs(parts, lookup))
+    ]
+    db.execute(delete(RemedyHerb).where(RemedyHerb.remedy_id.in_(list(fragments))))
+    if links:
+        db.execute(insert(RemedyHerb), links)
+    return len(links)
+
+
+# Deletes go through these rather than relying on ON DELETE CASCADE, which SQLite ignores by default
+def unlink_remedy(db, remedy_id: int):
+    db.execute(delete(RemedyHerb).where(RemedyHerb.remedy_id == remedy_id))
+
+
+def unlink_herb(db, herb_id: int):
+    db.execute(delete(RemedyHerb).where(RemedyHerb.herb_id == herb_id))
+
+
+def relink_herbs(db, herbs: list) -> int:
+    """Relink the remedies affected by new or renamed ``herbs``. Does not commit.
+
+    Those are the remedies already linked to them plus those whose ingredients mention one
+    of their names. Finding the latter is a LIKE scan, paid on herb writes so remedy reads
+    never need one; it looks for the longest word of each name key, which appears verbatim in
+    any text the key matches ("st. john's wort" has "john's"). The herbs' name keys are refreshed first.
+    """
+    set_herb_name_keys(db, herbs)
+    keys = {herb_name_key(name) for herb in herbs for name in (herb.herb_name, herb.botanical_name)} - {""}
+    names = sorted({max(key.split(), key=len) for key in keys})
+    remedy_ids = set(db.execute(
+        select(RemedyHerb.remedy_id).where(RemedyHerb.herb_id.in_([herb.herb_id for herb in herbs]))
+    ).scalars())
+    for start in range(0, len(names), LOOKUP_CHUNK_SIZE):
+        mentions = [func.lower(Remedy.ingredients).contains(name, autoescape=True)
+                    for name in names[start:start + LOOKUP_CHUNK_SIZE]]
+        remedy_ids.update(db.execute(select(Remedy.remedy_id).where(or_(*mentions))).scalars())
+    if not remedy_ids:
+        return 0
+    rows = db.execute(
+        select(Remedy.remedy_id, Remedy.ingredients).where(Remedy.remedy_id.in_(sorted(remedy_ids)))
+    ).all()
+    return link_ingredients(db, [(row.remedy_id, row.ingredients) for row in rows])
+
+
+def reindex_ingredients(db, progress=None) -> int:
+    """Relink every remedy in primary-key chunks, one transaction per chunk. Returns the links written."""
+    fill_herb_name_keys(db)
+    total, last_id = 0, 0
+    while True:
+        rows = db.execute(
+            select(Remedy.remedy_id, Remedy.ingredients)
+            .where(Remedy.remedy_id > last_id)
+            .order_by(Remedy.remedy_id)
+            .limit(REINDEX_CHUNK_SIZE)
+        ).all()
+        if not rows:
+            return total
+        total += link_ingredients(db, [(row.remedy_id, row.ingredients) for row in rows])
+        db.commit()
+        last_id = rows[-1].remedy_id
+        if progress is not None:
+            progress.update(len(rows))
+
+
+async def remedies_for_herb(db, herb_id: int, cursor: Optional[str], limit: int,
+                            columns: Optional[list] = None) -> dict:
+    """Remedies using ``herb_id``, keyset-paged like the full list, through the remedy_herbs index."""
+    linked = select(RemedyHerb.remedy_id).where(RemedyHerb.herb_id == herb_id)
+    return await paginate_async(db, Remedy, cursor, limit, columns, filters=(Remedy.remedy_id.in_(linked),))
@@ -1,13 +1,15 @@
 from passlib.context import CryptContext
 import jwt
+import os
 from datetime import datetime, timedelta
 
 # Password hashing configuration
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # JWT Secret key and algorithm
-SECRET_KEY = '22b22897-2f07-4df2-9cc2-66c40c591d99'  # Should be stored in environment variable in production
-ALGORITHM = "HS256"
+SECRET_KEY = os.getenv("SECRET_KEY", '22b22897-2f07-4df2-9cc2-66c40c591d99')  # Set SECRET_KEY in production
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
 # Function to hash password
 def hash_password(password: str) -> str:
@@ -28,6 +30,10 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# Function to verify a JWT token and return its claims (raises jwt.PyJWTError when invalid or expired)
+def decode_access_token(token: str) -> dict:
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
 
 
 # print(hash_password("admin123"))
@@ -0,0 +1,103 @@
+# lifespan.py
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+
+from sqlalchemy import text
+
+from database.db import AsyncSessionLocal, async_engine, engine
+from utils.autocomplete import autocomplete_index
+from utils.catalog import get_cached_page
+from utils.chat import chat_index
+from utils.geo import nearby_index
+from utils.models import Herb, Remedy
+from utils.pagination import DEFAULT_PAGE_SIZE
+from utils.password_pool import password_pool
+from utils.search import catalog_index
+
+logger = logging.getLogger(__name__)
+
+# Connections opened per pool during warm-up, and the delay between attempts while the DB is unreachable
+WARM_CONNECTIONS = int(os.getenv("WARM_CONNECTIONS", os.getenv("DB_POOL_SIZE", "5")))
+WARM_RETRY_SECONDS = float(os.getenv("WARM_RETRY_SECONDS", "2"))
+
+
+class Readiness:
+    def __init__(self):
+        self.ready = False
+        self.attempts = 0
+        self.warm_seconds = None
+        self.last_error = None
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "attempts": self.attempts,
+            "warm_seconds": self.warm_seconds,
+            "last_error": self.last_error,
+        }
+
+
+readiness = Readiness()
+
+
+def _warm_sync_pool(count: int):
+    connections = [engine.connect() for _ in range(count)]
+    for connection in connections:
+        connection.execute(text("SELECT 1"))
+        connection.close()
+
+
+async def _warm_async_pool(count: int):
+    connections = [await async_engine.connect() for _ in range(count)]
+    for connection in connections:
+        await connection.execute(text("SELECT 1"))
+        await connection.close()
+
+
+async def warm_up():
+    started = time.perf_counter()
+    await _warm_async_pool(WARM_CONNECTIONS)
+    await asyncio.to_thread(_warm_sync_pool, WARM_CONNECTIONS)
+    async with AsyncSessionLocal() as db:
+        if async_engine.dialect.name != "postgresql":
+            await catalog_index.load_async(db)
+        await chat_index.load_async(db)
+        await autocomplete_index.load_async(db)
+        await nearby_index.load_async(db)
+        await get_cached_page(db, Herb, "herbs", None, DEFAULT_PAGE_SIZE)
+        await get_cached_page(db, Remedy, "remedies", None, DEFAULT_PAGE_SIZE)
+    # Spawn the bcrypt worker processes now rather than on the first login
+    await asyncio.to_thread(password_pool.warm_up)
+    readiness.warm_seconds = round(time.perf_counter() - started, 3)
+
+
+async def warm_up_until_ready():
+    while not readiness.ready:
+        readiness.attempts += 1
+        try:
+            await warm_up()
+        except Exception as exc:
+            readiness.last_error = f"{type(exc).__name__}: {exc}"
+            logger.warning("Warm-up attempt %d failed: %s", readiness.attempts, readiness.last_error)
+            await asyncio.sleep(WARM_RETRY_SECONDS)
+        else:
+            readiness.last_error = None
+            readiness.ready = True
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Warm up in the background so the process starts serving (and liveness passes) even if the DB is down
+    task = asyncio.create_task(warm_up_until_ready())
+    try:
+        yield
+    finally:
+        task.cancel()
+        readiness.ready = False
+        password_pool.shutdown()
+        await async_engine.dispose()
+        engine.dispose()
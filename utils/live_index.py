@@ -0,0 +1,101 @@
+# live_index.py
+
+import asyncio
+import logging
+import threading
+import time
+
+from database.db import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class LiveIndex:
+    """Base for the per-worker in-memory indexes built from the database and kept current by write hooks.
+
+    Subclasses name the attributes holding the index in ``state`` and implement ``_read``
+    (the rows a build needs) and ``_build`` (a fresh instance built from them). Builds run off
+    to the side and are swapped in under the lock, so lookups never wait on a rebuild.
+
+    A build reads rows that may already be stale by the time it is swapped in, so every write
+    hook that runs while a load is in flight is also logged and replayed onto the fresh index.
+    Replays are upserts and removals by key, so a write the rows already reflect is harmless.
+    Writes made by other workers are picked up by a rebuild every ``refresh_seconds``.
+    """
+
+    state = ()
+    refresh_seconds = 0.0
+    label = "In-memory index"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ready = False
+        self.built_at = 0.0
+        self._refresh = None
+        self._loading = 0
+        self._writes = []
+
+    async def _read(self, db) -> tuple:
+        raise NotImplementedError
+
+    def _build(self, *rows) -> "LiveIndex":
+        raise NotImplementedError
+
+    def _swap(self, fresh: "LiveIndex", since: int):
+        with self._lock:
+            for name in self.state:
+                setattr(self, name, getattr(fresh, name))
+            for apply, args in self._writes[since:]:
+                apply(*args)
+            self.ready = True
+            self.built_at = time.monotonic()
+
+    def load(self, *rows):
+        self._swap(self._build(*rows), len(self._writes))
+
+    async def load_async(self, db):
+        with self._lock:
+            self._loading += 1
+            since = len(self._writes)
+        try:
+            rows = await self._read(db)
+            fresh = await asyncio.to_thread(self._build, *rows)
+            self._swap(fresh, since)
+        finally:
+            with self._lock:
+                self._loading -= 1
+                if not self._loading:
+                    self._writes.clear()
+
+    def _write(self, apply, *args):
+        """Apply a write hook now if the index is built, and log it for any load in flight."""
+        with self._lock:
+            if self._loading:
+                self._writes.append((apply, args))
+            if self.ready:
+                apply(*args)
+
+    def refresh_due(self) -> bool:
+        return (
+            self.ready and self.refresh_seconds > 0
+            and time.monotonic() - self.built_at >= self.refresh_seconds
+            and (self._refresh is None or self._refresh.done())
+        )
+
+    def refresh_in_background(self):
+        async def refresh():
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.load_async(db)
+            except Exception:
+                logger.exception("%s refresh failed", self.label)
+                self.built_at = time.monotonic()
+
+        self._refresh = asyncio.get_running_loop().create_task(refresh())
+
+    async def ensure_loaded(self, db):
+        """Build the index on first use, and start a background rebuild once it is due."""
+        if not self.ready:
+            await self.load_async(db)
+        elif self.refresh_due():
+            self.refresh_in_background()
@@ -0,0 +1,207 @@
+# metrics.py
+
+import threading
+import time
+from bisect import bisect_left
+
+from starlette.routing import Match
+
+from database.query_stats import QueryStats, current_query_stats
+
+# Prometheus text exposition format, version 0.0.4
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted((labels, [list(series[0]), series[1], series[2]]) for labels, series in self._values.items())
+        lines = self.header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_number(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.setdefault(metric.name, metric)
+        return self._metrics[metric.name]
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Per worker process, like the pool and cache stats
+registry = Registry()
+
+REQUESTS = registry.counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+IN_FLIGHT = registry.gauge("http_requests_in_flight", "HTTP requests currently being served", ("method", "route"))
+REQUEST_QUERIES = registry.histogram(
+    "http_request_db_queries", "Database statements executed per request", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = registry.histogram(
+    "http_request_db_seconds", "Database time spent per request", ("method", "route")
+)
+SLOW_QUERIES = registry.counter(
+    "db_slow_queries_total", "Statements slower than SLOW_QUERY_MS, by route", ("method", "route")
+)
+
+# Unmatched paths share one label so scanners can't blow up the series count
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def match_route(scope):
+    """The route ``scope`` will be dispatched to, or None. Resolved once per request and kept in the scope."""
+    if "ayuvibe.route" not in scope:
+        full = partial = None
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                full = route
+                break
+            if match == Match.PARTIAL and partial is None:
+                partial = route
+        scope["ayuvibe.route"] = full or partial
+    return scope["ayuvibe.route"]
+
+
+def route_template(scope) -> str:
+    """The path template of the route ``scope`` will be dispatched to, e.g. ``/patients/{patient_id}``."""
+    route = match_route(scope)
+    return route.path if route is not None else UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Records latency, in-flight requests and per-request database usage for every HTTP route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, route = scope["method"], route_template(scope)
+        stats = QueryStats(route)
+        token = current_query_stats.set(stats)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc(method, route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec(method, route)
+            current_query_stats.reset(token)
+            REQUESTS.inc(method, route, str(status))
+            REQUEST_LATENCY.observe(elapsed, method, route)
+            REQUEST_QUERIES.observe(stats.queries, method, route)
+            REQUEST_DB_SECONDS.observe(stats.seconds, method, route)
+            if stats.slow_queries:
+                SLOW_QUERIES.inc(method, route, amount=stats.slow_queries)
@@ -1,6 +1,6 @@
 # models.py
 
-from sqlalchemy import Column, Integer, String, func, ForeignKey, Date, DateTime, Text
+from sqlalchemy import Column, Float, Integer, SmallInteger, String, func, ForeignKey, Date, DateTime, Text, Time, Index
 from sqlalchemy.orm import relationship
 from database.db import Base
 
@@ -21,6 +21,9 @@ class Patient(Base):
     registration_date = Column(DateTime, server_default=func.now())
     password = Column(String(255), nullable=False)
 
+# Login identity: one case-insensitive email per account, shared with doctors below
+Index("uq_patients_email_lower", func.lower(Patient.email), unique=True)
+
 class Doctor(Base):
     __tablename__ = "doctors"
     doctor_id = Column(Integer, primary_key=True, index=True)
@@ -36,6 +39,55 @@ class Doctor(Base):
     registration_date = Column(DateTime, server_default=func.now())
     password = Column(String(255), nullable=False)
 
+    # Directory search filters: specialization within a city, city within a state
+    __table_args__ = (
+        Index("ix_doctors_specialization_city", "specialization", "city"),
+        Index("ix_doctors_city_specialization", "city", "specialization"),
+        Index("ix_doctors_state_city", "state", "city"),
+        Index("ix_doctors_postal_code", "postal_code"),
+        # Directory pages in (sort column, doctor_id) order, unfiltered for every sort and
+        # under each equality filter for the default last-name sort
+        Index("ix_doctors_last_name_id", "last_name", "doctor_id"),
+        Index("ix_doctors_first_name_id", "first_name", "doctor_id"),
+        Index("ix_doctors_city_id", "city", "doctor_id"),
+        Index("ix_doctors_specialization_id", "specialization", "doctor_id"),
+        Index("ix_doctors_city_last_name_id", "city", "last_name", "doctor_id"),
+        Index("ix_doctors_specialization_last_name_id", "specialization", "last_name", "doctor_id"),
+        Index("ix_doctors_state_last_name_id", "state", "last_name", "doctor_id"),
+    )
+
+# Login identity: one case-insensitive email per doctor; sign-ups and updates also check patients
+Index("uq_doctors_email_lower", func.lower(Doctor.email), unique=True)
+# Case-insensitive name prefix search (LIKE 'abc%') for the doctor directory
+Index("ix_doctors_last_name_lower", func.lower(Doctor.last_name).label("last_name_lower"),
+      postgresql_ops={"last_name_lower": "text_pattern_ops"})
+Index("ix_doctors_first_name_lower", func.lower(Doctor.first_name).label("first_name_lower"),
+      postgresql_ops={"first_name_lower": "text_pattern_ops"})
+
+class PostalCode(Base):
+    # Centroid of each postal code, loaded from a CSV with ``manage.py import-catalog postal_codes``
+    __tablename__ = "postal_codes"
+    postal_code_id = Column(Integer, primary_key=True, index=True)
+    postal_code = Column(String(10), nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    city = Column(String(50))
+    state = Column(String(50))
+
+Index("uq_postal_codes_postal_code", PostalCode.postal_code, unique=True)
+
+class DoctorWorkingHours(Base):
+    __tablename__ = "doctor_working_hours"
+    working_hours_id = Column(Integer, primary_key=True, index=True)
+    doctor_id = Column(Integer, ForeignKey("doctors.doctor_id", ondelete="CASCADE"), nullable=False)
+    weekday = Column(SmallInteger, nullable=False)  # 0 = Monday ... 6 = Sunday
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+
+    __table_args__ = (
+        Index("ix_doctor_working_hours_doctor_weekday", "doctor_id", "weekday"),
+    )
+
 class Appointment(Base):
     __tablename__ = "appointments"
     appointment_id = Column(Integer, primary_key=True, index=True)
@@ -46,8 +98,18 @@ class Appointment(Base):
     appointment_status = Column(String(50), default='Scheduled')
     created_at = Column(DateTime, server_default=func.now())
 
+    # Booking conflict checks, slot searches and agendas scan one doctor's (or patient's)
+    # appointments by time
+    __table_args__ = (
+        Index("ix_appointments_doctor_date", "doctor_id", "appointment_date"),
+        Index("ix_appointments_patient_date", "patient_id", "appointment_date"),
+    )
+
     patient = relationship("Patient")
     doctor = relationship("Doctor")
+    # passive_deletes="all" leaves child rows to the database's foreign keys on delete
+    diagnoses = relationship("Diagnosis", back_populates="appointment", passive_deletes="all")
+    follow_ups = relationship("FollowUp", back_populates="appointment", passive_deletes="all")
 
 class Diagnosis(Base):
     __tablename__ = "diagnoses"
@@ -56,7 +118,8 @@ class Diagnosis(Base):
     diagnosis_date = Column(DateTime, server_default=func.now())
     diagnosis_description = Column(Text, nullable=False)
 
-    appointment = relationship("Appointment")
+    appointment = relationship("Appointment", back_populates="diagnoses")
+    treatments = relationship("Treatment", back_populates="diagnosis", passive_deletes="all")
 
 class Treatment(Base):
     __tablename__ = "treatments"
@@ -67,7 +130,7 @@ class Treatment(Base):
     duration = Column(String(50))
     created_at = Column(DateTime, server_default=func.now())
 
-    diagnosis = relationship("Diagnosis")
+    diagnosis = relationship("Diagnosis", back_populates="treatments")
 
 class FollowUp(Base):
     __tablename__ = "follow_ups"
@@ -76,7 +139,7 @@ class FollowUp(Base):
     follow_up_date = Column(DateTime)
     follow_up_notes = Column(Text)
 
-    appointment = relationship("Appointment")
+    appointment = relationship("Appointment", back_populates="follow_ups")
 
 
 class Herb(Base):
@@ -90,6 +153,15 @@ class Herb(Base):
     primary_uses = Column(Text)
     dosage = Column(String)
     form = Column(String)
+    # Names keyed like ingredient text (utils.ingredients.herb_name_key), kept by relink_herbs
+    herb_name_key = Column(String)
+    botanical_name_key = Column(String)
+
+# Natural key used by catalog imports (upserts)
+Index("uq_herbs_herb_name", Herb.herb_name, unique=True)
+# Name lookups when linking remedy ingredients to herbs
+Index("ix_herbs_herb_name_key", Herb.herb_name_key)
+Index("ix_herbs_botanical_name_key", Herb.botanical_name_key)
 
 class Remedy(Base):
     __tablename__ = 'remedies'
@@ -100,4 +172,15 @@ class Remedy(Base):
     benefits = Column(Text)
     preparation_method = Column(Text)
     dosage_instructions = Column(String)
-    precautions = Column(Text)
\ No newline at end of file
+    precautions = Column(Text)
+
+Index("uq_remedies_remedy_name", Remedy.remedy_name, unique=True)
+
+# Herbs named in each remedy's ingredients, derived by utils/ingredients.py
+class RemedyHerb(Base):
+    __tablename__ = 'remedy_herbs'
+
+    remedy_id = Column(Integer, ForeignKey("remedies.remedy_id", ondelete="CASCADE"), primary_key=True)
+    herb_id = Column(Integer, ForeignKey("herbs.herb_id", ondelete="CASCADE"), primary_key=True)
+
+    __table_args__ = (Index("ix_remedy_herbs_herb_remedy", "herb_id", "remedy_id"),)
@@ -0,0 +1,80 @@
+# pagination.py
+
+import base64
+import json
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
+
+# Page size bounds shared by every collection endpoint
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return payload
+
+
+def primary_key(model):
+    return model.__mapper__.primary_key[0]
+
+
+def row_to_dict(obj) -> dict:
+    return {attr.key: getattr(obj, attr.key) for attr in obj.__mapper__.column_attrs}
+
+
+def keyset_select(model, cursor: Optional[str], limit: int, columns: Optional[list] = None, filters=()):
+    """Select one page of ``model`` ordered by primary key, starting after ``cursor``.
+
+    One extra row is fetched so that ``build_page`` can tell whether another page exists.
+    With ``columns``, only those columns are selected and rows come back as plain dicts.
+    ``filters`` are extra WHERE criteria.
+    """
+    pk = primary_key(model)
+    stmt = (select(*columns) if columns else select(model)).where(*filters).order_by(pk).limit(limit + 1)
+    if cursor:
+        last_id = decode_cursor(cursor).get("id")
+        if not isinstance(last_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(pk > last_id)
+    return stmt
+
+
+def build_page(rows, model, limit: int) -> dict:
+    rows = list(rows)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last, key = rows[-1], primary_key(model).key
+        next_cursor = encode_cursor({"id": last[key] if isinstance(last, dict) else getattr(last, key)})
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+def _rows(result, columns: Optional[list]) -> list:
+    if columns:
+        return [dict(row) for row in result.mappings()]
+    return result.scalars().all()
+
+
+def paginate(db, model, cursor: Optional[str], limit: int, columns: Optional[list] = None, filters=()) -> dict:
+    result = db.execute(keyset_select(model, cursor, limit, columns, filters))
+    return build_page(_rows(result, columns), model, limit)
+
+
+async def paginate_async(db, model, cursor: Optional[str], limit: int, columns: Optional[list] = None,
+                         filters=()) -> dict:
+    result = await db.execute(keyset_select(model, cursor, limit, columns, filters))
+    return build_page(_rows(result, columns), model, limit)
@@ -0,0 +1,115 @@
+# password_pool.py
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils import jwt
+
+# bcrypt runs in its own process pool, awaited from async endpoints, so password checks
+# never occupy the AnyIO threadpool shared by the sync endpoints.
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", os.cpu_count() or 1))
+# Threads in AnyIO's default threadpool, which serves every sync endpoint
+THREADPOOL_TOKENS = 40
+# Hash/verify jobs allowed in flight (running + queued) before new ones are rejected. Kept to
+# at most half the threadpool, so auth work can never crowd out the sync endpoints.
+BCRYPT_QUEUE_SIZE = int(os.getenv("BCRYPT_QUEUE_SIZE", min(BCRYPT_WORKERS * 4, THREADPOOL_TOKENS // 2)))
+BCRYPT_RETRY_AFTER = int(os.getenv("BCRYPT_RETRY_AFTER", "1"))
+
+
+class PasswordPoolBusy(Exception):
+    def __init__(self, retry_after: int = BCRYPT_RETRY_AFTER):
+        super().__init__("Password hashing pool is saturated")
+        self.retry_after = retry_after
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class PasswordPool:
+    def __init__(self, workers: int = BCRYPT_WORKERS, queue_size: int = BCRYPT_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.hash_seconds_total = 0.0
+        self.hash_seconds_max = 0.0
+        self.wait_seconds_total = 0.0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn, not fork: forking a threaded server can copy locks held by other threads
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._executor
+
+    async def run(self, func, *args):
+        """Run ``func`` in the process pool and await it, or raise PasswordPoolBusy when the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordPoolBusy()
+        with self._lock:
+            self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            result, hash_seconds = await asyncio.wrap_future(self._get_executor().submit(_timed, func, *args))
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+        with self._lock:
+            self.completed += 1
+            self.hash_seconds_total += hash_seconds
+            self.hash_seconds_max = max(self.hash_seconds_max, hash_seconds)
+            self.wait_seconds_total += elapsed - hash_seconds
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "queue_depth": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_hash_ms": round(self.hash_seconds_total / completed * 1000, 3),
+                "max_hash_ms": round(self.hash_seconds_max * 1000, 3),
+                "avg_queue_wait_ms": round(self.wait_seconds_total / completed * 1000, 3),
+            }
+
+    def warm_up(self):
+        executor = self._get_executor()
+        for future in [executor.submit(_timed, len, "") for _ in range(self.workers)]:
+            future.result()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_pool = PasswordPool()
+
+
+async def hash_password(password: str) -> str:
+    return await password_pool.run(jwt.hash_password, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_pool.run(jwt.verify_password, plain_password, hashed_password)
@@ -0,0 +1,296 @@
+# ratelimit.py
+
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from fastapi.responses import JSONResponse
+
+from utils.cache import REDIS_URL
+from utils.metrics import match_route, registry, route_template
+from utils.password_pool import BCRYPT_QUEUE_SIZE, THREADPOOL_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# Per route tag: "Tag:client=COUNT/SECONDS,route=COUNT/SECONDS,concurrent=N;Tag:...".
+# client buckets are per client address and route, route buckets are shared by all clients;
+# both hold COUNT tokens and refill at COUNT per SECONDS. concurrent caps the tag's in-flight requests.
+# Auth requests in flight never exceed half the AnyIO threadpool, whatever BCRYPT_QUEUE_SIZE is set to.
+AUTH_CONCURRENCY = min(BCRYPT_QUEUE_SIZE, THREADPOOL_TOKENS // 2)
+RATE_LIMITS = os.getenv("RATE_LIMITS", f"Auth:client=10/60,route=50/1,concurrent={AUTH_CONCURRENCY}")
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "local")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_PREFIX = "ayuvibe:ratelimit"
+# Requests in flight per worker before everything but health checks and stats gets a 503; 0 disables the cap
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "256"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+# Proxies in front of the app that append to X-Forwarded-For; 0 uses the socket address
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+# Probes and scrapes must keep working while the app sheds load
+ADMISSION_EXEMPT_TAGS = ("Health", "Stats")
+
+REJECTED = registry.counter(
+    "http_requests_rejected_total", "Requests turned away by admission control, by route and reason",
+    ("method", "route", "reason")
+)
+
+
+class Rate(NamedTuple):
+    count: int
+    seconds: float
+
+    @property
+    def per_second(self) -> float:
+        return self.count / self.seconds
+
+
+class TagLimits(NamedTuple):
+    client: Optional[Rate] = None
+    route: Optional[Rate] = None
+    concurrent: int = 0
+
+
+def parse_rate(value: str) -> Rate:
+    count, _, seconds = value.partition("/")
+    rate = Rate(int(count), float(seconds or 1))
+    if rate.count <= 0 or rate.seconds <= 0:
+        raise ValueError(f"Rate must be positive: {value}")
+    return rate
+
+
+def parse_limits(spec: str) -> dict:
+    """Parse a RATE_LIMITS string into ``{tag: TagLimits}``."""
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        tag, _, settings = entry.partition(":")
+        values = {}
+        for setting in filter(None, (part.strip() for part in settings.split(","))):
+            name, _, value = setting.partition("=")
+            if name in ("client", "route"):
+                values[name] = parse_rate(value)
+            elif name == "concurrent":
+                values[name] = int(value)
+            else:
+                raise ValueError(f"Unknown rate limit setting {name!r} for tag {tag!r}")
+        limits[tag.strip()] = TagLimits(**values)
+    return limits
+
+
+class LocalBucketBackend:
+    """Token buckets in this worker's memory, least recently used dropped first.
+
+    Only touched from the event loop, so no lock is needed.
+    """
+
+    name = "local"
+
+    def __init__(self, maxsize: int = RATE_LIMIT_MAX_KEYS):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+
+    def take_local(self, key: tuple, rate: Rate) -> float:
+        """Take one token from ``key``'s bucket. Returns 0 when granted, else seconds until a token is due."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(rate.count), now]
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        tokens = min(rate.count, bucket[0] + (now - bucket[1]) * rate.per_second)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / rate.per_second
+
+    async def take(self, key: tuple, rate: Rate) -> float:
+        return self.take_local(key, rate)
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "buckets": len(self._buckets), "max_buckets": self.maxsize}
+
+
+# Same algorithm as take_local, run atomically on the Redis server with its clock.
+# Returns the wait as a string because Lua numbers are truncated to integers on the way out.
+TOKEN_BUCKET_SCRIPT = """
+local count = tonumber(ARGV[1])
+local per_second = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or count
+local updated = tonumber(state[2]) or now
+tokens = math.min(count, tokens + math.max(0, now - updated) * per_second)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / per_second
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(count / per_second) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBucketBackend(LocalBucketBackend):
+    """Token buckets shared by every worker through Redis; falls back to local buckets if Redis fails."""
+
+    name = "redis"
+
+    def __init__(self, maxsize: int = RATE_LIMIT_MAX_KEYS, url: str = REDIS_URL):
+        super().__init__(maxsize)
+        import redis.asyncio as redis
+
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(TOKEN_BUCKET_SCRIPT)
+        self.errors = 0
+
+    async def take(self, key: tuple, rate: Rate) -> float:
+        try:
+            wait = await self._script(
+                keys=[":".join((RATE_LIMIT_PREFIX, *map(str, key)))], args=[rate.count, rate.per_second]
+            )
+            return float(wait)
+        except Exception:
+            # Limit per worker rather than fail every request (or none) while Redis is down
+            self.errors += 1
+            logger.warning("Rate limit backend unavailable, using local buckets", exc_info=True)
+            return self.take_local(key, rate)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "errors": self.errors}
+
+
+BUCKET_BACKENDS = {
+    "local": LocalBucketBackend,
+    "redis": RedisBucketBackend,
+}
+
+
+def client_address(scope, trusted_hops: int = TRUSTED_PROXY_HOPS) -> str:
+    """The caller's address: the socket peer, or the entry our trusted proxies added to X-Forwarded-For."""
+    if trusted_hops:
+        for name, value in scope.get("headers", ()):
+            if name == b"x-forwarded-for":
+                hops = [hop.strip() for hop in value.decode("latin-1").split(",") if hop.strip()]
+                if hops:
+                    return hops[-min(trusted_hops, len(hops))]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class Rejection(NamedTuple):
+    status_code: int
+    reason: str
+    retry_after: float
+    detail: str
+
+
+class AdmissionControl:
+    def __init__(self, limits: dict, max_concurrent: int = MAX_CONCURRENT_REQUESTS,
+                 backend_name: str = RATE_LIMIT_BACKEND):
+        self.limits = limits
+        self.max_concurrent = max_concurrent
+        self.backend = BUCKET_BACKENDS[backend_name]()
+        self.in_flight = 0
+        self.in_flight_by_tag = {}
+        self.rejected = {}
+
+    def tag_for(self, route) -> Optional[str]:
+        for tag in getattr(route, "tags", None) or ():
+            if tag in ADMISSION_EXEMPT_TAGS:
+                return None
+            if tag in self.limits:
+                return tag
+        return ""
+
+    async def check(self, scope, route, tag: str) -> Optional[Rejection]:
+        """Decide whether to serve a request, cheapest checks first. Returns why not, or None."""
+        if self.max_concurrent and self.in_flight >= self.max_concurrent:
+            return Rejection(503, "overloaded", ADMISSION_RETRY_AFTER, "Server is overloaded, please retry")
+        limits = self.limits.get(tag)
+        if limits is None:
+            return None
+        if limits.concurrent and self.in_flight_by_tag.get(tag, 0) >= limits.concurrent:
+            return Rejection(503, "concurrency", ADMISSION_RETRY_AFTER, "Service is busy, please retry")
+        # The client's own bucket first, so a client over its limit can't drain the shared route bucket
+        path = route.path if route is not None else scope["path"]
+        if limits.client:
+            wait = await self.backend.take(("client", path, client_address(scope)), limits.client)
+            if wait:
+                return Rejection(429, "client_rate", wait, "Too many requests, please retry later")
+        if limits.route:
+            wait = await self.backend.take(("route", path), limits.route)
+            if wait:
+                return Rejection(429, "route_rate", wait, "Too many requests, please retry later")
+        return None
+
+    def enter(self, tag: str):
+        self.in_flight += 1
+        self.in_flight_by_tag[tag] = self.in_flight_by_tag.get(tag, 0) + 1
+
+    def leave(self, tag: str):
+        self.in_flight -= 1
+        self.in_flight_by_tag[tag] -= 1
+
+    def stats(self) -> dict:
+        return {
+            **self.backend.stats(),
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self.in_flight,
+            "in_flight_by_tag": {tag: count for tag, count in self.in_flight_by_tag.items() if tag},
+            "rejected": dict(self.rejected),
+            "limits": {tag: limits._asdict() for tag, limits in self.limits.items()},
+        }
+
+
+admission = AdmissionControl(parse_limits(RATE_LIMITS))
+
+
+class AdmissionMiddleware:
+    """Turns requests away before any endpoint work when a rate limit or concurrency cap is hit.
+
+    Rate limits answer 429 and concurrency caps 503, both with Retry-After, so a flood of
+    expensive requests (e.g. bcrypt-bound logins) is shed instead of starving cheap reads.
+    """
+
+    def __init__(self, app, control: AdmissionControl = admission):
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = match_route(scope)
+        tag = self.control.tag_for(route)
+        if tag is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejection = await self.control.check(scope, route, tag)
+        if rejection is not None:
+            self.control.rejected[rejection.reason] = self.control.rejected.get(rejection.reason, 0) + 1
+            REJECTED.inc(scope["method"], route_template(scope), rejection.reason)
+            response = JSONResponse(
+                status_code=rejection.status_code,
+                content={"detail": rejection.detail},
+                headers={"Retry-After": str(max(1, math.ceil(rejection.retry_after)))},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.control.enter(tag)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.control.leave(tag)
@@ -0,0 +1,20 @@
+# responses.py
+
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson, which also encodes date/datetime natively."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(jsonable_encoder(content))
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
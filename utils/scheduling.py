@@ -0,0 +1,243 @@
+# scheduling.py
+
+import os
+from datetime import date, datetime, timedelta
+from bisect import bisect_right, insort
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from fastapi import HTTPException
+from sqlalchemy import and_, delete, or_, select
+
+from utils.models import Appointment, Doctor, DoctorWorkingHours
+
+# Every appointment occupies one fixed-length slot starting at its appointment_date.
+# Times are stored as naive wall-clock time in CLINIC_TIMEZONE, like the rest of the appointment data.
+CLINIC_TIMEZONE = ZoneInfo(os.getenv("CLINIC_TIMEZONE", "Asia/Kolkata"))
+APPOINTMENT_SLOT_MINUTES = int(os.getenv("APPOINTMENT_SLOT_MINUTES", "30"))
+SLOT_SEARCH_MAX_DAYS = 31
+
+# Statuses that no longer hold their slot
+INACTIVE_STATUSES = ("Cancelled",)
+
+Interval = Tuple[datetime, datetime]
+
+
+def clinic_time(value: datetime) -> datetime:
+    """``value`` as naive CLINIC_TIMEZONE wall-clock time; naive values are taken to be in it already."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(CLINIC_TIMEZONE).replace(tzinfo=None)
+
+
+def slot_length() -> timedelta:
+    return timedelta(minutes=APPOINTMENT_SLOT_MINUTES)
+
+
+def validate_working_hours(entries: list) -> list:
+    """Reject malformed weekly hours: bad weekdays, empty ranges and overlaps within a day."""
+    by_day = {}
+    for entry in entries:
+        if not 0 <= entry.weekday <= 6:
+            raise HTTPException(status_code=400, detail="weekday must be between 0 (Monday) and 6 (Sunday)")
+        if entry.start_time >= entry.end_time:
+            raise HTTPException(status_code=400, detail="start_time must be before end_time")
+        by_day.setdefault(entry.weekday, []).append((entry.start_time, entry.end_time))
+    for ranges in by_day.values():
+        ranges.sort()
+        if any(later[0] < earlier[1] for earlier, later in zip(ranges, ranges[1:])):
+            raise HTTPException(status_code=400, detail="Working hours overlap on the same weekday")
+    return sorted(entries, key=lambda entry: (entry.weekday, entry.start_time))
+
+
+def replace_working_hours(db, doctor_id: int, entries: list) -> list:
+    db.execute(delete(DoctorWorkingHours).where(DoctorWorkingHours.doctor_id == doctor_id))
+    rows = [DoctorWorkingHours(doctor_id=doctor_id, **entry.dict()) for entry in validate_working_hours(entries)]
+    db.add_all(rows)
+    db.commit()
+    return rows
+
+
+def working_windows(hours: list, start: date, end: date) -> List[Interval]:
+    """Expand weekly ``hours`` into concrete, sorted working intervals for the days ``start``..``end``."""
+    by_day = {}
+    for row in hours:
+        by_day.setdefault(row.weekday, []).append(row)
+    windows = []
+    day = start
+    while day <= end:
+        for row in by_day.get(day.weekday(), ()):
+            windows.append((datetime.combine(day, row.start_time), datetime.combine(day, row.end_time)))
+        day += timedelta(days=1)
+    windows.sort()
+    return windows
+
+
+def free_slots(windows: List[Interval], busy: List[Interval], slot: timedelta,
+               not_before: Optional[datetime] = None) -> List[Interval]:
+    """Cut each working window into ``slot``-long pieces, skipping pieces that overlap ``busy``.
+
+    Both lists must be sorted by start; busy intervals are all one slot long, so they are sorted
+    by end too. Slots start on a grid anchored at each window's start, and one sweep over windows
+    and busy intervals together keeps this linear in their sizes.
+    """
+    slots = []
+    index = 0
+    for window_start, window_end in windows:
+        current = window_start
+        while current + slot <= window_end:
+            # Busy intervals that end before this slot can never overlap a later one either
+            while index < len(busy) and busy[index][1] <= current:
+                index += 1
+            overlaps = index < len(busy) and busy[index][0] < current + slot
+            if not overlaps and (not_before is None or current >= not_before):
+                slots.append((current, current + slot))
+            current += slot
+    return slots
+
+
+def _active_appointments(doctor_id: int, start: datetime, end: datetime):
+    """Appointments of ``doctor_id`` whose slot overlaps [start, end), in time order."""
+    return (
+        select(Appointment.appointment_id, Appointment.appointment_date)
+        .where(
+            Appointment.doctor_id == doctor_id,
+            Appointment.appointment_date > start - slot_length(),
+            Appointment.appointment_date < end,
+            or_(Appointment.appointment_status.is_(None), Appointment.appointment_status.notin_(INACTIVE_STATUSES)),
+        )
+        .order_by(Appointment.appointment_date)
+    )
+
+
+async def find_free_slots(db, doctor_id: int, start: date, end: date) -> List[Interval]:
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days >= SLOT_SEARCH_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"At most {SLOT_SEARCH_MAX_DAYS} days per slot search")
+    if await db.get(Doctor, doctor_id) is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+
+    hours = (await db.execute(
+        select(DoctorWorkingHours).where(DoctorWorkingHours.doctor_id == doctor_id)
+    )).scalars().all()
+    windows = working_windows(hours, start, end)
+    if not windows:
+        return []
+
+    slot = slot_length()
+    rows = (await db.execute(_active_appointments(doctor_id, windows[0][0], windows[-1][1]))).all()
+    busy = [(row.appointment_date, row.appointment_date + slot) for row in rows]
+    return free_slots(windows, busy, slot, not_before=clinic_time(datetime.now(CLINIC_TIMEZONE)))
+
+
+OUTSIDE_HOURS = "Requested time is outside the doctor's working hours"
+DOUBLE_BOOKED = "Doctor already has an appointment at this time"
+
+
+def within_hours(hours: list, start: datetime) -> bool:
+    """Whether a slot starting at ``start`` fits one of ``hours``; doctors without hours accept any time."""
+    end = start + slot_length()
+    return not hours or any(
+        row.weekday == start.weekday()
+        and datetime.combine(start.date(), row.start_time) <= start
+        and end <= datetime.combine(start.date(), row.end_time)
+        for row in hours
+    )
+
+
+def ensure_bookable(db, doctor_id: int, start: datetime, appointment_id: Optional[int] = None):
+    """Check that ``doctor_id`` can take an appointment at ``start``, holding a lock on the doctor.
+
+    The doctor row is locked FOR UPDATE until the caller commits, so concurrent bookings for the
+    same doctor run this check one at a time while bookings for other doctors don't wait.
+    Doctors without configured working hours accept any time that doesn't overlap.
+    """
+    locked = db.execute(select(Doctor.doctor_id).where(Doctor.doctor_id == doctor_id).with_for_update()).scalar()
+    if locked is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+
+    end = start + slot_length()
+    hours = db.execute(
+        select(DoctorWorkingHours).where(DoctorWorkingHours.doctor_id == doctor_id)
+    ).scalars().all()
+    if not within_hours(hours, start):
+        raise HTTPException(status_code=409, detail=OUTSIDE_HOURS)
+
+    conflicts = [row for row in db.execute(_active_appointments(doctor_id, start, end)).all()
+                 if row.appointment_id != appointment_id]
+    if conflicts:
+        raise HTTPException(status_code=409, detail=DOUBLE_BOOKED)
+
+
+def book_appointment(db, values: dict) -> Appointment:
+    values = dict(values, appointment_date=clinic_time(values["appointment_date"]))
+    ensure_bookable(db, values["doctor_id"], values["appointment_date"])
+    appointment = Appointment(**values)
+    db.add(appointment)
+    db.commit()
+    db.refresh(appointment)
+    return appointment
+
+
+def check_bookings(db, valid: list, errors: list) -> list:
+    """Drop bulk appointments that ``ensure_bookable`` would refuse, reporting each in ``errors``.
+
+    Every doctor in the batch is locked FOR UPDATE, in id order so concurrent batches can't
+    deadlock, until the caller commits. Hours come from one IN query and existing bookings from
+    one query with a date range per doctor; items accepted earlier in the batch count as booked
+    for later ones. Expects ``check_appointment_references`` to have run.
+    """
+    if not valid:
+        return valid
+    valid = [(index, dict(row, appointment_date=clinic_time(row["appointment_date"]))) for index, row in valid]
+    doctor_ids = sorted({row["doctor_id"] for _, row in valid})
+    db.execute(select(Doctor.doctor_id).where(Doctor.doctor_id.in_(doctor_ids))
+               .order_by(Doctor.doctor_id).with_for_update()).all()
+
+    hours = {}
+    for row in db.execute(select(DoctorWorkingHours).where(DoctorWorkingHours.doctor_id.in_(doctor_ids))).scalars():
+        hours.setdefault(row.doctor_id, []).append(row)
+    ranges = {}
+    for _, row in valid:
+        first, last = ranges.get(row["doctor_id"], (row["appointment_date"], row["appointment_date"]))
+        ranges[row["doctor_id"]] = (min(first, row["appointment_date"]), max(last, row["appointment_date"]))
+    slot = slot_length()
+    booked = {doctor_id: [] for doctor_id in doctor_ids}
+    existing = db.execute(
+        select(Appointment.doctor_id, Appointment.appointment_date).where(
+            or_(*(and_(Appointment.doctor_id == doctor_id,
+                       Appointment.appointment_date > first - slot,
+                       Appointment.appointment_date < last + slot)
+                  for doctor_id, (first, last) in ranges.items())),
+            or_(Appointment.appointment_status.is_(None), Appointment.appointment_status.notin_(INACTIVE_STATUSES)),
+        )
+    ).all()
+    for doctor_id, start in existing:
+        insort(booked[doctor_id], start)
+
+    checked = []
+    for index, row in valid:
+        start, starts = row["appointment_date"], booked[row["doctor_id"]]
+        # Every booking is one slot long, so two overlap exactly when their starts are under a slot apart
+        position = bisect_right(starts, start - slot)
+        if not within_hours(hours.get(row["doctor_id"], ()), start):
+            errors.append({"index": index, "detail": OUTSIDE_HOURS})
+        elif position < len(starts) and starts[position] < start + slot:
+            errors.append({"index": index, "detail": DOUBLE_BOOKED})
+        else:
+            insort(starts, start)
+            checked.append((index, row))
+    return checked
+
+
+def check_reschedule(db, appointment: Appointment, changes: dict) -> dict:
+    """Re-run the booking check when an update moves ``appointment`` or reactivates a cancelled one."""
+    if changes.get("appointment_date") is not None:
+        changes["appointment_date"] = clinic_time(changes["appointment_date"])
+    status = changes.get("appointment_status", appointment.appointment_status)
+    reactivated = appointment.appointment_status in INACTIVE_STATUSES and status not in INACTIVE_STATUSES
+    if status not in INACTIVE_STATUSES and (changes.get("appointment_date") is not None or reactivated):
+        start = changes.get("appointment_date") or appointment.appointment_date
+        ensure_bookable(db, appointment.doctor_id, start, appointment.appointment_id)
+    return changes
@@ -1,8 +1,12 @@
 # schemas.py
-from typing import Optional
+from datetime import date, datetime, time
+from typing import Dict, List, Optional
 
+import pydantic
 from pydantic import BaseModel, EmailStr
 
+PYDANTIC_V2 = pydantic.VERSION.startswith("2")
+
 class PatientCreate(BaseModel):
     first_name: str
     last_name: str
@@ -17,24 +21,24 @@ class PatientCreate(BaseModel):
 
 
 class PatientUpdate(BaseModel):
-    first_name: Optional[str]
-    last_name: Optional[str]
-    date_of_birth: Optional[str]
-    gender: Optional[str]
-    phone_number: Optional[str]
-    email: Optional[str]
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    date_of_birth: Optional[str] = None
+    gender: Optional[str] = None
+    phone_number: Optional[str] = None
+    email: Optional[str] = None
     password: str
-    address: Optional[str]
-    city: Optional[str]
-    state: Optional[str]
-    postal_code: Optional[str]
+    address: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    postal_code: Optional[str] = None
 
 
 # Pydantic Schemas
 class PatientSignup(BaseModel):
     first_name: str
     last_name: str
-    date_of_birth: str
+    date_of_birth: date
     gender: str
     phone_number: str
     email: EmailStr
@@ -58,16 +62,16 @@ class DoctorCreate(BaseModel):
 
 
 class DoctorUpdate(BaseModel):
-    first_name: Optional[str]
-    last_name: Optional[str]
-    specialization: Optional[str]
-    phone_number: Optional[str]
-    email: Optional[str]
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    specialization: Optional[str] = None
+    phone_number: Optional[str] = None
+    email: Optional[str] = None
     password: str
-    address: Optional[str]
-    city: Optional[str]
-    state: Optional[str]
-    postal_code: Optional[str]
+    address: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    postal_code: Optional[str] = None
 
 
 class DoctorSignup(BaseModel):
@@ -86,14 +90,14 @@ class DoctorSignup(BaseModel):
 class AppointmentCreate(BaseModel):
     patient_id: int
     doctor_id: int
-    appointment_date: str
+    appointment_date: datetime
     reason: str
 
 
 class AppointmentUpdate(BaseModel):
-    appointment_date: Optional[str]
-    reason: Optional[str]
-    appointment_status: Optional[str]
+    appointment_date: Optional[datetime] = None
+    reason: Optional[str] = None
+    appointment_status: Optional[str] = None
 
 
 class DiagnosisCreate(BaseModel):
@@ -102,7 +106,7 @@ class DiagnosisCreate(BaseModel):
 
 
 class DiagnosisUpdate(BaseModel):
-    diagnosis_description: Optional[str]
+    diagnosis_description: Optional[str] = None
 
 
 class TreatmentCreate(BaseModel):
@@ -113,9 +117,9 @@ class TreatmentCreate(BaseModel):
 
 
 class TreatmentUpdate(BaseModel):
-    treatment_description: Optional[str]
-    dosage: Optional[str]
-    duration: Optional[str]
+    treatment_description: Optional[str] = None
+    dosage: Optional[str] = None
+    duration: Optional[str] = None
 
 
 class FollowUpCreate(BaseModel):
@@ -125,8 +129,14 @@ class FollowUpCreate(BaseModel):
 
 
 class FollowUpUpdate(BaseModel):
-    follow_up_date: Optional[str]
-    follow_up_notes: Optional[str]
+    follow_up_date: Optional[str] = None
+    follow_up_notes: Optional[str] = None
+
+
+class WorkingHours(BaseModel):
+    weekday: int  # 0 = Monday ... 6 = Sunday
+    start_time: time
+    end_time: time
 
 
 class Login(BaseModel):
@@ -143,9 +153,6 @@ class HerbCreate(BaseModel):
     dosage: str = None
     form: str = None
 
-class HerbResponse(HerbCreate):
-    herb_id: int
-
 class RemedyCreate(BaseModel):
     remedy_name: str
     ingredients: str
@@ -154,6 +161,231 @@ class RemedyCreate(BaseModel):
     dosage_instructions: str = None
     precautions: str = None
 
-class RemedyResponse(RemedyCreate):
+
+# Read schemas: response models for the GET endpoints, built from ORM objects or
+# plain dicts. They never carry the password hash.
+class ReadModel(BaseModel):
+    if PYDANTIC_V2:
+        model_config = pydantic.ConfigDict(from_attributes=True)
+    else:
+        class Config:
+            orm_mode = True
+
+
+class PatientRead(ReadModel):
+    patient_id: int
+    first_name: str
+    last_name: str
+    date_of_birth: Optional[date]
+    gender: Optional[str]
+    phone_number: Optional[str]
+    email: Optional[str]
+    address: Optional[str]
+    city: Optional[str]
+    state: Optional[str]
+    postal_code: Optional[str]
+    registration_date: Optional[datetime]
+
+
+class DoctorRead(ReadModel):
+    doctor_id: int
+    first_name: str
+    last_name: str
+    specialization: Optional[str]
+    phone_number: Optional[str]
+    email: Optional[str]
+    address: Optional[str]
+    city: Optional[str]
+    state: Optional[str]
+    postal_code: Optional[str]
+    registration_date: Optional[datetime]
+
+
+class DoctorDirectoryEntry(ReadModel):
+    doctor_id: int
+    first_name: str
+    last_name: str
+    specialization: Optional[str]
+    phone_number: Optional[str]
+    email: Optional[str]
+    address: Optional[str]
+    city: Optional[str]
+    state: Optional[str]
+    postal_code: Optional[str]
+
+
+class AppointmentRead(ReadModel):
+    appointment_id: int
+    patient_id: Optional[int]
+    doctor_id: Optional[int]
+    appointment_date: datetime
+    reason: Optional[str]
+    appointment_status: Optional[str]
+    created_at: Optional[datetime]
+
+
+class DiagnosisRead(ReadModel):
+    diagnosis_id: int
+    appointment_id: Optional[int]
+    diagnosis_date: Optional[datetime]
+    diagnosis_description: str
+
+
+class TreatmentRead(ReadModel):
+    treatment_id: int
+    diagnosis_id: Optional[int]
+    treatment_description: str
+    dosage: Optional[str]
+    duration: Optional[str]
+    created_at: Optional[datetime]
+
+
+class FollowUpRead(ReadModel):
+    follow_up_id: int
+    appointment_id: Optional[int]
+    follow_up_date: Optional[datetime]
+    follow_up_notes: Optional[str]
+
+
+class HerbResponse(ReadModel):
+    herb_id: int
+    herb_name: str
+    botanical_name: Optional[str]
+    common_names: Optional[str]
+    benefits: Optional[str]
+    primary_uses: Optional[str]
+    dosage: Optional[str]
+    form: Optional[str]
+
+
+class RemedyResponse(ReadModel):
     remedy_id: int
+    remedy_name: str
+    ingredients: Optional[str]
+    benefits: Optional[str]
+    preparation_method: Optional[str]
+    dosage_instructions: Optional[str]
+    precautions: Optional[str]
+
+
+# Keyset pages ({"items", "next_cursor"}) per model
+class PatientPage(ReadModel):
+    items: List[PatientRead]
+    next_cursor: Optional[str]
+
+
+class DoctorPage(ReadModel):
+    items: List[DoctorRead]
+    next_cursor: Optional[str]
+
+
+class DoctorDirectoryPage(ReadModel):
+    items: List[DoctorDirectoryEntry]
+    next_cursor: Optional[str]
+    facets: Dict[str, Dict[str, int]]
+
+
+class NearbyDoctor(DoctorDirectoryEntry):
+    distance_km: float
+
+
+class NearbyDoctors(ReadModel):
+    postal_code: str
+    latitude: float
+    longitude: float
+    radius_km: float
+    items: List[NearbyDoctor]
+
+
+class AppointmentPage(ReadModel):
+    items: List[AppointmentRead]
+    next_cursor: Optional[str]
 
+
+class DiagnosisPage(ReadModel):
+    items: List[DiagnosisRead]
+    next_cursor: Optional[str]
+
+
+class TreatmentPage(ReadModel):
+    items: List[TreatmentRead]
+    next_cursor: Optional[str]
+
+
+class FollowUpPage(ReadModel):
+    items: List[FollowUpRead]
+    next_cursor: Optional[str]
+
+
+class HerbPage(ReadModel):
+    items: List[HerbResponse]
+    next_cursor: Optional[str]
+
+
+class RemedyPage(ReadModel):
+    items: List[RemedyResponse]
+    next_cursor: Optional[str]
+
+
+# Nested views: patient timeline and an appointment's diagnoses
+class DiagnosisWithTreatments(DiagnosisRead):
+    treatments: List[TreatmentRead]
+
+
+class AppointmentTimelineEntry(AppointmentRead):
+    diagnoses: List[DiagnosisWithTreatments]
+    follow_ups: List[FollowUpRead]
+
+
+class PatientTimeline(ReadModel):
+    patient_id: int
+    appointments: List[AppointmentTimelineEntry]
+
+
+class AppointmentDiagnosis(ReadModel):
+    diagnosis: DiagnosisRead
+    treatments: List[TreatmentRead]
+
+
+class SearchResult(ReadModel):
+    type: str
+    id: int
+    name: str
+    score: float
+
+
+class SearchResponse(ReadModel):
+    query: str
+    results: List[SearchResult]
+
+
+class Suggestion(ReadModel):
+    type: str
+    id: int
+    name: str
+    match: str
+    field: str
+    match_type: str
+    score: float
+
+
+class AutocompleteResponse(ReadModel):
+    query: str
+    results: List[Suggestion]
+
+
+class WorkingHoursRead(ReadModel):
+    weekday: int
+    start_time: time
+    end_time: time
+
+
+class Slot(ReadModel):
+    start: datetime
+    end: datetime
+
+
+class DoctorSlots(ReadModel):
+    doctor_id: int
+    slot_minutes: int
+    slots: List[Slot]
@@ -0,0 +1,183 @@
+# search.py
+
+import math
+import os
+import re
+from collections import defaultdict
+
+from sqlalchemy import DDL, event, select, text
+
+from database.db import Base
+from utils.live_index import LiveIndex
+from utils.models import Herb, Remedy
+
+# Workers without full-text search rebuild their index this often, picking up other workers' writes and imports
+SEARCH_REFRESH_SECONDS = float(os.getenv("SEARCH_REFRESH_SECONDS", "300"))
+
+# Fields indexed for each catalog type, with their relevance weight
+HERB_FIELDS = {"herb_name": 3.0, "common_names": 2.0, "botanical_name": 2.0, "benefits": 1.0, "primary_uses": 1.0}
+REMEDY_FIELDS = {"remedy_name": 3.0, "ingredients": 2.0, "benefits": 1.0, "precautions": 0.5}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of", "on", "or",
+    "the", "to", "with", "what", "which", "how", "i", "my", "me", "have", "has", "can", "should",
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(value: str) -> list:
+    tokens = []
+    for token in TOKEN_RE.findall((value or "").lower()):
+        if token in STOPWORDS:
+            continue
+        # Light plural folding so "pains" matches "pain"
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+# Postgres: generated tsvector columns with GIN indexes, created alongside the tables
+SEARCH_DDL = [
+    """ALTER TABLE herbs ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(herb_name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(common_names, '') || ' ' || coalesce(botanical_name, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(benefits, '') || ' ' || coalesce(primary_uses, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_herbs_search_vector ON herbs USING GIN (search_vector)",
+    """ALTER TABLE remedies ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(remedy_name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(ingredients, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(benefits, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(precautions, '')), 'D')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_remedies_search_vector ON remedies USING GIN (search_vector)",
+]
+
+for statement in SEARCH_DDL:
+    event.listen(Base.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+# Terms are OR-ed so partial matches still rank, with ts_rank_cd rewarding documents that cover more of the query
+POSTGRES_SEARCH_SQL = text("""
+    WITH q AS (
+        SELECT NULLIF(replace(plainto_tsquery('english', :query)::text, '&', '|'), '')::tsquery AS query
+    )
+    SELECT 'herb' AS type, herb_id AS id, herb_name AS name, ts_rank_cd(search_vector, q.query) AS score
+    FROM herbs, q WHERE search_vector @@ q.query
+    UNION ALL
+    SELECT 'remedy' AS type, remedy_id AS id, remedy_name AS name, ts_rank_cd(search_vector, q.query) AS score
+    FROM remedies, q WHERE search_vector @@ q.query
+    ORDER BY score DESC
+    LIMIT :limit
+""")
+
+
+class CatalogSearchIndex(LiveIndex):
+    """In-process inverted index over herbs and remedies, scored with BM25.
+
+    Used when the database has no full-text support (SQLite). The index is built on the
+    first query and then kept current by the catalog write endpoints.
+    """
+
+    k1 = 1.2
+    b = 0.75
+    state = ("_postings", "_doc_terms", "_doc_lengths", "_names", "_total_length")
+    refresh_seconds = SEARCH_REFRESH_SECONDS
+    label = "Catalog search index"
+
+    def __init__(self):
+        super().__init__()
+        self._postings = defaultdict(dict)
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._names = {}
+        self._total_length = 0.0
+
+    def _weighted_terms(self, obj, fields: dict) -> dict:
+        terms = defaultdict(float)
+        for field, weight in fields.items():
+            for token in tokenize(getattr(obj, field, None)):
+                terms[token] += weight
+        return terms
+
+    def _add(self, key, name: str, terms: dict):
+        self._remove(key)
+        for term, weight in terms.items():
+            self._postings[term][key] = weight
+        length = sum(terms.values())
+        self._doc_terms[key] = list(terms)
+        self._doc_lengths[key] = length
+        self._names[key] = name
+        self._total_length += length
+
+    def _remove(self, key):
+        for term in self._doc_terms.pop(key, ()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(key, 0.0)
+        self._names.pop(key, None)
+
+    def _add_herb(self, herb):
+        self._add(("herb", herb.herb_id), herb.herb_name, self._weighted_terms(herb, HERB_FIELDS))
+
+    def _add_remedy(self, remedy):
+        self._add(("remedy", remedy.remedy_id), remedy.remedy_name, self._weighted_terms(remedy, REMEDY_FIELDS))
+
+    def _build(self, herbs, remedies) -> "CatalogSearchIndex":
+        fresh = CatalogSearchIndex()
+        for herb in herbs:
+            fresh._add_herb(herb)
+        for remedy in remedies:
+            fresh._add_remedy(remedy)
+        return fresh
+
+    async def _read(self, db) -> tuple:
+        herbs = (await db.execute(select(Herb))).scalars().all()
+        remedies = (await db.execute(select(Remedy))).scalars().all()
+        return herbs, remedies
+
+    def upsert_herb(self, herb):
+        self._write(self._add_herb, herb)
+
+    def upsert_remedy(self, remedy):
+        self._write(self._add_remedy, remedy)
+
+    def remove(self, kind: str, item_id: int):
+        self._write(self._remove, (kind, item_id))
+
+    def search(self, query: str, limit: int = 10) -> list:
+        terms = set(tokenize(query))
+        with self._lock:
+            doc_count = len(self._doc_lengths)
+            if not terms or not doc_count:
+                return []
+            avg_length = self._total_length / doc_count or 1.0
+            scores = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[key] / avg_length)
+                    scores[key] += idf * tf * (self.k1 + 1) / (tf + norm)
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            return [
+                {"type": kind, "id": item_id, "name": self._names[(kind, item_id)], "score": round(score, 4)}
+                for (kind, item_id), score in ranked
+            ]
+
+
+catalog_index = CatalogSearchIndex()
+
+
+async def search_catalog(db, query: str, limit: int) -> list:
+    if db.bind.dialect.name == "postgresql":
+        rows = (await db.execute(POSTGRES_SEARCH_SQL, {"query": query, "limit": limit})).mappings().all()
+        return [{**row, "score": round(float(row["score"]), 4)} for row in rows]
+    await catalog_index.ensure_loaded(db)
+    return catalog_index.search(query, limit)
@@ -0,0 +1,53 @@
+# timeline.py
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from utils.models import Appointment, Diagnosis
+from utils.pagination import row_to_dict
+
+
+# Each relationship level is fetched with one IN query, so a timeline costs a fixed
+# number of queries (appointments, diagnoses, treatments, follow-ups) however long it is.
+async def load_patient_timeline(db, patient_id: int) -> list:
+    stmt = (
+        select(Appointment)
+        .where(Appointment.patient_id == patient_id)
+        .order_by(Appointment.appointment_date, Appointment.appointment_id)
+        .options(
+            selectinload(Appointment.diagnoses).selectinload(Diagnosis.treatments),
+            selectinload(Appointment.follow_ups),
+        )
+    )
+    appointments = (await db.execute(stmt)).scalars().all()
+    return [
+        {
+            **row_to_dict(appointment),
+            "diagnoses": [
+                {
+                    **row_to_dict(diagnosis),
+                    "treatments": [row_to_dict(treatment) for treatment in diagnosis.treatments],
+                }
+                for diagnosis in appointment.diagnoses
+            ],
+            "follow_ups": [row_to_dict(follow_up) for follow_up in appointment.follow_ups],
+        }
+        for appointment in appointments
+    ]
+
+
+async def load_appointment_diagnoses(db, appointment_id: int) -> list:
+    stmt = (
+        select(Diagnosis)
+        .where(Diagnosis.appointment_id == appointment_id)
+        .order_by(Diagnosis.diagnosis_id)
+        .options(selectinload(Diagnosis.treatments))
+    )
+    diagnoses = (await db.execute(stmt)).scalars().all()
+    return [
+        {
+            "diagnosis": row_to_dict(diagnosis),
+            "treatments": [row_to_dict(treatment) for treatment in diagnosis.treatments],
+        }
+        for diagnosis in diagnoses
+    ]